@@ -4,15 +4,39 @@ Precisely tuned scrapers using confirmed working HTML selectors
 Run: python api_server.py
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, NavigableString, CData
 import json
 import re
 import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
 from datetime import datetime, timezone
 import hashlib
+import itertools
+import os
+import signal
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from sentiment import analyse_reviews
+from product_index import ProductIndex
+from rankings import RankingIndex, METRICS as RANKING_METRICS
+from records import ProductRecord, dumps, loads
+from selector_stats import SelectorStats
+from memory_guard import MemoryWatermark
+from deadline import Deadline
+from work_queue import WorkQueue
+from sites import SITES, Site, SiteBusy, host_of, load_plugins, register_site, site_for_url
+from url_resolver import UrlResolver
+from change_tracker import ChangeTracker
+from profiler import SamplingProfiler
+from browser_governor import (
+    BrowserGovernor, BrowserMemoryExceeded, BrowserQueueTimeout, chromium_args, check_browser_memory,
+)
 
 app = Flask(__name__)
 CORS(app)
@@ -36,73 +60,276 @@ except:
 
 def _clean_url(url: str) -> str:
     """
-    Strip all tracking/query params, keep only the canonical product URL.
+    Strip all tracking/query params, keep only the canonical product URL
+    (each marketplace plugin's canonicalize()); other URLs pass through.
+    """
+    site = site_for_url(url)
+    return (site.canonicalize(url) if site else None) or url
+
+
+def _canonical_flipkart(url: str) -> str | None:
+    """
+    https://www.flipkart.com/<slug>/p/<item id> for desktop, mobile (m.) and
+    app deep-link (dl.flipkart.com/dl/…) variants alike.
     Flipkart item IDs are mixed-case: itmb07d67f995271 (lower) or MOBH4DQ (upper).
     """
-    fk_match = re.match(r"(https://(?:www|m)\.flipkart\.com/[^?#]+/p/[a-zA-Z0-9]+)", url)
-    if fk_match:
-        return fk_match.group(1)
+    m = re.match(r"https?://(?:(?:www|m|dl)\.)?flipkart\.com/(?:dl/)?([^?#]+/p/[a-zA-Z0-9]+)", url)
+    return f"https://www.flipkart.com/{m.group(1)}" if m else None
+
+
+def _canonical_amazon(url: str) -> str | None:
+    """
+    https://www.amazon.<tld>/dp/<ASIN>. The title slug is dropped — it varies
+    between links to the same listing — and /gp/product/, /gp/aw/d/ (mobile)
+    and /exec/obidos/ASIN/ links are folded in.
+    """
+    m = re.match(
+        r"https?://(?:www\.)?amazon\.([a-z.]+)/(?:[^?#]*?/)?"
+        r"(?:dp|gp/product|gp/aw/d|exec/obidos/ASIN|o/ASIN)/([A-Z0-9]{10})(?:[/?#]|$)",
+        url,
+    )
+    return f"https://www.amazon.{m.group(1)}/dp/{m.group(2)}" if m else None
+
+
+# Point every scraper request at a stand-in server instead of the real sites
+# (benchmarks/stub_marketplace.py): https://www.flipkart.com/x/p/itm1 is
+# fetched as $PRICEHAWK_UPSTREAM/www.flipkart.com/x/p/itm1. URLs are only
+# rewritten at request time — indexes and the database keep the real ones.
+UPSTREAM = os.environ.get("PRICEHAWK_UPSTREAM", "").rstrip("/")
+AMAZON_HOME_URL = os.environ.get("PRICEHAWK_AMAZON_HOME_URL", "https://www.amazon.in")
+
 
-    az_match = re.match(r"(https://www\.amazon\.[a-z.]+/[^?#]*/dp/[A-Z0-9]{10})", url)
-    if az_match:
-        return az_match.group(1)
+def _upstream(url: str) -> str:
+    """The address a marketplace URL is actually fetched from."""
+    return re.sub(r"^https?://", UPSTREAM + "/", url) if UPSTREAM else url
 
-    return url
+
+def _detect_platform(url: str) -> str | None:
+    """The registered marketplace owning the URL's host ("flipkart", "amazon"…), or None."""
+    site = site_for_url(url)
+    return site.name if site else None
 
 
 # ════════════════════════════════════════════════════════════════════════════
 # PAGE FETCHERS
-# Flipkart  → Playwright (Chromium) — Flipkart blocks all plain HTTP clients
+# Flipkart  → tiered: plain HTTP with browser-harvested cookies → mobile site
+#             → Playwright (Chromium), escalating only on incomplete data
 # Amazon    → requests + BeautifulSoup — works perfectly, no Playwright needed
+# Others    → the shared fetcher of their Site.strategy (fetch_page)
 # ════════════════════════════════════════════════════════════════════════════
 
-def _fetch_flipkart_playwright(url: str) -> str | None:
+# In-page extraction: evaluate a script in the rendered Flipkart page and
+# return a small JSON payload instead of the full serialized DOM. Set to
+# False to always ship page.content() back and parse it with BeautifulSoup.
+FLIPKART_INPAGE_EXTRACTION = True
+
+_FLIPKART_INPAGE_JS = r"""
+() => {
+  const text = (el) => el ? (el.innerText || el.textContent || "").trim() : null;
+  const byClass = (classes) => {
+    const out = {};
+    for (const cls of classes) {
+      const el = document.querySelector("div." + cls) || document.querySelector("span." + cls);
+      if (el) out[cls] = text(el);
+    }
+    return out;
+  };
+  const meta = {};
+  for (const prop of ["og:title", "og:image"]) {
+    const el = document.querySelector(`meta[property="${prop}"]`);
+    if (el && el.content) meta[prop] = el.content;
+  }
+  const img = [...document.images].find(i => /rukminim|fkimg/.test(i.getAttribute("src") || ""));
+
+  let cards = [...document.querySelectorAll("div.t-ZTKy")];
+  if (!cards.length) cards = [...document.querySelectorAll("div[data-review-id]")];
+  const reviewCards = cards.slice(0, 10).map(card => {
+    let ratingEl = card.querySelector("div._11pzQk") || card.querySelector("span._2_R_DZ");
+    let rating = ratingEl ? text(ratingEl) : null;
+    if (rating === null) {
+      const walker = document.createTreeWalker(card, NodeFilter.SHOW_TEXT);
+      for (let n = walker.nextNode(); n; n = walker.nextNode()) {
+        if (/^[1-5]$/.test(n.nodeValue)) { rating = n.nodeValue; break; }
+      }
+    }
+    const body = card.querySelector("div.row")
+      || card.querySelector('div[class*="_6K-7Co"], div[class*="qwjRop"]')
+      || card;
+    return {rating, body: text(body) || ""};
+  });
+
+  // Keyword-fallback candidates, only when the card selectors came up short
+  const reviewBlocks = [];
+  const usable = reviewCards.filter(c => c.body.length >= 40 && c.body.length <= 600).length;
+  if (usable < 3) {
+    for (const div of document.getElementsByTagName("div")) {
+      if (reviewBlocks.length >= 40) break;
+      const raw = div.textContent || "";
+      if (raw.length < 50 || raw.length > 4000) continue;
+      const t = text(div).replace(/\s+/g, " ");
+      if (t.length >= 50 && t.length <= 800) reviewBlocks.push(t);
+    }
+  }
+
+  return {
+    ld_json: [...document.querySelectorAll('script[type="application/ld+json"]')].map(s => s.textContent),
+    meta,
+    title_span: text(document.querySelector("span.B_NuCI")),
+    title_tag: document.title || null,
+    prices: byClass(["Nx9bqj", "_30jeq3", "_16Jk6d"]),
+    ratings: byClass(["_3LWZlK", "XQDdHH", "_1lRcqv"]),
+    image: img ? img.getAttribute("src") : null,
+    category_rows: [...document.querySelectorAll(
+      'div[class*="_2x1Yo4"], div[class*="_3eDEzL"], div[class*="_3GUdgS"]'
+    )].map(text),
+    review_cards: reviewCards,
+    review_blocks: reviewBlocks,
+    text: document.body ? document.body.innerText : "",
+  };
+}
+"""
+
+
+FLIPKART_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/124.0.0.0 Safari/537.36"
+)
+FLIPKART_MOBILE_USER_AGENT = (
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/124.0.0.0 Mobile Safari/537.36"
+)
+
+# Cookies from the last Chromium visit, replayed by the plain-HTTP tier
+FLIPKART_SESSION_TTL = 30 * 60
+_flipkart_session: dict = {"cookies": [], "harvested_at": 0.0}
+
+
+def _harvest_flipkart_session(context) -> None:
+    try:
+        cookies = [c for c in context.cookies() if "flipkart" in c.get("domain", "")]
+    except Exception:
+        return
+    if cookies:
+        _flipkart_session.update(cookies=cookies, harvested_at=time.time())
+
+
+def _flipkart_cookies() -> list:
+    if time.time() - _flipkart_session["harvested_at"] > FLIPKART_SESSION_TTL:
+        return []
+    return _flipkart_session["cookies"]
+
+
+# Chromium instances currently open; anything but 0 between requests is a leak
+_live_browsers = 0
+_live_browsers_lock = threading.Lock()
+
+
+def _count_browser(delta: int) -> None:
+    global _live_browsers
+    with _live_browsers_lock:
+        _live_browsers += delta
+
+
+# Host-wide cap on concurrent browsers (PRICEHAWK_BROWSER_SLOTS). A browser
+# fetch that cannot get a slot and finish within BROWSER_FETCH_TIMEOUT of
+# being asked for is dropped from the queue instead of waiting it out.
+BROWSER_GOVERNOR = BrowserGovernor()
+BROWSER_FETCH_TIMEOUT = float(os.environ.get("PRICEHAWK_BROWSER_TIMEOUT", "60"))
+
+# The current thread's last browser: seconds queued for its slot, memory marker
+_browser_slot = threading.local()
+
+
+@contextmanager
+def _browser_page(url: str, deadline: Deadline | None = None, ready: str | None = None):
     """
-    Flipkart returns 403 for every plain HTTP request regardless of headers.
-    Playwright launches a real headless Chromium so the TLS fingerprint,
-    JS execution, and cookie handling are identical to a real browser visit.
-    BeautifulSoup then parses the fully-rendered HTML tags normally.
+    Open a URL in a stealth headless Chromium and yield the loaded page,
+    after waiting (briefly) for the `ready` selector when given. The browser
+    is always closed when the caller is done with it — on every exit path,
+    including a failing close(): leaving sync_playwright() then stops the
+    driver, which kills any browser it launched.
+
+    The browser only runs while holding a BROWSER_GOVERNOR slot, queued until
+    the request's deadline (at most BROWSER_FETCH_TIMEOUT); navigation and
+    the ready wait get what is left of it.
     """
     from playwright.sync_api import sync_playwright, TimeoutError as PWTimeout
 
-    clean = _clean_url(url)
-    print(f"  → URL: {clean}")
-
-    try:
-        with sync_playwright() as pw:
-            browser = pw.chromium.launch(
-                headless=True,
-                args=[
-                    "--no-sandbox",
-                    "--disable-blink-features=AutomationControlled",
-                    "--disable-dev-shm-usage",
-                ],
-            )
+    deadline = deadline or Deadline(None)
+    _browser_slot.seconds = 0.0
+    slot_deadline = min(deadline.expires, time.monotonic() + BROWSER_FETCH_TIMEOUT)
+    with BROWSER_GOVERNOR.slot(slot_deadline) as waited, sync_playwright() as pw:
+        _browser_slot.seconds = waited
+        if waited >= 0.5:
+            print(f"  → Waited {waited:.1f}s for a browser slot")
+        limits, marker = chromium_args()
+        _browser_slot.marker = marker
+        browser = pw.chromium.launch(
+            headless=True,
+            args=[
+                "--no-sandbox",
+                "--disable-blink-features=AutomationControlled",
+                "--disable-dev-shm-usage",
+                *limits,
+            ],
+        )
+        _count_browser(+1)
+        try:
             context = browser.new_context(
                 viewport={"width": 1366, "height": 768},
-                user_agent=(
-                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/124.0.0.0 Safari/537.36"
-                ),
+                user_agent=FLIPKART_USER_AGENT,
                 locale="en-IN",
                 timezone_id="Asia/Kolkata",
                 extra_http_headers={"Accept-Language": "en-IN,en-US;q=0.9,en;q=0.8"},
             )
-            # Hide the webdriver flag so Flipkart's JS bot-check passes
+            # Hide the webdriver flag so JS bot-checks (Flipkart's) pass
             context.add_init_script(
                 "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
             )
             page = context.new_page()
-            print("  → Launching Chromium for Flipkart…")
-            page.goto(clean, wait_until="networkidle", timeout=45_000)
-            # Wait for the price element — confirms the product page fully loaded
+            print(f"  → Launching Chromium for {host_of(url)}…")
+            page.goto(_upstream(url), wait_until="networkidle", timeout=deadline.timeout_ms(45))
+            if ready:
+                try:
+                    page.wait_for_selector(ready, timeout=deadline.timeout_ms(10))
+                except PWTimeout:
+                    pass  # grab whatever rendered anyway
+            check_browser_memory(marker)
+            yield page
+        finally:
             try:
-                page.wait_for_selector("div.Nx9bqj, div._30jeq3, div._16Jk6d", timeout=10_000)
-            except PWTimeout:
-                pass  # grab HTML anyway
+                browser.close()
+            except Exception as exc:
+                print(f"  ⚠️  browser.close() failed ({exc}) — driver shutdown will kill it")
+            _count_browser(-1)
+
+
+@contextmanager
+def _flipkart_page(url: str, deadline: Deadline | None = None):
+    """A rendered Flipkart page; its cookies are kept for the plain-HTTP tier."""
+    # The price element confirms the product page fully loaded
+    with _browser_page(url, deadline, ready="div.Nx9bqj, div._30jeq3, div._16Jk6d") as page:
+        yield page
+        _harvest_flipkart_session(page.context)
+
+
+def _fetch_flipkart_playwright(url: str, deadline: Deadline | None = None) -> str | None:
+    """
+    Flipkart returns 403 for every plain HTTP request regardless of headers.
+    Playwright launches a real headless Chromium so the TLS fingerprint,
+    JS execution, and cookie handling are identical to a real browser visit.
+    BeautifulSoup then parses the fully-rendered HTML tags normally.
+    """
+    from playwright.sync_api import TimeoutError as PWTimeout
+
+    clean = _clean_url(url)
+    print(f"  → URL: {clean}")
+
+    try:
+        with _flipkart_page(clean, deadline) as page:
             html = page.content()
-            browser.close()
 
         if html and len(html) > 10_000:
             print(f"  ✅ Flipkart rendered ({len(html):,} chars)")
@@ -113,101 +340,524 @@ def _fetch_flipkart_playwright(url: str) -> str | None:
     except PWTimeout:
         print("  ❌ Playwright timeout on Flipkart")
         return None
+    except BrowserQueueTimeout:
+        raise  # the tier runner records it as dropped
     except Exception as exc:
         print(f"  ❌ Playwright error: {exc}")
         return None
 
 
-def _fetch_amazon_requests(url: str) -> str | None:
+def _scrape_flipkart_inpage(url: str, deadline: Deadline | None = None) -> dict | None:
     """
-    Amazon India works fine with plain requests — no Playwright needed.
-    Use realistic Chrome headers + homepage cookie seed + 2 retries.
+    Extract Flipkart data inside the browser instead of shipping the DOM back.
+
+    The in-page script (_FLIPKART_INPAGE_JS) returns a small JSON payload with
+    the JSON-LD blocks, og tags, selector texts, review cards and the visible
+    body text; extract_flipkart_payload() turns it into the usual product dict.
+    Unless the payload yields both title and price, the same page is
+    serialized with page.content() and parsed by extract_flipkart() as
+    before; a payload that looks like a block page is never used.
     """
+    from playwright.sync_api import TimeoutError as PWTimeout
+
     clean = _clean_url(url)
     print(f"  → URL: {clean}")
 
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/124.0.0.0 Safari/537.36"
-        ),
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+    html = None
+    partial = None
+    try:
+        with _flipkart_page(clean, deadline) as page:
+            try:
+                payload = page.evaluate(_FLIPKART_INPAGE_JS)
+            except Exception as exc:
+                print(f"  → In-page extraction failed: {exc}")
+                payload = None
+
+            if payload and _flipkart_payload_blocked(payload):
+                print("  → In-page payload looks like a block page")
+            elif payload:
+                data = extract_flipkart_payload(payload)
+                if _flipkart_complete(data):
+                    size = len(json.dumps(payload, ensure_ascii=False))
+                    print(f"  ✅ Flipkart extracted in-page ({size:,} chars payload)")
+                    return data
+                partial = data
+
+            print("  → In-page payload incomplete — falling back to full HTML")
+            html = page.content()
+
+    except PWTimeout:
+        print("  ❌ Playwright timeout on Flipkart")
+        return None
+    except BrowserQueueTimeout:
+        raise  # the tier runner records it as dropped
+    except Exception as exc:
+        print(f"  ❌ Playwright error: {exc}")
+        return None
+
+    if html and len(html) > 10_000:
+        print(f"  ✅ Flipkart rendered ({len(html):,} chars)")
+        data = extract_flipkart(html)
+        return data if _flipkart_complete(data) or not partial else partial
+    print(f"  ❌ Flipkart page too small — likely blocked")
+    return partial
+
+
+# A real product page has JSON-LD or og tags and kilobytes of visible text;
+# a block/captcha page ("Access Denied") has neither — the same idea as the
+# 10 kB floor on fetched HTML.
+FLIPKART_MIN_PAYLOAD_TEXT = 2_000
+
+
+def _flipkart_payload_blocked(payload: dict) -> bool:
+    has_metadata = bool(payload.get("ld_json")) or bool((payload.get("meta") or {}).get("og:title"))
+    return not has_metadata and len(payload.get("text") or "") < FLIPKART_MIN_PAYLOAD_TEXT
+
+
+# ─── Flipkart fetch tiers ───────────────────────────────────────────────────
+# Cheapest first; the next tier only runs when the previous one's extraction
+# fails _flipkart_complete(). Override with PRICEHAWK_FLIPKART_TIERS=browser.
+FLIPKART_TIERS = tuple(
+    t.strip() for t in os.environ.get("PRICEHAWK_FLIPKART_TIERS", "http,mobile,browser").split(",")
+    if t.strip()
+)
+FLIPKART_REQUIRED_FIELDS = ("title", "price")
+
+_tier_lock = threading.Lock()
+_tier_stats: dict = {}
+
+
+def _record_tier(tier: str, outcome: str, elapsed: float, queued: float = 0.0) -> None:
+    """
+    outcome: "hit" (complete data), "incomplete", "failed" (no page), "dropped"
+    (no browser slot in time) or "skipped". `elapsed` excludes `queued`.
+    """
+    with _tier_lock:
+        s = _tier_stats.setdefault(
+            tier, {"attempts": 0, "hit": 0, "incomplete": 0, "failed": 0, "dropped": 0, "skipped": 0,
+                   "total_ms": 0.0, "total_queue_ms": 0.0}
+        )
+        s[outcome] += 1
+        if outcome != "skipped":
+            s["attempts"] += 1
+            s["total_ms"] += elapsed * 1000
+            s["total_queue_ms"] += queued * 1000
+
+
+def flipkart_tier_stats() -> dict:
+    """Per-tier hit rate, mean fetch latency and mean browser-slot wait of the Flipkart fetcher."""
+    with _tier_lock:
+        out = {}
+        for tier, s in _tier_stats.items():
+            n = s["attempts"]
+            out[tier] = {
+                **{k: v for k, v in s.items() if k not in ("total_ms", "total_queue_ms")},
+                "hit_rate": round(s["hit"] / n, 3) if n else None,
+                "avg_ms": round(s["total_ms"] / n, 1) if n else None,
+                "avg_queue_ms": round(s["total_queue_ms"] / n, 1) if n else None,
+            }
+        return out
+
+
+def _flipkart_complete(data: dict | None) -> bool:
+    return bool(data) and all(data.get(f) for f in FLIPKART_REQUIRED_FIELDS)
+
+
+def _fetch_flipkart_http(url: str, mobile: bool = False, deadline: Deadline | None = None) -> str | None:
+    """
+    Plain HTTP GET of a Flipkart page, replaying the cookies harvested from
+    the last Chromium visit. mobile=True asks m.flipkart.com with a phone UA,
+    which serves a lighter server-rendered page.
+    """
+    target = re.sub(r"^https://(?:www\.)?flipkart\.com", "https://m.flipkart.com", url) if mobile else url
+    session = requests.Session()
+    session.headers.update({
+        "User-Agent": FLIPKART_MOBILE_USER_AGENT if mobile else FLIPKART_USER_AGENT,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
         "Accept-Language": "en-IN,en-US;q=0.9,en;q=0.8",
-        "Accept-Encoding": "gzip, deflate, br",
-        "Connection": "keep-alive",
-        "Upgrade-Insecure-Requests": "1",
-        "Cache-Control": "max-age=0",
-    }
+    })
+    cookies = _flipkart_cookies()
+    for c in cookies:
+        session.cookies.set(c["name"], c["value"], domain=c.get("domain"), path=c.get("path", "/"))
+    try:
+        resp = session.get(_upstream(target), timeout=(deadline or Deadline(None)).timeout(10), allow_redirects=True)
+    except Exception as exc:
+        print(f"  → Flipkart HTTP error: {exc}")
+        return None
+    print(f"  → HTTP {resp.status_code} ({'mobile' if mobile else 'desktop'}, {len(cookies)} cookies)")
+    if resp.status_code == 403 and cookies and not mobile:
+        _flipkart_session["harvested_at"] = 0.0  # cookies burned — re-harvest next browser visit
+    if resp.status_code == 200 and len(resp.text) > 10_000:
+        return resp.text
+    return None
+
+
+def _fetch_flipkart_browser(url: str, deadline: Deadline | None = None) -> dict | None:
+    if FLIPKART_INPAGE_EXTRACTION:
+        return _scrape_flipkart_inpage(url, deadline)
+    html = _fetch_flipkart_playwright(url, deadline)
+    return extract_flipkart(html) if html else None
+
+
+def _fetch_flipkart_tiered(url: str, deadline: Deadline | None = None) -> dict | None:
+    """
+    Run FLIPKART_TIERS in order and return the first complete extraction.
+    If no tier is complete, or the deadline runs out before the next tier,
+    the most complete partial result is returned.
+    """
+    deadline = deadline or Deadline(None)
+    clean = _clean_url(url)
+    best = None
+    for tier in FLIPKART_TIERS:
+        if deadline.skip(f"flipkart {tier} tier"):
+            break
+        if tier == "http" and not _flipkart_cookies():
+            _record_tier(tier, "skipped", 0.0)  # nothing harvested yet
+            continue
+
+        start = time.perf_counter()
+        _browser_slot.seconds = 0.0
+        try:
+            if tier == "browser":
+                data = _fetch_flipkart_browser(clean, deadline)
+            else:
+                html = _fetch_flipkart_http(clean, mobile=(tier == "mobile"), deadline=deadline)
+                data = extract_flipkart(html) if html else None
+        except BrowserQueueTimeout as exc:
+            print(f"  ❌ Flipkart {tier} tier dropped: {exc}")
+            _record_tier(tier, "dropped", 0.0, time.perf_counter() - start)
+            continue
+        except Exception as exc:
+            print(f"  → Flipkart {tier} tier error: {exc}")
+            data = None
+        queued = _browser_slot.seconds
+        elapsed = time.perf_counter() - start - queued
+
+        if _flipkart_complete(data):
+            _record_tier(tier, "hit", elapsed, queued)
+            print(f"  ✅ Flipkart via {tier} tier ({elapsed * 1000:.0f} ms fetch, {queued * 1000:.0f} ms queued)")
+            return data
+        _record_tier(tier, "incomplete" if data else "failed", elapsed, queued)
+        if data and (best is None or len(data) > len(best)):
+            best = data
+        print(f"  → Flipkart {tier} tier {'incomplete' if data else 'failed'} — escalating")
+    return best
+
+
+DESKTOP_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/124.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-IN,en-US;q=0.9,en;q=0.8",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+    "Cache-Control": "max-age=0",
+}
+
+
+def _amazon_session(deadline: Deadline | None = None) -> requests.Session:
+    """requests session with Chrome headers, seeded with homepage cookies."""
+    session = requests.Session()
+    session.headers.update(DESKTOP_HEADERS)
+    try:
+        session.get(_upstream(AMAZON_HOME_URL), timeout=(deadline or Deadline(None)).timeout(10))
+    except Exception:
+        pass
+    return session
+
+
+def _fetch_amazon_requests(url: str, deadline: Deadline | None = None) -> str | None:
+    """
+    Amazon India works fine with plain requests — no Playwright needed.
+    Use realistic Chrome headers + homepage cookie seed + 2 retries.
+    Every wait is clipped to the deadline, and no attempt starts past it.
+    """
+    deadline = deadline or Deadline(None)
+    clean = _clean_url(url)
+    print(f"  → URL: {clean}")
 
     for attempt in range(2):
+        if deadline.skip(f"amazon attempt {attempt + 1}"):
+            break
         try:
-            session = requests.Session()
-            session.headers.update(headers)
-            # Seed session with homepage cookies
-            try:
-                session.get("https://www.amazon.in", timeout=10)
-            except Exception:
-                pass
-            time.sleep(2)
-            resp = session.get(clean, timeout=20, allow_redirects=True)
+            session = _amazon_session(deadline)
+            deadline.sleep(2)
+            resp = session.get(_upstream(clean), timeout=deadline.timeout(20), allow_redirects=True)
             print(f"  → HTTP {resp.status_code} (attempt {attempt + 1})")
             if resp.status_code == 200 and len(resp.text) > 10_000:
                 print(f"  ✅ Amazon fetched ({len(resp.text):,} chars)")
                 return resp.text
         except Exception as exc:
             print(f"  → Amazon request error (attempt {attempt + 1}): {exc}")
-        time.sleep(3)
+        if attempt == 0:
+            deadline.sleep(3)
 
     print("  ❌ All Amazon attempts failed")
     return None
 
 
-def fetch_page(url: str, platform: str) -> str | None:
-    """Route each platform to its proven fetcher."""
-    if platform == "flipkart":
-        return _fetch_flipkart_playwright(url)
-    else:
-        return _fetch_amazon_requests(url)
+# ─── Shared fetchers, chosen by Site.strategy ───────────────────────────────
+# Pages shorter than this are block/consent pages, not product pages
+MIN_PAGE_HTML = 10_000
+
+
+def _fetch_http(url: str, deadline: Deadline | None = None) -> str | None:
+    """The "http" strategy: one GET with desktop Chrome headers."""
+    deadline = deadline or Deadline(None)
+    try:
+        resp = requests.get(_upstream(url), headers=DESKTOP_HEADERS, timeout=deadline.timeout(20),
+                            allow_redirects=True)
+    except Exception as exc:
+        print(f"  → HTTP error ({host_of(url)}): {exc}")
+        return None
+    print(f"  → HTTP {resp.status_code} ({host_of(url)}, {len(resp.text):,} chars)")
+    if resp.status_code == 200 and len(resp.text) > MIN_PAGE_HTML:
+        return resp.text
+    return None
+
+
+def _fetch_browser(url: str, deadline: Deadline | None = None) -> str | None:
+    """The "browser" strategy: the page as rendered by headless Chromium."""
+    from playwright.sync_api import TimeoutError as PWTimeout
+
+    try:
+        with _browser_page(url, deadline) as page:
+            html = page.content()
+    except (PWTimeout, BrowserQueueTimeout) as exc:
+        print(f"  ❌ Browser fetch of {host_of(url)} gave up: {exc}")
+        return None
+    except Exception as exc:
+        print(f"  ❌ Playwright error: {exc}")
+        return None
+    return html if html and len(html) > MIN_PAGE_HTML else None
+
+
+def _fetch_tiered(url: str, deadline: Deadline | None = None) -> str | None:
+    """The "tiered" strategy: plain HTTP, escalating to Chromium when it fails."""
+    deadline = deadline or Deadline(None)
+    html = _fetch_http(url, deadline)
+    if html or deadline.skip(f"{host_of(url)} browser fetch"):
+        return html
+    return _fetch_browser(url, deadline)
+
+
+FETCHERS = {"http": _fetch_http, "browser": _fetch_browser, "tiered": _fetch_tiered}
+
+
+def _site(platform: str) -> Site:
+    site = SITES.get(platform)
+    if site is None:
+        raise ValueError(f"Unknown marketplace {platform!r}")
+    return site
+
+
+def fetch_page(url: str, platform: str, deadline: Deadline | None = None) -> str | None:
+    """The raw page HTML: the site's own fetcher if it has one, else its strategy's."""
+    site = _site(platform)
+    fetch = site.fetch_html or FETCHERS[site.strategy]
+    return fetch(url, deadline or Deadline(None))
+
+
+def fetch_and_extract(url: str, platform: str, deadline: Deadline | None = None) -> ProductRecord | None:
+    """
+    Fetch a product page, run the platform's extractor and score the
+    review text (sentiment.analyse_reviews). Returns None when the page could not be fetched at all.
+    The extractor dict is converted to a ProductRecord here, so the price is parsed exactly once.
+    The fetch runs inside the site's concurrency/rate budget (sites.Site.budget).
+    Past the deadline, whatever was fetched is still extracted, but the
+    review sentiment pass is skipped (scoring then falls back to star ratings).
+    """
+    deadline = deadline or Deadline(None)
+    site = _site(platform)
+    try:
+        with site.budget(deadline):
+            if site.extract is not None:
+                data = site.extract(url, deadline)
+            else:
+                html = fetch_page(url, platform, deadline)
+                data = site.parse(html) if html else None
+    except SiteBusy as exc:
+        deadline.skipped.append(f"{platform} fetch")
+        print(f"  ⏱️  {exc}")
+        return None
+
+    if not data:
+        return None
+    if not deadline.skip(f"{platform} review sentiment"):
+        analyse_reviews(data)
+    return ProductRecord.from_dict(data)
 
 
 # ════════════════════════════════════════════════════════════════════════════
-# FLIPKART EXTRACTOR
+# REVIEW DEDUPLICATION
+# Exact duplicates are caught by a set of hashes of the normalised text;
+# near-duplicates (the same review wrapped in "Certified Buyer", dates or a
+# rating digit by an outer container) by MinHash signatures over word
+# shingles, bucketed with LSH banding so each check is O(1) on average.
 # ════════════════════════════════════════════════════════════════════════════
 
-def extract_flipkart(html: str) -> dict:
+_REVIEW_NOISE_RE = re.compile(
+    r"certified buyer|verified (?:buyer|purchase)|read more|permalink|report abuse"
+    r"|reviewed in \w+ on \d{1,2} \w+ \d{4}|\d+\s+\w+\s+ago"
+    r"|\b\d{1,2}\s+(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\w*,?\s+\d{4}"
+    r"|\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\w*,?\s+\d{4}"
+    r"|\d+\s+(?:people|person) found this helpful|helpful"
+)
+
+_MINHASH_PERMS = 32
+_MINHASH_BANDS = 8
+# Each "permutation" XORs the shingle hashes with a fixed random 64-bit mask;
+# min(map(mask.__xor__, hashes)) keeps the inner loop in C
+_MINHASH_MASKS = [
+    int.from_bytes(hashlib.blake2b(f"minhash{i}".encode(), digest_size=8).digest(), "big")
+    for i in range(_MINHASH_PERMS)
+]
+
+
+def normalize_review_text(text: str) -> str:
+    """Lower-case, drop buyer/date/helpful noise and punctuation, collapse spaces."""
+    text = _REVIEW_NOISE_RE.sub(" ", text.lower())
+    text = re.sub(r"[^\w\s]", " ", text)
+    # A lone leading rating digit ("5 Great phone…") is card chrome, not review
+    text = re.sub(r"^\s*[1-5]\b", " ", text)
+    return " ".join(text.split())
+
+
+def _shingle_hashes(normalized: str) -> frozenset:
     """
-    Extract all product data from a Flipkart product page.
+    Hashes of the word 3-shingles of a normalised review. The built-in str
+    hash is salted per process, which is fine: signatures never leave it.
+    """
+    words = normalized.split()
+    return frozenset(hash(" ".join(words[i:i + 3])) for i in range(max(1, len(words) - 2)))
 
-    Working selector priority (confirmed):
-    TITLE     : JSON-LD @type=Product -> name
-                meta[property=og:title]  (strip trailing "- Buy ... | Flipkart")
-                h1 span class B_NuCI
-                title tag
 
-    PRICE     : JSON-LD -> offers.price / offers.lowPrice
-                div.Nx9bqj (current selling price)
-                div._30jeq3 (older class)
-                regex over raw HTML
+def _minhash(hashes: frozenset) -> tuple:
+    return tuple(min(map(mask.__xor__, hashes)) for mask in _MINHASH_MASKS)
 
-    IMAGE     : JSON-LD -> image (list or str)
-                meta[property=og:image]
-                img src containing rukminim (Flipkart CDN)
 
-    RATING    : JSON-LD -> aggregateRating.ratingValue
-                div._3LWZlK or div.XQDdHH (star-badge divs)
+class ReviewDeduper:
+    """
+    Seen-set for review texts. add() returns True the first time a review is
+    seen and False for exact (after normalisation) or near duplicates whose
+    shingle Jaccard similarity is at least `threshold`. LSH buckets find the
+    candidates; the exact Jaccard confirms them.
+    """
 
-    SPECS     : Full-text regex across entire HTML body
-    CAT-RATINGS: div class _2x1Yo4 or regex fallback
-    REVIEWS   : div class t-ZTKy containers; fallback keyword-match divs
+    def __init__(self, threshold: float = 0.85, near: bool = True):
+        self.threshold = threshold
+        self.near = near
+        self._exact: set[bytes] = set()
+        self._buckets: dict = {}
+        self._shingles: list[frozenset] = []
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.blake2b(normalize_review_text(text).encode(), digest_size=16).digest()
+
+    def add(self, text: str) -> bool:
+        normalized = normalize_review_text(text)
+        key = hashlib.blake2b(normalized.encode(), digest_size=16).digest()
+        if key in self._exact:
+            return False
+        if not self.near:
+            self._exact.add(key)
+            return True
+
+        shingles = _shingle_hashes(normalized)
+        sig = _minhash(shingles)
+        rows = _MINHASH_PERMS // _MINHASH_BANDS
+        bands = [(b, sig[b * rows:(b + 1) * rows]) for b in range(_MINHASH_BANDS)]
+        candidates = {i for band in bands for i in self._buckets.get(band, ())}
+        for i in candidates:
+            other = self._shingles[i]
+            if len(shingles & other) / len(shingles | other) >= self.threshold:
+                return False
+
+        self._exact.add(key)
+        idx = len(self._shingles)
+        self._shingles.append(shingles)
+        for band in bands:
+            self._buckets.setdefault(band, []).append(idx)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+
+def _text_lengths(soup: BeautifulSoup) -> dict:
     """
-    soup = BeautifulSoup(html, "html.parser")
-    data: dict = {"platform": "flipkart"}
+    len(tag.get_text(" ", strip=True)) for every non-script tag, computed
+    bottom-up in one pass instead of re-walking each subtree. Keyed by id(tag).
+    """
+    stats: dict = {}  # id(tag) -> (stripped chars, non-empty strings)
+    for node in reversed(list(soup.descendants)):
+        if isinstance(node, NavigableString):
+            continue
+        chars = count = 0
+        for child in node.children:
+            if isinstance(child, NavigableString):
+                if type(child) in (NavigableString, CData):
+                    stripped = len(child.strip())
+                    if stripped:
+                        chars += stripped
+                        count += 1
+            else:
+                c_chars, c_count = stats.get(id(child), (0, 0))
+                chars += c_chars
+                count += c_count
+        stats[id(node)] = (chars, count)
+    return {k: chars + count - 1 if count else 0 for k, (chars, count) in stats.items()}
 
-    # ── 1. JSON-LD (most reliable when present) ──────────────────────────────
-    for script in soup.find_all("script", type="application/ld+json"):
+
+# ════════════════════════════════════════════════════════════════════════════
+# ADAPTIVE SELECTOR CHAINS
+# Per-field fallback chains run through SELECTOR_STATS.run(), which skips
+# selectors that have stopped matching and alerts when a field's selector hit
+# rate collapses (see selector_stats.py). JSON-LD stays the fixed first source.
+# ════════════════════════════════════════════════════════════════════════════
+
+SELECTOR_STATS = SelectorStats()
+
+
+def _class_value(soup: BeautifulSoup, cls: str, parse):
+    """parse() of the first div/span with class `cls`, None if absent."""
+    el = soup.find("div", class_=cls) or soup.find("span", class_=cls)
+    return parse(el.get_text(strip=True)) if el else None
+
+
+# ════════════════════════════════════════════════════════════════════════════
+# FLIPKART EXTRACTOR
+# ════════════════════════════════════════════════════════════════════════════
+
+FLIPKART_SPEC_PATTERNS = {
+    "ram":       r"(\d+\s*GB)\s+RAM",
+    "storage":   r"(\d+\s*GB)\s+(?:ROM|Storage|Internal\s+Storage)",
+    "processor": r"((?:Snapdragon|Dimensity|MediaTek|Exynos|Apple\s+A\d+\w*|Helio|Bionic|Kirin)[\w\s\d\+\-]+?)(?=\s*(?:Processor|Chipset|SoC|,|<|\n|RAM))",
+    "camera":    r"(\d+\s*MP(?:\s+[\w\s]+)?(?:Primary|Main|Rear)\s*Camera|\d+\s*MP\s*(?:Rear|Front|Back)\s*Camera|\d+\s*MP\s*Camera)",
+    "battery":   r"(\d{3,5}\s*mAh)",
+    "display":   r"(\d{1,2}\.?\d*\s*inch|\d{3,4}\s*x\s*\d{3,4}\s*px|Full\s*HD\+?|AMOLED|Super\s*AMOLED|IPS\s*LCD|OLED)",
+}
+
+FLIPKART_PRICE_CLASSES = ("Nx9bqj", "_30jeq3", "_16Jk6d")
+FLIPKART_RATING_CLASSES = ("_3LWZlK", "XQDdHH", "_1lRcqv")
+
+FLIPKART_REVIEW_KEYWORDS = {
+    "camera", "battery", "display", "screen", "phone", "product",
+    "quality", "good", "excellent", "best", "build", "performance",
+    "fast", "value", "money", "happy", "satisfied",
+}
+
+
+def _apply_flipkart_jsonld(data: dict, blocks) -> None:
+    """Fill title/price/image/rating/brand from raw JSON-LD script bodies."""
+    for raw in blocks:
         try:
-            raw = script.string or ""
+            raw = raw or ""
             if not raw.strip():
                 continue
             blob = json.loads(raw)
@@ -255,103 +905,66 @@ def extract_flipkart(html: str) -> dict:
         except (json.JSONDecodeError, Exception):
             continue
 
-    # ── 2. Title fallbacks ────────────────────────────────────────────────────
-    if not data.get("title"):
-        og = soup.find("meta", {"property": "og:title"})
-        if og and og.get("content"):
-            title = og["content"]
-            # Strip "- Buy … | Flipkart" noise
-            title = re.sub(
-                r"\s*[-|]\s*(Buy|Online|Price|Flipkart|Best).*$", "", title, flags=re.I
-            ).strip()
-            data["title"] = title
 
-    if not data.get("title"):
-        # h1 with class B_NuCI (Flipkart's main title span)
-        h1 = soup.find("span", class_="B_NuCI")
-        if h1:
-            data["title"] = h1.get_text(strip=True)
+def _clean_flipkart_og_title(title: str) -> str:
+    """Strip "- Buy … | Flipkart" noise from an og:title."""
+    return re.sub(
+        r"\s*[-|]\s*(Buy|Online|Price|Flipkart|Best).*$", "", title, flags=re.I
+    ).strip()
 
-    if not data.get("title"):
-        tt = soup.find("title")
-        if tt:
-            data["title"] = re.sub(r"\s*[-|].*$", "", tt.get_text(), flags=re.I).strip()
 
-    # ── 3. Price fallbacks ────────────────────────────────────────────────────
-    if not data.get("price"):
-        for cls in ("Nx9bqj", "_30jeq3", "_16Jk6d"):
-            el = soup.find("div", class_=cls) or soup.find("span", class_=cls)
-            if el:
-                raw_price = el.get_text(strip=True).replace("₹", "").replace(",", "")
-                try:
-                    val = int(float(raw_price))
-                    if 500 <= val <= 1_000_000:
-                        data["price"] = f"₹{val:,}"
-                        break
-                except (ValueError, TypeError):
-                    pass
+def _parse_flipkart_price(text: str) -> str | None:
+    raw_price = text.replace("₹", "").replace(",", "")
+    try:
+        val = int(float(raw_price))
+        if 500 <= val <= 1_000_000:
+            return f"₹{val:,}"
+    except (ValueError, TypeError):
+        pass
+    return None
 
-    if not data.get("price"):
-        # Fallback: regex scan entire HTML
-        for m in re.finditer(r"₹\s*([\d,]+)", html):
-            try:
-                val = int(m.group(1).replace(",", ""))
-                if 1_000 <= val <= 1_000_000:
-                    data["price"] = f"₹{val:,}"
-                    break
-            except ValueError:
-                pass
 
-    # ── 4. Image fallbacks ────────────────────────────────────────────────────
-    if not data.get("image"):
-        og_img = soup.find("meta", {"property": "og:image"})
-        if og_img and og_img.get("content"):
-            data["image"] = og_img["content"]
+def _scan_flipkart_price(text: str) -> str | None:
+    """Last-resort price: first plausible ₹ amount anywhere in the text."""
+    for m in re.finditer(r"₹\s*([\d,]+)", text):
+        try:
+            val = int(m.group(1).replace(",", ""))
+            if 1_000 <= val <= 1_000_000:
+                return f"₹{val:,}"
+        except ValueError:
+            pass
+    return None
 
-    if not data.get("image"):
-        for img in soup.find_all("img"):
-            src = img.get("src", "")
-            if "rukminim" in src or "fkimg" in src:
-                data["image"] = src.split("?")[0]
-                break
 
-    # ── 5. Rating fallback ────────────────────────────────────────────────────
-    if not data.get("rating"):
-        for cls in ("_3LWZlK", "XQDdHH", "_1lRcqv"):
-            el = soup.find("div", class_=cls) or soup.find("span", class_=cls)
-            if el:
-                try:
-                    val = float(el.get_text(strip=True))
-                    if 1.0 <= val <= 5.0:
-                        data["rating"] = val
-                        break
-                except (ValueError, TypeError):
-                    pass
+def _parse_flipkart_rating(text: str) -> float | None:
+    try:
+        val = float(text)
+        if 1.0 <= val <= 5.0:
+            return val
+    except (ValueError, TypeError):
+        pass
+    return None
 
-    # ── 6. Specifications (full-HTML regex) ───────────────────────────────────
-    # These regexes work because Flipkart embeds spec text directly in HTML.
-    spec_patterns = {
-        "ram":       r"(\d+\s*GB)\s+RAM",
-        "storage":   r"(\d+\s*GB)\s+(?:ROM|Storage|Internal\s+Storage)",
-        "processor": r"((?:Snapdragon|Dimensity|MediaTek|Exynos|Apple\s+A\d+\w*|Helio|Bionic|Kirin)[\w\s\d\+\-]+?)(?=\s*(?:Processor|Chipset|SoC|,|<|\n|RAM))",
-        "camera":    r"(\d+\s*MP(?:\s+[\w\s]+)?(?:Primary|Main|Rear)\s*Camera|\d+\s*MP\s*(?:Rear|Front|Back)\s*Camera|\d+\s*MP\s*Camera)",
-        "battery":   r"(\d{3,5}\s*mAh)",
-        "display":   r"(\d{1,2}\.?\d*\s*inch|\d{3,4}\s*x\s*\d{3,4}\s*px|Full\s*HD\+?|AMOLED|Super\s*AMOLED|IPS\s*LCD|OLED)",
-    }
 
-    for field, pattern in spec_patterns.items():
+def _apply_spec_patterns(data: dict, patterns: dict, haystacks) -> None:
+    """Fill each missing spec field from the first haystack its regex matches."""
+    for field, pattern in patterns.items():
         if not data.get(field):
-            m = re.search(pattern, html, re.I)
-            if m:
-                data[field] = m.group(1).strip()[:60]
-
-    # ── 7. Category Ratings ───────────────────────────────────────────────────
-    # Flipkart shows category-wise ratings as divs like "Camera 4.2" or in JSON
+            for haystack in haystacks:
+                m = re.search(pattern, haystack, re.I)
+                if m:
+                    data[field] = m.group(1).strip()[:60]
+                    break
+
+
+def _flipkart_categories(row_texts, full_text: str) -> dict:
+    """
+    Category-wise ratings ("Camera 4.2") from the rating-summary rows,
+    falling back to a regex over the whole page text.
+    """
     categories: dict = {}
 
-    # Try structured extraction first
-    for row in soup.find_all("div", class_=re.compile(r"_2x1Yo4|_3eDEzL|_3GUdgS")):
-        text = row.get_text(" ", strip=True)
+    for text in row_texts:
         for cat in ("Camera", "Battery", "Display", "Performance", "Design", "Value for Money"):
             m = re.search(rf"{cat}\s+([\d.]+)", text, re.I)
             if m:
@@ -360,10 +973,9 @@ def extract_flipkart(html: str) -> dict:
                 except ValueError:
                     pass
 
-    # Generic fallback regex over full HTML
     if not categories:
         for cat in ("Camera", "Battery", "Display", "Performance", "Design"):
-            m = re.search(rf"(?<!\w){cat}\s+([\d]\.[0-9])", html, re.I)
+            m = re.search(rf"(?<!\w){cat}\s+([\d]\.[0-9])", full_text, re.I)
             if m:
                 try:
                     val = float(m.group(1))
@@ -372,82 +984,316 @@ def extract_flipkart(html: str) -> dict:
                 except ValueError:
                     pass
 
-    if categories:
-        data["category_ratings"] = categories
+    return categories
 
-    # ── 8. Reviews ────────────────────────────────────────────────────────────
-    reviews: list = []
 
-    # Primary: look for Flipkart's known review container classes
+def _flipkart_card_review(rating_text: str | None, body_text: str) -> dict | None:
+    """Build a review from one t-ZTKy card's rating badge and body text."""
+    rating = 5
+    if rating_text:
+        try:
+            rating = int(rating_text[0])
+            if not 1 <= rating <= 5:
+                rating = 5
+        except (ValueError, TypeError, IndexError):
+            rating = 5
+
+    text = re.sub(r"\s{2,}", " ", body_text).strip()
+
+    # Skip very short or very long strings, or strings that are pure noise
+    if 40 <= len(text) <= 600:
+        return {"rating": rating, "text": text[:400]}
+    return None
+
+
+def _flipkart_review_cards(soup: BeautifulSoup) -> list:
     # Class "t-ZTKy" wraps each individual review card
-    review_cards = (
+    return (
         soup.find_all("div", class_="t-ZTKy")
         or soup.find_all("div", attrs={"data-review-id": True})
         or []
     )
 
-    for card in review_cards[:10]:
-        try:
-            # Rating: span/div with single digit 1-5
-            rating_el = (
-                card.find("div", class_="_11pzQk")
-                or card.find("span", class_="_2_R_DZ")
-                or card.find(string=re.compile(r"^[1-5]$"))
-            )
-            rating = 5
-            if rating_el:
-                try:
-                    rating = int(str(rating_el if isinstance(rating_el, str)
-                                     else rating_el.get_text(strip=True))[0])
-                    if not 1 <= rating <= 5:
-                        rating = 5
-                except (ValueError, TypeError, IndexError):
-                    rating = 5
-
-            # Review body text
-            body_el = (
-                card.find("div", class_="row")
-                or card.find("div", attrs={"class": re.compile(r"_6K-7Co|qwjRop")})
-            )
-            if not body_el:
-                body_el = card
 
-            text = body_el.get_text(" ", strip=True)
-            text = re.sub(r"\s{2,}", " ", text).strip()
+def _parse_flipkart_review_card(card) -> dict | None:
+    try:
+        # Rating: span/div with single digit 1-5
+        rating_el = (
+            card.find("div", class_="_11pzQk")
+            or card.find("span", class_="_2_R_DZ")
+            or card.find(string=re.compile(r"^[1-5]$"))
+        )
+        rating_text = None
+        if rating_el:
+            rating_text = str(rating_el if isinstance(rating_el, str)
+                              else rating_el.get_text(strip=True))
+
+        # Review body text
+        body_el = (
+            card.find("div", class_="row")
+            or card.find("div", attrs={"class": re.compile(r"_6K-7Co|qwjRop")})
+        )
+        if not body_el:
+            body_el = card
+
+        return _flipkart_card_review(rating_text, body_el.get_text(" ", strip=True))
+    except Exception:
+        return None
+
 
-            # Skip very short or very long strings, or strings that are pure noise
-            if 40 <= len(text) <= 600 and text not in [r["text"] for r in reviews]:
-                reviews.append({"rating": rating, "text": text[:400]})
-        except Exception:
+def _flipkart_keyword_review(text: str) -> dict | None:
+    """Fallback review from any text block that reads like a review."""
+    if not (50 <= len(text) <= 800):
+        return None
+    words = set(text.lower().split())
+    if len(words & FLIPKART_REVIEW_KEYWORDS) < 2:
+        return None
+    # Guess rating from first number 1-5
+    m_r = re.search(r"\b([1-5])\b", text[:50])
+    rating = int(m_r.group(1)) if m_r else 4
+    cleaned = re.sub(
+        r"(Certified Buyer|Verified (Buyer|Purchase)|\d+\s+\w+\s+ago)", "", text
+    )
+    cleaned = re.sub(r"\s+", " ", cleaned).strip()
+    if len(cleaned) >= 40:
+        return {"rating": rating, "text": cleaned[:400]}
+    return None
+
+
+def _flipkart_keyword_reviews(soup: BeautifulSoup, reviews: list, seen: ReviewDeduper) -> None:
+    """
+    Append keyword-matched div texts to `reviews` (up to 10). Text lengths
+    come from one bottom-up pass, so get_text() only runs on review-sized
+    divs, and divs nested inside an accepted one are skipped — they repeat
+    the same text.
+    """
+    lengths = _text_lengths(soup)
+    accepted: set = set()
+    for div in soup.find_all("div"):
+        if len(reviews) >= 10:
+            break
+        if not 50 <= lengths.get(id(div), 0) <= 800:
+            continue
+        if accepted and any(id(p) in accepted for p in div.parents):
             continue
+        review = _flipkart_keyword_review(div.get_text(" ", strip=True))
+        if review and seen.add(review["text"]):
+            reviews.append(review)
+            accepted.add(id(div))
+
+
+def extract_flipkart(html: str) -> dict:
+    """
+    Extract all product data from a Flipkart product page.
+
+    Working selector priority (confirmed):
+    TITLE     : JSON-LD @type=Product -> name
+                meta[property=og:title]  (strip trailing "- Buy ... | Flipkart")
+                h1 span class B_NuCI
+                title tag
+
+    PRICE     : JSON-LD -> offers.price / offers.lowPrice
+                div.Nx9bqj (current selling price)
+                div._30jeq3 (older class)
+                regex over raw HTML
+
+    IMAGE     : JSON-LD -> image (list or str)
+                meta[property=og:image]
+                img src containing rukminim (Flipkart CDN)
+
+    RATING    : JSON-LD -> aggregateRating.ratingValue
+                div._3LWZlK or div.XQDdHH (star-badge divs)
+
+    SPECS     : Full-text regex across entire HTML body
+    CAT-RATINGS: div class _2x1Yo4 or regex fallback
+    REVIEWS   : div class t-ZTKy containers; fallback keyword-match divs
+
+    Title/price/rating chains after JSON-LD run via SELECTOR_STATS, which
+    demotes selectors that have stopped matching.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    try:
+        return _extract_flipkart_soup(soup, html)
+    finally:
+        # Break the tree's parent/child reference cycles now instead of
+        # leaving the whole page to the next cyclic GC pass
+        soup.decompose()
+
+
+def _extract_flipkart_soup(soup: BeautifulSoup, html: str) -> dict:
+    data: dict = {"platform": "flipkart"}
+
+    # ── 1. JSON-LD (most reliable when present) ──────────────────────────────
+    _apply_flipkart_jsonld(
+        data, (s.string for s in soup.find_all("script", type="application/ld+json"))
+    )
+
+    # ── 2. Title fallbacks ────────────────────────────────────────────────────
+    if not data.get("title"):
+        def og_title():
+            og = soup.find("meta", {"property": "og:title"})
+            return _clean_flipkart_og_title(og["content"]) if og and og.get("content") else None
+
+        def title_span():
+            # h1 with class B_NuCI (Flipkart's main title span)
+            h1 = soup.find("span", class_="B_NuCI")
+            return h1.get_text(strip=True) if h1 else None
+
+        def title_tag():
+            tt = soup.find("title")
+            return re.sub(r"\s*[-|].*$", "", tt.get_text(), flags=re.I).strip() if tt else None
+
+        title = SELECTOR_STATS.run(
+            "flipkart", "title", [("og:title", og_title), ("span.B_NuCI", title_span)], fallback=title_tag
+        )
+        if title:
+            data["title"] = title
+
+    # ── 3. Price fallbacks (regex scan of the entire HTML last) ───────────────
+    if not data.get("price"):
+        price = SELECTOR_STATS.run(
+            "flipkart", "price",
+            [(cls, lambda cls=cls: _class_value(soup, cls, _parse_flipkart_price))
+             for cls in FLIPKART_PRICE_CLASSES],
+            fallback=lambda: _scan_flipkart_price(html),
+        )
+        if price:
+            data["price"] = price
+
+    # ── 4. Image fallbacks ────────────────────────────────────────────────────
+    if not data.get("image"):
+        og_img = soup.find("meta", {"property": "og:image"})
+        if og_img and og_img.get("content"):
+            data["image"] = og_img["content"]
+
+    if not data.get("image"):
+        for img in soup.find_all("img"):
+            src = img.get("src", "")
+            if "rukminim" in src or "fkimg" in src:
+                data["image"] = src.split("?")[0]
+                break
+
+    # ── 5. Rating fallback ────────────────────────────────────────────────────
+    if not data.get("rating"):
+        rating = SELECTOR_STATS.run(
+            "flipkart", "rating",
+            [(cls, lambda cls=cls: _class_value(soup, cls, _parse_flipkart_rating))
+             for cls in FLIPKART_RATING_CLASSES],
+        )
+        if rating:
+            data["rating"] = rating
+
+    # ── 6. Specifications (full-HTML regex) ───────────────────────────────────
+    # These regexes work because Flipkart embeds spec text directly in HTML.
+    _apply_spec_patterns(data, FLIPKART_SPEC_PATTERNS, (html,))
+
+    # ── 7. Category Ratings ───────────────────────────────────────────────────
+    # Flipkart shows category-wise ratings as divs like "Camera 4.2" or in JSON
+    categories = _flipkart_categories(
+        (
+            row.get_text(" ", strip=True)
+            for row in soup.find_all("div", class_=re.compile(r"_2x1Yo4|_3eDEzL|_3GUdgS"))
+        ),
+        html,
+    )
+    if categories:
+        data["category_ratings"] = categories
+
+    # ── 8. Reviews ────────────────────────────────────────────────────────────
+    reviews: list = []
+    seen = ReviewDeduper()
+
+    # Primary: look for Flipkart's known review container classes
+    for card in _flipkart_review_cards(soup)[:10]:
+        review = _parse_flipkart_review_card(card)
+        if review and seen.add(review["text"]):
+            reviews.append(review)
 
     # Fallback: keyword-matched divs (original approach, works reliably)
     if len(reviews) < 3:
-        REVIEW_KEYWORDS = {
-            "camera", "battery", "display", "screen", "phone", "product",
-            "quality", "good", "excellent", "best", "build", "performance",
-            "fast", "value", "money", "happy", "satisfied",
-        }
-        for div in soup.find_all("div"):
+        _flipkart_keyword_reviews(soup, reviews, seen)
+
+    data["reviews"] = reviews[:10]
+    return data
+
+
+def extract_flipkart_payload(payload: dict) -> dict:
+    """
+    Build the same product dict as extract_flipkart() from the small JSON
+    payload collected in-page by _FLIPKART_INPAGE_JS (no HTML parsing).
+    The fallback chains are identical; full-HTML regexes run over the page's
+    visible body text instead.
+    """
+    data: dict = {"platform": "flipkart"}
+    body_text = payload.get("text") or ""
+    meta = payload.get("meta") or {}
+
+    _apply_flipkart_jsonld(data, payload.get("ld_json") or [])
+
+    if not data.get("title"):
+        title = SELECTOR_STATS.run(
+            "flipkart", "title",
+            [
+                ("og:title", lambda: meta.get("og:title") and _clean_flipkart_og_title(meta["og:title"])),
+                ("span.B_NuCI", lambda: (payload.get("title_span") or "").strip()),
+            ],
+            fallback=lambda: payload.get("title_tag") and re.sub(
+                r"\s*[-|].*$", "", payload["title_tag"], flags=re.I
+            ).strip(),
+        )
+        if title:
+            data["title"] = title
+
+    if not data.get("price"):
+        prices = payload.get("prices") or {}
+        price = SELECTOR_STATS.run(
+            "flipkart", "price",
+            [(cls, lambda cls=cls: _parse_flipkart_price(prices.get(cls) or ""))
+             for cls in FLIPKART_PRICE_CLASSES],
+            fallback=lambda: _scan_flipkart_price(body_text),
+        )
+        if price:
+            data["price"] = price
+
+    if not data.get("image") and meta.get("og:image"):
+        data["image"] = meta["og:image"]
+    if not data.get("image") and payload.get("image"):
+        data["image"] = payload["image"].split("?")[0]
+
+    if not data.get("rating"):
+        ratings = payload.get("ratings") or {}
+        rating = SELECTOR_STATS.run(
+            "flipkart", "rating",
+            [(cls, lambda cls=cls: _parse_flipkart_rating((ratings.get(cls) or "").strip()))
+             for cls in FLIPKART_RATING_CLASSES],
+        )
+        if rating:
+            data["rating"] = rating
+
+    _apply_spec_patterns(data, FLIPKART_SPEC_PATTERNS, (body_text,))
+
+    categories = _flipkart_categories(
+        (re.sub(r"\s+", " ", t).strip() for t in payload.get("category_rows") or []),
+        body_text,
+    )
+    if categories:
+        data["category_ratings"] = categories
+
+    reviews: list = []
+    seen = ReviewDeduper()
+    for card in (payload.get("review_cards") or [])[:10]:
+        rating_text = (card.get("rating") or "").strip() or None
+        review = _flipkart_card_review(rating_text, re.sub(r"\s+", " ", card.get("body") or ""))
+        if review and seen.add(review["text"]):
+            reviews.append(review)
+
+    if len(reviews) < 3:
+        for text in payload.get("review_blocks") or []:
             if len(reviews) >= 10:
                 break
-            text = div.get_text(" ", strip=True)
-            if not (50 <= len(text) <= 800):
-                continue
-            words = set(text.lower().split())
-            if len(words & REVIEW_KEYWORDS) < 2:
-                continue
-            if text in [r["text"] for r in reviews]:
-                continue
-            # Guess rating from first number 1-5
-            m_r = re.search(r"\b([1-5])\b", text[:50])
-            rating = int(m_r.group(1)) if m_r else 4
-            cleaned = re.sub(
-                r"(Certified Buyer|Verified (Buyer|Purchase)|\d+\s+\w+\s+ago)", "", text
-            )
-            cleaned = re.sub(r"\s+", " ", cleaned).strip()
-            if len(cleaned) >= 40:
-                reviews.append({"rating": rating, "text": cleaned[:400]})
+            review = _flipkart_keyword_review(re.sub(r"\s+", " ", text).strip())
+            if review and seen.add(review["text"]):
+                reviews.append(review)
 
     data["reviews"] = reviews[:10]
     return data
@@ -457,6 +1303,45 @@ def extract_flipkart(html: str) -> dict:
 # AMAZON EXTRACTOR
 # ════════════════════════════════════════════════════════════════════════════
 
+def _parse_amazon_review_card(card) -> dict | None:
+    """One [data-hook=review] card (product page or review page) → review."""
+    try:
+        # Rating: "4.0 out of 5 stars"
+        rating_el = card.select_one(".review-rating span.a-icon-alt")
+        if not rating_el:
+            rating_el = card.select_one("span.a-icon-alt")
+        rating = 5
+        if rating_el:
+            m = re.match(r"([\d.]+)", rating_el.get_text(strip=True))
+            if m:
+                try:
+                    rating = int(float(m.group(1)))
+                except ValueError:
+                    pass
+
+        # Review title
+        title_el = card.select_one("[data-hook='review-title'] span:not(.a-icon-alt)")
+        title_text = title_el.get_text(strip=True) if title_el else ""
+
+        # Review body
+        body_el = (
+            card.select_one("[data-hook='review-body'] span")
+            or card.select_one(".review-text-content span")
+            or card.select_one("[data-hook='review-collapsed'] span")
+        )
+        body_text = body_el.get_text(" ", strip=True) if body_el else ""
+
+        # Combine title + body
+        full_text = f"{title_text} — {body_text}".strip(" —").strip()
+        full_text = re.sub(r"\s+", " ", full_text)
+
+        if len(full_text) >= 30:
+            return {"rating": rating, "text": full_text[:400]}
+    except Exception:
+        pass
+    return None
+
+
 def extract_amazon(html: str) -> dict:
     """
     Extract all product data from an Amazon India product page.
@@ -495,26 +1380,46 @@ def extract_amazon(html: str) -> dict:
                   .review-rating span.a-icon-alt
                   [data-hook=review-title] span
                   [data-hook=review-body] span
+
+    Title/price/image/rating chains run via SELECTOR_STATS, which demotes
+    selectors that have stopped matching.
     """
     soup = BeautifulSoup(html, "html.parser")
+    try:
+        return _extract_amazon_soup(soup, html)
+    finally:
+        soup.decompose()
+
+
+def _extract_amazon_soup(soup: BeautifulSoup, html: str) -> dict:
     data: dict = {"platform": "amazon"}
 
     # ── 1. Title ─────────────────────────────────────────────────────────────
-    for sel in ("#productTitle", "#title"):
+    def text_of(sel: str) -> str | None:
         el = soup.select_one(sel)
-        if el:
-            data["title"] = el.get_text(strip=True)
-            break
+        return el.get_text(strip=True) if el else None
 
-    if not data.get("title"):
-        meta_title = soup.find("meta", {"name": "title"})
-        if meta_title:
-            data["title"] = meta_title.get("content", "").strip()
+    def meta_title():
+        el = soup.find("meta", {"name": "title"})
+        return el.get("content", "").strip() if el else None
 
-    if not data.get("title"):
+    def title_tag():
         tt = soup.find("title")
         if tt:
-            data["title"] = re.sub(r"\s*[-|:]\s*(Amazon\.in|Buy).*$", "", tt.get_text(), flags=re.I).strip()
+            return re.sub(r"\s*[-|:]\s*(Amazon\.in|Buy).*$", "", tt.get_text(), flags=re.I).strip()
+        return None
+
+    title = SELECTOR_STATS.run(
+        "amazon", "title",
+        [
+            ("#productTitle", lambda: text_of("#productTitle")),
+            ("#title", lambda: text_of("#title")),
+            ("meta[name=title]", meta_title),
+        ],
+        fallback=title_tag,
+    )
+    if title:
+        data["title"] = title
 
     # ── 2. Price ─────────────────────────────────────────────────────────────
     def _parse_price(raw: str) -> str | None:
@@ -527,84 +1432,87 @@ def extract_amazon(html: str) -> dict:
             pass
         return None
 
-    # span.a-price-whole gives plain digits like "18999"
-    whole = soup.select_one("span.a-price-whole")
-    if whole:
-        raw = whole.get_text(strip=True).replace(".", "").replace(",", "")
-        p = _parse_price(raw)
-        if p:
-            data["price"] = p
+    def price_at(sel: str) -> str | None:
+        el = soup.select_one(sel)
+        return _parse_price(el.get_text(strip=True)) if el else None
 
-    # .a-offscreen gives full "₹18,999" – useful if whole is absent
-    if not data.get("price"):
+    def offscreen_price():
         for el in soup.select(".a-offscreen"):
             p = _parse_price(el.get_text(strip=True))
             if p:
-                data["price"] = p
-                break
-
-    # priceToPay (Deal/Lightning)
-    if not data.get("price"):
-        el = soup.select_one("span.priceToPay span.a-price-whole")
-        if el:
-            p = _parse_price(el.get_text(strip=True))
-            if p:
-                data["price"] = p
+                return p
+        return None
 
-    # Older selectors
-    if not data.get("price"):
-        for sel in ("#priceblock_ourprice", "#priceblock_dealprice", "#priceblock_saleprice"):
-            el = soup.select_one(sel)
-            if el:
-                p = _parse_price(el.get_text(strip=True))
-                if p:
-                    data["price"] = p
-                    break
+    price = SELECTOR_STATS.run(
+        "amazon", "price",
+        [
+            # span.a-price-whole gives plain digits like "18999"
+            ("span.a-price-whole", lambda: price_at("span.a-price-whole")),
+            # .a-offscreen gives full "₹18,999" – useful if whole is absent
+            (".a-offscreen", offscreen_price),
+            # priceToPay (Deal/Lightning)
+            ("span.priceToPay", lambda: price_at("span.priceToPay span.a-price-whole")),
+            # Older selectors
+            *((sel, lambda sel=sel: price_at(sel))
+              for sel in ("#priceblock_ourprice", "#priceblock_dealprice", "#priceblock_saleprice")),
+        ],
+    )
+    if price:
+        data["price"] = price
 
     # ── 3. Image ─────────────────────────────────────────────────────────────
-    img_el = soup.select_one("#landingImage")
-    if img_el:
-        src = img_el.get("data-old-hires") or img_el.get("src", "")
-        if src and src.startswith("http"):
-            data["image"] = src
-
-    if not data.get("image"):
-        for sel in ("#imgTagWrapperId img", "#main-image", "#imgBlkFront"):
-            el = soup.select_one(sel)
-            if el:
-                src = el.get("data-old-hires") or el.get("src", "")
-                if src and src.startswith("http"):
-                    data["image"] = src
-                    break
+    def image_at(sel: str) -> str | None:
+        el = soup.select_one(sel)
+        if el:
+            src = el.get("data-old-hires") or el.get("src", "")
+            if src and src.startswith("http"):
+                return src
+        return None
 
-    # Amazon embeds hires image URLs in a JSON blob inside a script tag
-    if not data.get("image"):
+    def hires_blob():
+        # Amazon embeds hires image URLs in a JSON blob inside a script tag
         m = re.search(r'"hiRes"\s*:\s*"(https://[^"]+\.jpg[^"]*)"', html)
-        if m:
-            data["image"] = m.group(1)
+        return m.group(1) if m else None
+
+    image = SELECTOR_STATS.run(
+        "amazon", "image",
+        [(sel, lambda sel=sel: image_at(sel))
+         for sel in ("#landingImage", "#imgTagWrapperId img", "#main-image", "#imgBlkFront")],
+        fallback=hires_blob,
+    )
+    if image:
+        data["image"] = image
 
     # ── 4. Rating ─────────────────────────────────────────────────────────────
-    # "4.3 out of 5 stars"
-    for el in soup.select("span.a-icon-alt"):
-        m = re.match(r"([\d.]+)\s+out of\s+5", el.get_text(strip=True))
-        if m:
-            try:
-                val = float(m.group(1))
-                if 1.0 <= val <= 5.0:
-                    data["rating"] = val
-                    break
-            except ValueError:
-                pass
+    def icon_alt_rating():
+        # "4.3 out of 5 stars"
+        for el in soup.select("span.a-icon-alt"):
+            m = re.match(r"([\d.]+)\s+out of\s+5", el.get_text(strip=True))
+            if m:
+                try:
+                    val = float(m.group(1))
+                    if 1.0 <= val <= 5.0:
+                        return val
+                except ValueError:
+                    pass
+        return None
 
-    if not data.get("rating"):
+    def popover_rating():
         pop = soup.select_one("#acrPopover")
         if pop:
             m = re.search(r"([\d.]+)\s+out of\s+5", pop.get("title", ""))
             if m:
                 try:
-                    data["rating"] = float(m.group(1))
+                    return float(m.group(1))
                 except ValueError:
                     pass
+        return None
+
+    rating = SELECTOR_STATS.run(
+        "amazon", "rating", [("span.a-icon-alt", icon_alt_rating), ("#acrPopover", popover_rating)]
+    )
+    if rating:
+        data["rating"] = rating
 
     # ── 5. Brand ─────────────────────────────────────────────────────────────
     byline = soup.select_one("#bylineInfo")
@@ -687,49 +1595,19 @@ def extract_amazon(html: str) -> dict:
 
     # ── 8. Reviews ────────────────────────────────────────────────────────────
     reviews: list = []
+    seen = ReviewDeduper()
 
     for card in soup.select("[data-hook='review']")[:10]:
-        try:
-            # Rating: "4.0 out of 5 stars"
-            rating_el = card.select_one(".review-rating span.a-icon-alt")
-            if not rating_el:
-                rating_el = card.select_one("span.a-icon-alt")
-            rating = 5
-            if rating_el:
-                m = re.match(r"([\d.]+)", rating_el.get_text(strip=True))
-                if m:
-                    try:
-                        rating = int(float(m.group(1)))
-                    except ValueError:
-                        pass
-
-            # Review title
-            title_el = card.select_one("[data-hook='review-title'] span:not(.a-icon-alt)")
-            title_text = title_el.get_text(strip=True) if title_el else ""
-
-            # Review body
-            body_el = (
-                card.select_one("[data-hook='review-body'] span")
-                or card.select_one(".review-text-content span")
-                or card.select_one("[data-hook='review-collapsed'] span")
-            )
-            body_text = body_el.get_text(" ", strip=True) if body_el else ""
-
-            # Combine title + body
-            full_text = f"{title_text} — {body_text}".strip(" —").strip()
-            full_text = re.sub(r"\s+", " ", full_text)
-
-            if len(full_text) >= 30 and full_text not in [r["text"] for r in reviews]:
-                reviews.append({"rating": rating, "text": full_text[:400]})
-        except Exception:
-            continue
+        review = _parse_amazon_review_card(card)
+        if review and seen.add(review["text"]):
+            reviews.append(review)
 
     # Fallback: review-text-content (older page layouts)
     if len(reviews) < 3:
         for el in soup.select(".review-text-content")[:10]:
             text = el.get_text(" ", strip=True)
             text = re.sub(r"\s+", " ", text).strip()
-            if len(text) >= 40 and text not in [r["text"] for r in reviews]:
+            if len(text) >= 40 and seen.add(text):
                 reviews.append({"rating": 4, "text": text[:400]})
 
     data["reviews"] = reviews[:10]
@@ -740,123 +1618,777 @@ def extract_amazon(html: str) -> dict:
 # AI SCORING
 # ════════════════════════════════════════════════════════════════════════════
 
-def calculate_ai_recommendation(data: dict) -> dict:
+SPEC_FIELDS = ["ram", "storage", "processor", "camera", "battery", "display"]
+
+_RATING_REASONS = (
+    "Exceptional {rating}/5 customer rating",
+    "Excellent {rating}/5 customer rating",
+    "Good {rating}/5 customer rating",
+    "Average {rating}/5 customer rating",
+    "Low {rating}/5 customer rating",
+)
+_SENTIMENT_REASONS = (
+    "{pct}% of reviews are positive",
+    "{pct}% positive review sentiment",
+    "{pct}% positive review sentiment",
+    "Mixed or mostly negative reviews",
+)
+_VERDICTS = (
+    "🟢 Highly Recommended",
+    "🟢 Recommended",
+    "🟡 Worth Considering",
+    "🟡 Proceed with Caution",
+    "🔴 Not Recommended",
+)
+
+
+@dataclass(frozen=True)
+class ScoringModel:
     """
-    Score a product 0-100 across four dimensions and produce a verdict.
+    Weights and thresholds behind calculate_ai_recommendation().
 
-    Breakdown:
-      Rating score   :  0–40  (based on numerical star rating)
-      Sentiment score:  0–30  (positive-review ratio from scraped reviews)
-      Category score :  0–20  (average category-wise rating)
-      Specs score    :  0–10  (completeness of specification fields)
+    Tiers are (minimum, points) pairs checked top-down; the last tier is the
+    catch-all and its minimum is ignored. verdict_thresholds are the minimum
+    final scores for each verdict except the last ("Not Recommended").
     """
-    score = 0.0
-    reasons: list[str] = []
-    breakdown = {
-        "rating_score": 0,
-        "sentiment_score": 0,
-        "category_score": 0,
-        "specs_score": 0,
-    }
+    name: str = "default"
+    rating_tiers: tuple = ((4.5, 40), (4.0, 33), (3.5, 25), (3.0, 16), (0.0, 8))
+    sentiment_tiers: tuple = ((0.9, 30), (0.75, 24), (0.6, 17), (0.0, 8))
+    min_reviews: int = 2
+    category_points: float = 20
+    specs_points: float = 10
+    verdict_thresholds: tuple = (85, 72, 58, 42)
+    # Review positivity from text sentiment (sentiment.py) instead of stars,
+    # and aspect sentiment standing in for missing category ratings
+    use_text_sentiment: bool = True
+    positive_sentiment: float = 0.05
+    # A single mention would set a whole category through 3 + 2 × score
+    aspect_min_mentions: int = 3
+
+    @property
+    def version(self) -> str:
+        """"name@digest" — the digest changes whenever any weight changes."""
+        params = asdict(self)
+        params.pop("name")
+        digest = hashlib.md5(json.dumps(params, sort_keys=True).encode()).hexdigest()[:8]
+        return f"{self.name}@{digest}"
+
+    @classmethod
+    def from_dict(cls, cfg: dict) -> "ScoringModel":
+        model = cls(
+            name=str(cfg.get("name", cls.name)),
+            rating_tiers=tuple(tuple(t) for t in cfg.get("rating_tiers", cls.rating_tiers)),
+            sentiment_tiers=tuple(tuple(t) for t in cfg.get("sentiment_tiers", cls.sentiment_tiers)),
+            min_reviews=int(cfg.get("min_reviews", cls.min_reviews)),
+            category_points=cfg.get("category_points", cls.category_points),
+            specs_points=cfg.get("specs_points", cls.specs_points),
+            verdict_thresholds=tuple(cfg.get("verdict_thresholds", cls.verdict_thresholds)),
+            use_text_sentiment=bool(cfg.get("use_text_sentiment", cls.use_text_sentiment)),
+            positive_sentiment=float(cfg.get("positive_sentiment", cls.positive_sentiment)),
+            aspect_min_mentions=int(cfg.get("aspect_min_mentions", cls.aspect_min_mentions)),
+        )
+        if len(model.rating_tiers) != len(_RATING_REASONS):
+            raise ValueError(f"rating_tiers needs {len(_RATING_REASONS)} tiers")
+        if len(model.sentiment_tiers) != len(_SENTIMENT_REASONS):
+            raise ValueError(f"sentiment_tiers needs {len(_SENTIMENT_REASONS)} tiers")
+        if len(model.verdict_thresholds) != len(_VERDICTS) - 1:
+            raise ValueError(f"verdict_thresholds needs {len(_VERDICTS) - 1} values")
+        if model.min_reviews < 1:
+            raise ValueError("min_reviews must be at least 1")
+        return model
+
+
+# Edit this file (or point PRICEHAWK_SCORING_MODEL elsewhere) to change the
+# weights without redeploying; it is re-read whenever its mtime changes.
+SCORING_MODEL_PATH = os.environ.get(
+    "PRICEHAWK_SCORING_MODEL",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "scoring_model.json"),
+)
+_scoring_model_cache: dict = {"mtime": None, "model": ScoringModel()}
+
+
+def get_scoring_model() -> ScoringModel:
+    """Current scoring model: SCORING_MODEL_PATH if present, else the defaults."""
+    try:
+        mtime = os.path.getmtime(SCORING_MODEL_PATH)
+    except OSError:
+        return ScoringModel()
 
-    # ── Rating (40 pts) ───────────────────────────────────────────────────────
-    rating = data.get("rating")
-    if rating:
-        if rating >= 4.5:
-            rs = 40
-            reasons.append(f"Exceptional {rating}/5 customer rating")
-        elif rating >= 4.0:
-            rs = 33
-            reasons.append(f"Excellent {rating}/5 customer rating")
-        elif rating >= 3.5:
-            rs = 25
-            reasons.append(f"Good {rating}/5 customer rating")
-        elif rating >= 3.0:
-            rs = 16
-            reasons.append(f"Average {rating}/5 customer rating")
-        else:
-            rs = 8
-            reasons.append(f"Low {rating}/5 customer rating")
-        score += rs
-        breakdown["rating_score"] = rs
+    if mtime != _scoring_model_cache["mtime"]:
+        try:
+            with open(SCORING_MODEL_PATH, encoding="utf-8") as fh:
+                model = ScoringModel.from_dict(json.load(fh))
+            _scoring_model_cache.update(mtime=mtime, model=model)
+            print(f"  → Scoring model {model.version} loaded")
+        except (OSError, ValueError, TypeError) as exc:
+            # Keep serving the last good model rather than failing requests
+            print(f"  ⚠️  Bad scoring model config ({exc}) — keeping {_scoring_model_cache['model'].version}")
+    return _scoring_model_cache["model"]
 
-    # ── Sentiment (30 pts) ────────────────────────────────────────────────────
-    reviews = data.get("reviews", [])
-    if len(reviews) >= 2:
-        positive = sum(1 for r in reviews if r.get("rating", 0) >= 4)
-        ratio = positive / len(reviews)
-        if ratio >= 0.9:
-            ss = 30
-            reasons.append(f"{round(ratio * 100)}% of reviews are positive")
-        elif ratio >= 0.75:
-            ss = 24
-            reasons.append(f"{round(ratio * 100)}% positive review sentiment")
-        elif ratio >= 0.6:
-            ss = 17
-            reasons.append(f"{round(ratio * 100)}% positive review sentiment")
-        else:
-            ss = 8
-            reasons.append("Mixed or mostly negative reviews")
-        score += ss
-        breakdown["sentiment_score"] = ss
 
-    # ── Category Ratings (20 pts) ─────────────────────────────────────────────
-    cat_ratings = data.get("category_ratings", {})
-    if cat_ratings:
-        avg = sum(cat_ratings.values()) / len(cat_ratings)
-        cs = round((avg / 5.0) * 20, 1)
+def _review_is_positive(review: dict, model: ScoringModel) -> bool:
+    """Text sentiment when the review text carries any, else its stars."""
+    if model.use_text_sentiment and review.get("sentiment") is not None:
+        return review["sentiment"] >= model.positive_sentiment
+    return review.get("rating", 0) >= 4
+
+
+def _sentiment_inputs(data: dict, model: ScoringModel) -> tuple[int, int]:
+    """
+    (review count, positive count) for the sentiment component — from the
+    deep review crawl summary when there is one, else the page's reviews.
+    """
+    summary = data.get("review_summary")
+    reviews = data.get("reviews", [])
+    if summary and summary.get("count", 0) > len(reviews):
+        return summary["count"], summary["positive"]
+    return len(reviews), sum(1 for r in reviews if _review_is_positive(r, model))
+
+
+def _category_inputs(data: dict, model: ScoringModel) -> dict:
+    """
+    Category-wise ratings for the category component. Pages without them
+    (common on Amazon) fall back to review aspect sentiment mapped onto the
+    same 1–5 scale: -1 → 1.0, 0 → 3.0, +1 → 5.0.
+    """
+    cat_ratings = data.get("category_ratings") or {}
+    if cat_ratings or not model.use_text_sentiment:
+        return cat_ratings
+    return {
+        aspect: round(3 + 2 * a["score"], 1)
+        for aspect, a in (data.get("aspect_sentiment") or {}).items()
+        if a["mentions"] >= model.aspect_min_mentions
+    }
+
+
+def scoring_inputs_hash(data: dict) -> str:
+    """
+    Digest of everything the score depends on, used for incremental rescoring.
+    Every input must round-trip through the products/reviews tables (or be
+    recomputed from them, like sentiment) — otherwise rescore.py sees the
+    row as stale on every run.
+    """
+    inputs = [
+        data.get("rating") or None,
+        # Reviews without sentiment words have None; it sorts first within a rating
+        sorted(((r.get("rating", 0), r.get("sentiment")) for r in data.get("reviews", [])),
+               key=lambda rs: (rs[0], rs[1] is not None, rs[1] or 0.0)),
+        list((data.get("category_ratings") or {}).items()),
+        sorted((a, v["score"], v["mentions"]) for a, v in (data.get("aspect_sentiment") or {}).items()),
+        [(data.get("review_summary") or {}).get(k) for k in ("count", "positive")],
+        [bool(data.get(f)) for f in SPEC_FIELDS],
+    ]
+    return hashlib.md5(json.dumps(inputs).encode()).hexdigest()[:16]
+
+
+def product_fingerprint(data: dict) -> str:
+    """
+    Digest of what a scrape extracted — price, rating, specs, category
+    ratings and review ids (normalised text digests) — but nothing derived
+    from it, so an unchanged listing fingerprints the same on every re-scrape.
+    """
+    inputs = [
+        data.get("title"),
+        data.get("price"),
+        data.get("rating") or None,
+        [data.get(f) for f in ("brand", *SPEC_FIELDS)],
+        sorted((data.get("category_ratings") or {}).items()),
+        sorted(
+            (r.get("rating", 0), hashlib.md5(normalize_review_text(r.get("text") or "").encode()).hexdigest()[:12])
+            for r in data.get("reviews", [])
+        ),
+        [(data.get("review_summary") or {}).get(k) for k in ("count", "positive")],
+    ]
+    return hashlib.md5(json.dumps(inputs, default=str).encode()).hexdigest()[:16]
+
+
+def calculate_ai_recommendation(data: dict, model: ScoringModel | None = None) -> dict:
+    """
+    Score a product 0-100 across four dimensions and produce a verdict.
+
+    Breakdown (default model weights):
+      Rating score   :  0–40  (based on numerical star rating)
+      Sentiment score:  0–30  (positive-review ratio from review text sentiment)
+      Category score :  0–20  (average category-wise or aspect-sentiment rating)
+      Specs score    :  0–10  (completeness of specification fields)
+    """
+    model = model or get_scoring_model()
+    score = 0.0
+    reasons: list[str] = []
+    breakdown = {
+        "rating_score": 0,
+        "sentiment_score": 0,
+        "category_score": 0,
+        "specs_score": 0,
+    }
+
+    # ── Rating ────────────────────────────────────────────────────────────────
+    rating = data.get("rating")
+    if rating:
+        last = len(model.rating_tiers) - 1
+        for tier, (minimum, rs) in enumerate(model.rating_tiers):
+            if tier == last or rating >= minimum:
+                reasons.append(_RATING_REASONS[tier].format(rating=rating))
+                break
+        score += rs
+        breakdown["rating_score"] = rs
+
+    # ── Sentiment ─────────────────────────────────────────────────────────────
+    review_count, positive = _sentiment_inputs(data, model)
+    if review_count >= model.min_reviews:
+        ratio = positive / review_count
+        last = len(model.sentiment_tiers) - 1
+        for tier, (minimum, ss) in enumerate(model.sentiment_tiers):
+            if tier == last or ratio >= minimum:
+                reasons.append(_SENTIMENT_REASONS[tier].format(pct=round(ratio * 100)))
+                break
+        score += ss
+        breakdown["sentiment_score"] = ss
+
+    # ── Category Ratings ──────────────────────────────────────────────────────
+    cat_ratings = _category_inputs(data, model)
+    if cat_ratings:
+        avg = sum(cat_ratings.values()) / len(cat_ratings)
+        cs = round((avg / 5.0) * model.category_points, 1)
         score += cs
         breakdown["category_score"] = cs
         stars = [cat for cat, v in cat_ratings.items() if v >= 4.5]
         if stars:
             reasons.append(f"Outstanding {', '.join(stars[:2])} performance")
 
-    # ── Specs completeness (10 pts) ───────────────────────────────────────────
-    spec_fields = ["ram", "storage", "processor", "camera", "battery", "display"]
-    present = sum(1 for f in spec_fields if data.get(f))
-    sps = round((present / len(spec_fields)) * 10, 1)
+    # ── Specs completeness ────────────────────────────────────────────────────
+    present = sum(1 for f in SPEC_FIELDS if data.get(f))
+    sps = round((present / len(SPEC_FIELDS)) * model.specs_points, 1)
     score += sps
     breakdown["specs_score"] = sps
     if present >= 5:
-        reasons.append(f"Detailed specifications available ({present}/{len(spec_fields)})")
+        reasons.append(f"Detailed specifications available ({present}/{len(SPEC_FIELDS)})")
     elif present >= 3:
-        reasons.append(f"Partial specs available ({present}/{len(spec_fields)})")
+        reasons.append(f"Partial specs available ({present}/{len(SPEC_FIELDS)})")
 
     # ── Finalise ─────────────────────────────────────────────────────────────
     final = min(100, max(0, round(score)))
 
-    if final >= 85:
-        verdict = "🟢 Highly Recommended"
-    elif final >= 72:
-        verdict = "🟢 Recommended"
-    elif final >= 58:
-        verdict = "🟡 Worth Considering"
-    elif final >= 42:
-        verdict = "🟡 Proceed with Caution"
-    else:
-        verdict = "🔴 Not Recommended"
+    verdict = _VERDICTS[-1]
+    for tier, minimum in enumerate(model.verdict_thresholds):
+        if final >= minimum:
+            verdict = _VERDICTS[tier]
+            break
 
     return {
         "ai_score": final,
         "ai_verdict": verdict,
         "ai_reasons": reasons[:5],
         "ai_breakdown": breakdown,
+        "ai_model_version": model.version,
     }
 
 
+def scoring_table(products: list[dict], model: ScoringModel | None = None) -> dict:
+    """
+    Reduce product dicts to the columnar inputs score_batch() needs:
+    rating, review counts, category average and spec completeness.
+    Pass the same model to both functions.
+    """
+    model = model or get_scoring_model()
+    table: dict = {
+        "rating": [], "review_count": [], "positive_reviews": [],
+        "category_avg": [], "category_stars": [], "specs_present": [],
+    }
+    for data in products:
+        table["rating"].append(data.get("rating") or None)
+        review_count, positive = _sentiment_inputs(data, model)
+        table["review_count"].append(review_count)
+        table["positive_reviews"].append(positive)
+        cat_ratings = _category_inputs(data, model)
+        if cat_ratings:
+            table["category_avg"].append(sum(cat_ratings.values()) / len(cat_ratings))
+            table["category_stars"].append([cat for cat, v in cat_ratings.items() if v >= 4.5])
+        else:
+            table["category_avg"].append(None)
+            table["category_stars"].append([])
+        table["specs_present"].append(sum(1 for f in SPEC_FIELDS if data.get(f)))
+    return table
+
+
+def score_batch(table: dict, model: ScoringModel | None = None) -> list[dict]:
+    """
+    Vectorized calculate_ai_recommendation() over a columnar table (see
+    scoring_table()). Thresholds are applied with NumPy across all rows at
+    once; only the reason strings are formatted per row. Results are
+    identical to scoring each product with the scalar function.
+    """
+    import numpy as np
+
+    model = model or get_scoring_model()
+
+    n = len(table["rating"])
+    if not n:
+        return []
+
+    rating = np.array([np.nan if r is None else r for r in table["rating"]], dtype=float)
+    count = np.asarray(table["review_count"], dtype=np.int64)
+    positive = np.asarray(table["positive_reviews"], dtype=np.int64)
+    cat_avg = np.array([np.nan if a is None else a for a in table["category_avg"]], dtype=float)
+    present = np.asarray(table["specs_present"], dtype=np.int64)
+
+    # ── Rating ────────────────────────────────────────────────────────────────
+    # Tier index per row; -1 means "no rating" and maps to the trailing 0 points
+    has_rating = ~np.isnan(rating)
+    *rating_tiers, _ = model.rating_tiers
+    rating_tier = np.select(
+        [rating >= minimum for minimum, _ in rating_tiers] + [has_rating],
+        list(range(len(model.rating_tiers))), -1,
+    )
+    rs = np.array([points for _, points in model.rating_tiers] + [0])[rating_tier]
+
+    # ── Sentiment ─────────────────────────────────────────────────────────────
+    has_sentiment = count >= model.min_reviews
+    ratio = np.divide(positive, count, out=np.zeros(n), where=count > 0)
+    *sentiment_tiers, _ = model.sentiment_tiers
+    sentiment_tier = np.select(
+        [~has_sentiment] + [ratio >= minimum for minimum, _ in sentiment_tiers],
+        [-1] + list(range(len(sentiment_tiers))), len(sentiment_tiers),
+    )
+    ss = np.array([points for _, points in model.sentiment_tiers] + [0])[sentiment_tier]
+
+    # ── Category Ratings ──────────────────────────────────────────────────────
+    has_cats = ~np.isnan(cat_avg)
+    raw_cs = np.where(has_cats, (cat_avg / 5.0) * model.category_points, 0.0)
+    cs = np.round(raw_cs, 1)
+    # np.round and round() disagree only on near-ties; redo those exactly
+    frac = (raw_cs * 10) % 1.0
+    for i in np.flatnonzero(np.abs(frac - 0.5) < 1e-6):
+        cs[i] = round(float(raw_cs[i]), 1)
+
+    # ── Specs completeness ────────────────────────────────────────────────────
+    n_specs = len(SPEC_FIELDS)
+    sps = np.array([round((p / n_specs) * model.specs_points, 1) for p in range(n_specs + 1)])[present]
+
+    # ── Finalise ─────────────────────────────────────────────────────────────
+    score = ((0.0 + rs) + ss) + cs + sps
+    final = np.clip(np.rint(score), 0, 100).astype(np.int64)
+    verdict_tier = np.select(
+        [final >= minimum for minimum in model.verdict_thresholds],
+        list(range(len(model.verdict_thresholds))), len(model.verdict_thresholds),
+    )
+
+    # Per-row assembly works on plain lists; indexing NumPy scalars is slow
+    rating_tier, sentiment_tier = rating_tier.tolist(), sentiment_tier.tolist()
+    rs, ss, cs, sps = rs.tolist(), ss.tolist(), cs.tolist(), sps.tolist()
+    final, verdict_tier = final.tolist(), verdict_tier.tolist()
+    pcts, present, has_cats = np.rint(ratio * 100).tolist(), present.tolist(), has_cats.tolist()
+    version = model.version
+
+    results = []
+    for i in range(n):
+        reasons: list[str] = []
+        if rating_tier[i] >= 0:
+            reasons.append(_RATING_REASONS[rating_tier[i]].format(rating=table["rating"][i]))
+        if sentiment_tier[i] >= 0:
+            reasons.append(_SENTIMENT_REASONS[sentiment_tier[i]].format(pct=int(pcts[i])))
+        stars = table["category_stars"][i]
+        if stars:
+            reasons.append(f"Outstanding {', '.join(stars[:2])} performance")
+        p = present[i]
+        if p >= 5:
+            reasons.append(f"Detailed specifications available ({p}/{n_specs})")
+        elif p >= 3:
+            reasons.append(f"Partial specs available ({p}/{n_specs})")
+
+        results.append({
+            "ai_score": final[i],
+            "ai_verdict": _VERDICTS[verdict_tier[i]],
+            "ai_reasons": reasons[:5],
+            "ai_breakdown": {
+                "rating_score": rs[i],
+                "sentiment_score": ss[i],
+                "category_score": cs[i] if has_cats[i] else 0,
+                "specs_score": sps[i],
+            },
+            "ai_model_version": version,
+        })
+    return results
+
+
+# ════════════════════════════════════════════════════════════════════════════
+# DEEP REVIEW CRAWL
+# Product pages carry ~10 reviews. The crawl walks each platform's dedicated
+# review pages and streams every review through a generator pipeline into a
+# ReviewAggregate — texts are scored and dropped, never accumulated — and
+# stops as soon as the aggregate has converged.
+# ════════════════════════════════════════════════════════════════════════════
+
+def _flipkart_review_urls(url: str, max_pages: int):
+    """/<slug>/p/<itm…>?pid=X  →  /<slug>/product-reviews/<itm…>?pid=X&page=N"""
+    base = _clean_url(url).replace("/p/", "/product-reviews/", 1)
+    pid = re.search(r"[?&]pid=([A-Z0-9]+)", url)
+    query = f"pid={pid.group(1)}&" if pid else ""
+    for page in range(1, max_pages + 1):
+        yield f"{base}?{query}page={page}"
+
+
+def _amazon_review_urls(url: str, max_pages: int):
+    """/dp/<ASIN>  →  /product-reviews/<ASIN>/?pageNumber=N&sortBy=recent"""
+    clean = _clean_url(url)
+    m = re.search(r"/dp/([A-Z0-9]{10})", clean)
+    if not m:
+        return
+    host = re.match(r"https://[^/]+", clean).group(0)
+    for page in range(1, max_pages + 1):
+        yield f"{host}/product-reviews/{m.group(1)}/?pageNumber={page}&sortBy=recent"
+
+
+def _bounded_ordered_map(fn, items, concurrency: int):
+    """
+    Lazily map fn over items with at most `concurrency` calls in flight,
+    yielding results in input order. Closing the generator cancels pending
+    calls, so consumers can stop early without fetching the whole backlog.
+    """
+    from collections import deque
+
+    items = iter(items)
+    fn = PROFILER.bind(fn)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        inflight: deque = deque()
+        try:
+            for item in items:
+                inflight.append(pool.submit(fn, item))
+                if len(inflight) >= concurrency:
+                    yield inflight.popleft().result()
+            while inflight:
+                yield inflight.popleft().result()
+        finally:
+            for fut in inflight:
+                fut.cancel()
+
+
+def _http_review_pages(urls, deadline: Deadline, concurrency: int = 4):
+    """
+    Review pages over plain HTTP, `concurrency` at a time, in one session
+    seeded with the marketplace's homepage cookies.
+    """
+    urls = iter(urls)
+    first = next(urls, None)
+    if first is None:
+        return
+    session = requests.Session()
+    session.headers.update(DESKTOP_HEADERS)
+    try:
+        session.get(_upstream(re.match(r"https?://[^/]+", first).group(0)), timeout=deadline.timeout(10))
+    except Exception:
+        pass
+
+    def fetch(page_url: str) -> str | None:
+        if deadline.expired():
+            return None
+        try:
+            resp = session.get(_upstream(page_url), timeout=deadline.timeout(20))
+            return resp.text if resp.status_code == 200 else None
+        except Exception:
+            return None
+
+    yield from _bounded_ordered_map(fetch, itertools.chain([first], urls), concurrency)
+
+
+def _browser_review_pages(urls, deadline: Deadline, open_page=_browser_page, ready: str | None = None):
+    """
+    Review pages in one browser session. Playwright's sync API is
+    single-threaded, so they load sequentially.
+    """
+    from playwright.sync_api import TimeoutError as PWTimeout
+
+    urls = iter(urls)
+    first = next(urls, None)
+    if first is None:
+        return
+    with open_page(first, deadline) as page:
+        yield page.content()
+        for page_url in urls:
+            if deadline.expired():
+                return
+            try:
+                page.goto(_upstream(page_url), wait_until="domcontentloaded", timeout=deadline.timeout_ms(30))
+                if ready:
+                    page.wait_for_selector(ready, timeout=deadline.timeout_ms(8))
+            except PWTimeout:
+                pass
+            try:
+                check_browser_memory(_browser_slot.marker)
+            except BrowserMemoryExceeded as exc:
+                print(f"  ⚠️  {exc} — ending the review crawl early")
+                return
+            yield page.content()
+
+
+def _flipkart_review_pages(urls, deadline: Deadline):
+    """Flipkart needs its stealth Chromium for review pages too."""
+    return _browser_review_pages(urls, deadline, open_page=_flipkart_page,
+                                 ready="div.t-ZTKy, div[data-review-id]")
+
+
+def _flipkart_page_reviews(soup: BeautifulSoup):
+    return map(_parse_flipkart_review_card, _flipkart_review_cards(soup))
+
+
+def _amazon_page_reviews(soup: BeautifulSoup):
+    return map(_parse_amazon_review_card, soup.select("[data-hook='review']"))
+
+
+def _iter_page_reviews(html: str, site: Site):
+    """Every review card on one review-listing page (no 10-review cap)."""
+    soup = BeautifulSoup(html, "html.parser")
+    try:
+        for review in site.parse_reviews(soup):
+            if review:
+                yield review
+    finally:
+        soup.decompose()
+
+
+class ReviewAggregate:
+    """
+    Incremental review statistics: rating histogram, text-sentiment positive
+    ratio and per-aspect mention/positive/negative counts. Only a 16-byte
+    hash per review is kept (for de-duplication across pages).
+    """
+
+    def __init__(self, model: "ScoringModel | None" = None, tolerance: float = 0.02,
+                 patience: int = 2, min_reviews: int = 40):
+        self.model = model or get_scoring_model()
+        self.tolerance = tolerance
+        self.patience = patience
+        self.min_reviews = min_reviews
+        self.histogram = [0, 0, 0, 0, 0]
+        self.count = 0
+        self.positive = 0
+        self.sentiment_sum = 0.0
+        self.sentiment_count = 0
+        self.aspects: dict[str, list[int]] = {}
+        self.pages = 0
+        self._seen: set[bytes] = set()
+        self._history: list[tuple[float, float]] = []
+
+    def add(self, review: dict, result: dict) -> bool:
+        """Fold in one review and its sentiment result; False if a duplicate."""
+        key = ReviewDeduper.key(review["text"])
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+
+        self.count += 1
+        self.histogram[min(5, max(1, review.get("rating", 5))) - 1] += 1
+        review = {**review, "sentiment": result["score"]}
+        if _review_is_positive(review, self.model):
+            self.positive += 1
+        if result["score"] is not None:
+            self.sentiment_sum += result["score"]
+            self.sentiment_count += 1
+        for aspect, value in result["aspects"].items():
+            counts = self.aspects.setdefault(aspect, [0, 0, 0])
+            counts[0] += 1
+            if value >= self.model.positive_sentiment:
+                counts[1] += 1
+            elif value <= -self.model.positive_sentiment:
+                counts[2] += 1
+        return True
+
+    @property
+    def positive_ratio(self) -> float:
+        return self.positive / self.count if self.count else 0.0
+
+    @property
+    def mean_rating(self) -> float:
+        if not self.count:
+            return 0.0
+        return sum((i + 1) * n for i, n in enumerate(self.histogram)) / self.count
+
+    def end_page(self) -> None:
+        self.pages += 1
+        self._history.append((self.positive_ratio, self.mean_rating / 5))
+
+    @property
+    def converged(self) -> bool:
+        """Positive ratio and mean rating stable (±tolerance) for `patience` pages."""
+        if self.count < self.min_reviews or len(self._history) <= self.patience:
+            return False
+        recent = self._history[-(self.patience + 1):]
+        return all(
+            max(v[i] for v in recent) - min(v[i] for v in recent) <= self.tolerance
+            for i in (0, 1)
+        )
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "pages": self.pages,
+            "positive": self.positive,
+            "positive_ratio": round(self.positive_ratio, 3),
+            "mean_rating": round(self.mean_rating, 2),
+            "mean_sentiment": (round(self.sentiment_sum / self.sentiment_count, 3)
+                               if self.sentiment_count else 0.0),
+            "histogram": {str(i + 1): n for i, n in enumerate(self.histogram)},
+            "aspects": {
+                a: {"mentions": m, "positive": p, "negative": n}
+                for a, (m, p, n) in sorted(self.aspects.items(), key=lambda kv: -kv[1][0])
+            },
+            "converged": self.converged,
+        }
+
+
+def crawl_reviews(url: str, platform: str, max_pages: int = 30, concurrency: int = 4,
+                  deadline: Deadline | None = None) -> dict:
+    """
+    Stream a product's review pages into a ReviewAggregate and return its
+    summary. Stops at the first empty page, once the aggregate converges,
+    or when the deadline runs out (the summary then covers the pages so far).
+    The pages are the site's review_urls(), fetched by its review_pages()
+    or else by strategy: `concurrency` at a time over HTTP, sequentially
+    in a browser. Raises ValueError for a site without a review crawl.
+    """
+    from sentiment import get_engine
+
+    deadline = deadline or Deadline(None)
+    site = _site(platform)
+    if not site.crawls_reviews:
+        raise ValueError(f"{site.label} has no review crawl")
+    urls = site.review_urls(url, max_pages)
+    if site.review_pages is not None:
+        pages = site.review_pages(urls, deadline)
+    elif site.strategy == "browser":
+        pages = _browser_review_pages(urls, deadline)
+    else:
+        pages = _http_review_pages(urls, deadline, concurrency)
+    engine = get_engine()
+    agg = ReviewAggregate()
+
+    try:
+        for html in pages:
+            if not html:
+                break
+            page_reviews = list(_iter_page_reviews(html, site))
+            if not page_reviews:
+                break
+            results = engine.score_batch([r["text"] for r in page_reviews])
+            new = sum(agg.add(r, res) for r, res in zip(page_reviews, results))
+            agg.end_page()
+            if not new or agg.converged:
+                break
+            if deadline.skip(f"{platform} review pages after {agg.pages}"):
+                break
+    finally:
+        pages.close()
+
+    print(f"  → Review crawl: {agg.count} reviews over {agg.pages} pages"
+          f"{' (converged)' if agg.converged else ''}")
+    return agg.summary()
+
+
+# ════════════════════════════════════════════════════════════════════════════
+# MARKETPLACE PLUGINS
+# Each marketplace is a sites.Site: URL canonicalisation, fetch strategy,
+# per-process fetch budget, page and review parsers and review-page URLs.
+# Nothing else in the pipeline names a marketplace; more are added as plugin
+# modules (PRICEHAWK_SITE_PLUGINS).
+# ════════════════════════════════════════════════════════════════════════════
+
+register_site(Site(
+    name="flipkart",
+    hosts=("flipkart.com", "fkrt.it", "fkrt.cc", "fkrt.to"),
+    short_link=r"https?://(?:dl\.flipkart\.com/s/|fkrt\.(?:it|cc|to)/)",
+    canonicalize=_canonical_flipkart,
+    parse=extract_flipkart,
+    extract=_fetch_flipkart_tiered,
+    fetch_html=_fetch_flipkart_playwright,
+    review_urls=_flipkart_review_urls,
+    parse_reviews=_flipkart_page_reviews,
+    review_pages=_flipkart_review_pages,
+    strategy="tiered",
+    concurrency=4,      # the browser governor still caps Chromium host-wide
+    min_interval=0.5,
+))
+register_site(Site(
+    name="amazon",
+    hosts=("amazon.in", "amazon.com", "amzn.in", "amzn.to", "amzn.eu", "a.co"),
+    short_link=r"https?://(?:amzn\.(?:in|to|eu)|a\.co)/",
+    canonicalize=_canonical_amazon,
+    parse=extract_amazon,
+    fetch_html=_fetch_amazon_requests,
+    review_urls=_amazon_review_urls,
+    parse_reviews=_amazon_page_reviews,
+    strategy="http",
+    concurrency=4,
+    min_interval=1.0,
+))
+load_plugins(os.environ.get("PRICEHAWK_SITE_PLUGINS", ""))
+
+
 # ════════════════════════════════════════════════════════════════════════════
 # DATABASE HELPER
 # ════════════════════════════════════════════════════════════════════════════
 
-def save_to_supabase(data: dict, url: str, comparison_id: str | None = None) -> str | None:
+def _product_id(url: str) -> str:
+    """Database id: keyed by the canonical URL, so every link to a listing updates one row."""
+    return hashlib.md5(_clean_url(url).encode()).hexdigest()[:20]
+
+
+# Columns written beyond the original products schema, created by
+# migrations/001_products_columns.sql. Against a table that has not been
+# migrated yet they are dropped from writes instead of failing every save.
+OPTIONAL_PRODUCT_COLUMNS = ("display", "ai_model_version", "ai_inputs_hash", "review_summary", "last_seen")
+_missing_columns: set[str] = set()
+
+
+def _missing_column(exc: Exception) -> str | None:
+    """
+    The optional column a failed write complained about, if any: PostgREST
+    reports "Could not find the 'x' column of 'products'", Postgres
+    'column "x" of relation "products" does not exist'.
+    """
+    message = str(exc)
+    if "column" not in message:
+        return None
+    for column in OPTIONAL_PRODUCT_COLUMNS:
+        if column not in _missing_columns and re.search(rf"""['".]{column}\b""", message):
+            return column
+    return None
+
+
+def _write_product(write, row: dict) -> None:
+    """Run write(row), retrying without each optional column the table turns out to lack."""
+    while True:
+        try:
+            write({k: v for k, v in row.items() if k not in _missing_columns})
+            return
+        except Exception as exc:
+            column = _missing_column(exc)
+            if column is None:
+                raise
+            _missing_columns.add(column)
+            print(f"  ⚠️  products.{column} is missing — run migrations/001_products_columns.sql; "
+                  f"writing without it")
+
+
+def save_to_supabase(data: dict, url: str, comparison_id: str | None = None,
+                     deadline: Deadline | None = None) -> str | None:
+    url = _clean_url(url)
+    product_id = _product_id(url)
+    # The local rankings are kept current even when Supabase is not configured
+    try:
+        RANKINGS.add(product_id, data, url)
+    except Exception as exc:
+        print(f"  ⚠️  Rankings update failed: {exc}")
+
     if not supabase:
         return None
+    deadline = deadline or Deadline(None)
+    if deadline.skip(f"{data.get('platform')} database write"):
+        return None
     try:
-        product_id = hashlib.md5(url.encode()).hexdigest()[:20]
 
-        # Only include columns that exist in the Supabase products table.
-        # If you want to store 'display', run this SQL in Supabase first:
-        #   ALTER TABLE products ADD COLUMN display TEXT;
+        # Columns in OPTIONAL_PRODUCT_COLUMNS need migrations/001_products_columns.sql
+        # and are left out until it has run. Every SPEC_FIELDS entry is stored,
+        # so rescore.py scores a row with the same spec inputs as the scrape did.
         product_data = {
             "id": product_id,
             "comparison_id": comparison_id,
@@ -872,17 +2404,29 @@ def save_to_supabase(data: dict, url: str, comparison_id: str | None = None) ->
             "processor": data.get("processor"),
             "camera": data.get("camera"),
             "battery": data.get("battery"),
-            # "display": data.get("display"),  # Uncomment after: ALTER TABLE products ADD COLUMN display TEXT;
-            "category_ratings": json.dumps(data.get("category_ratings", {})),
+            "display": data.get("display"),
+            "category_ratings": dumps(data.get("category_ratings", {})).decode(),
             "ai_score": data.get("ai_score"),
             "ai_verdict": data.get("ai_verdict"),
-            "ai_reasons": json.dumps(data.get("ai_reasons", [])),
-            "ai_breakdown": json.dumps(data.get("ai_breakdown", {})),
+            "ai_reasons": dumps(data.get("ai_reasons", [])).decode(),
+            "ai_breakdown": dumps(data.get("ai_breakdown", {})).decode(),
+            # Which scoring model produced ai_score, and a digest of its inputs,
+            # so rescore.py only recomputes rows that are actually stale
+            "ai_model_version": data.get("ai_model_version"),
+            "ai_inputs_hash": scoring_inputs_hash(data),
+            # The deep review crawl's counts decide the sentiment component, so
+            # rescore.py needs them too
+            "review_summary": dumps(data["review_summary"]).decode() if data.get("review_summary") else None,
             "created_at": datetime.now(timezone.utc).isoformat(),
+            # Moved alone by touch_in_supabase() when a re-scrape is unchanged
+            "last_seen": datetime.now(timezone.utc).isoformat(),
         }
-        supabase.table("products").upsert(product_data, on_conflict="id").execute()
+        _write_product(lambda row: supabase.table("products").upsert(row, on_conflict="id").execute(),
+                       product_data)
 
         for rev in data.get("reviews", [])[:10]:
+            if deadline.expired():
+                break
             supabase.table("reviews").insert({
                 "product_id": product_id,
                 "rating": rev.get("rating"),
@@ -896,47 +2440,653 @@ def save_to_supabase(data: dict, url: str, comparison_id: str | None = None) ->
         return None
 
 
+def touch_in_supabase(product_id: str, deadline: Deadline | None = None) -> None:
+    """An unchanged re-scrape: bump last_seen instead of rewriting the row and its reviews."""
+    if not supabase or "last_seen" in _missing_columns:
+        return
+    deadline = deadline or Deadline(None)
+    if deadline.skip("last_seen update"):
+        return
+    try:
+        supabase.table("products").update(
+            {"last_seen": datetime.now(timezone.utc).isoformat()}
+        ).eq("id", product_id).execute()
+    except Exception as exc:
+        if _missing_column(exc) == "last_seen":
+            _missing_columns.add("last_seen")
+            print("  ⚠️  products.last_seen is missing — run migrations/001_products_columns.sql")
+        else:
+            print(f"  ❌ DB error: {exc}")
+
+
+# ─── Cross-platform product index (see product_index.py) ────────────────────
+PRODUCT_INDEX = ProductIndex()
+print(f"✅ Product index loaded ({len(PRODUCT_INDEX):,} products)")
+
+# ─── Product rankings, updated by save_to_supabase (see rankings.py) ────────
+RANKINGS = RankingIndex()
+print(f"✅ Rankings loaded ({len(RANKINGS):,} products)")
+
+# ─── Scrape work queue, drained by scrape_worker.py (see work_queue.py) ─────
+# With PRICEHAWK_SCRAPE_QUEUE=1 the API fetches nothing itself: scrape()
+# enqueues the page and waits for a worker's result within the deadline.
+WORK_QUEUE = WorkQueue()
+SCRAPE_QUEUE = os.environ.get("PRICEHAWK_SCRAPE_QUEUE", "").lower() in ("1", "true", "yes")
+
+# ─── Last-seen fingerprints and change events (see change_tracker.py) ───────
+CHANGES = ChangeTracker()
+
+# ─── Share-link resolution, cached across restarts (see url_resolver.py) ────
+RESOLVER = UrlResolver(transport=_upstream)
+
+
+def _product_url(url: str, deadline: Deadline | None = None) -> str:
+    """A pasted URL with any share link resolved; _clean_url() of it is the cache/dedup key."""
+    return RESOLVER.resolve(url.strip(), deadline)
+
+
+def scrape(url: str, platform: str, deadline: Deadline | None = None) -> ProductRecord | None:
+    """fetch_and_extract() in this process, or on a scrape worker when SCRAPE_QUEUE is on."""
+    if not SCRAPE_QUEUE:
+        return fetch_and_extract(url, platform, deadline)
+
+    deadline = deadline or Deadline(None)
+    remaining = deadline.remaining()
+    bounded = remaining != float("inf")
+    job_id = WORK_QUEUE.enqueue(
+        _clean_url(url), platform,
+        timeout=remaining if bounded else None,
+        expires_at=time.time() + remaining if bounded else None,
+    )
+    print(f"  → Queued {platform} job {job_id}")
+    job = WORK_QUEUE.wait(job_id, deadline)
+    if job and job["status"] == "done":
+        return ProductRecord.from_dict(job["result"])
+    if job and job["status"] == "failed":
+        print(f"  ❌ Job {job_id} failed: {job['error']}")
+    else:
+        deadline.skipped.append(f"{platform} fetch (job {job_id} still {job and job['status']})")
+        print(f"  ⏱️  Job {job_id} not finished in time")
+    return None
+
+
 # ════════════════════════════════════════════════════════════════════════════
 # API ROUTES
 # ════════════════════════════════════════════════════════════════════════════
 
+def _json_response(payload, status: int = 200) -> Response:
+    """JSON response via records.dumps — serializes ProductRecords directly."""
+    return Response(dumps(payload), status=status, mimetype="application/json")
+
+
+def _json_stream(key: str, items, **extra) -> Response:
+    """
+    Stream {key: [...], "count": N, **extra, "status": ...} one item at a
+    time, so memory stays flat however long the list is. The 200 is already
+    sent by the time an item fails, so errors end the list and are reported
+    in "status"/"error" instead.
+    """
+    def generate():
+        yield b'{"' + key.encode() + b'":['
+        count, tail = 0, {"status": "success"}
+        try:
+            for item in items:
+                yield (b"," if count else b"") + dumps(item)
+                count += 1
+        except Exception as exc:
+            print(f"  ❌ Stream error after {count} items: {exc}")
+            tail = {"status": "error", "error": str(exc)}
+        yield b"]," + dumps({"count": count, **extra, **tail})[1:]
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
+
+
+# ─── Response compression (brotli when installed, else gzip) ────────────────
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = 1024
+COMPRESS_MIMETYPES = ("application/json", "text/html", "text/plain")
+
+
+def _negotiate_encoding() -> str | None:
+    accept = request.accept_encodings
+    if brotli is not None and accept["br"]:
+        return "br"
+    if accept["gzip"]:
+        return "gzip"
+    return None
+
+
+def _compressor(encoding: str):
+    """(compress, finish) callables for one response body."""
+    if encoding == "br":
+        c = brotli.Compressor(quality=5)
+        return c.process, c.finish
+    c = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 → gzip container
+    return c.compress, c.flush
+
+
+def _compress_stream(chunks, encoding: str):
+    compress, finish = _compressor(encoding)
+    try:
+        for chunk in chunks:
+            out = compress(chunk.encode() if isinstance(chunk, str) else chunk)
+            if out:
+                yield out
+        yield finish()
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+@app.after_request
+def _compress_response(response: Response) -> Response:
+    if (
+        response.mimetype not in COMPRESS_MIMETYPES
+        or "Content-Encoding" in response.headers
+        or response.status_code in (204, 304)
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = _negotiate_encoding()
+    if not encoding:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_BYTES:
+            return response
+        compress, finish = _compressor(encoding)
+        response.set_data(compress(data) + finish())
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+# ─── Worker memory watermark (see memory_guard.py) ──────────────────────────
+MEMORY = MemoryWatermark()
+_recycle_sent = False
+
+
+@app.teardown_request
+def _check_memory(exc=None) -> None:
+    global _recycle_sent
+    if MEMORY.check() != "hard" or _recycle_sent:
+        return
+    # Under gunicorn, SIGTERM makes the worker finish its current request and
+    # exit, and the master starts a fresh one. The dev server has no master,
+    # so there the warning logged by MEMORY.check() is all we can do.
+    if str(request.environ.get("SERVER_SOFTWARE", "")).startswith("gunicorn"):
+        _recycle_sent = True
+        os.kill(os.getpid(), signal.SIGTERM)
+
+
+# ─── Opt-in sampling profiler (see profiler.py) ─────────────────────────────
+# With PRICEHAWK_PROFILING=1, a request to a profiled endpoint carrying
+# "X-PriceHawk-Profile: 1" or ?profile=1 is sampled and its profile saved.
+# PRICEHAWK_PROFILE_SLOW_MS > 0 samples every such request at a coarser
+# interval and keeps the profiles of those slower than the threshold.
+# Both default to off, so normally no sampler thread runs at all.
+PROFILING = os.environ.get("PRICEHAWK_PROFILING", "").lower() in ("1", "true", "yes")
+PROFILE_SLOW_MS = float(os.environ.get("PRICEHAWK_PROFILE_SLOW_MS", "0"))
+PROFILED_ENDPOINTS = {"compare_products", "match_product"}
+PROFILER = SamplingProfiler(
+    interval=float(os.environ.get("PRICEHAWK_PROFILE_INTERVAL_MS", "5")) / 1000,
+    keep=int(os.environ.get("PRICEHAWK_PROFILE_KEEP", "50")),
+    max_age=float(os.environ.get("PRICEHAWK_PROFILE_MAX_AGE_H", "72")) * 3600,
+)
+SLOW_PROFILE_INTERVAL = float(os.environ.get("PRICEHAWK_PROFILE_SLOW_INTERVAL_MS", "20")) / 1000
+
+
+@app.before_request
+def _start_profile() -> None:
+    if request.endpoint not in PROFILED_ENDPOINTS or not (PROFILING or PROFILE_SLOW_MS > 0):
+        return
+    forced = PROFILING and (
+        request.headers.get("X-PriceHawk-Profile", "").lower() in ("1", "true", "yes")
+        or request.args.get("profile", "").lower() in ("1", "true", "yes")
+    )
+    if forced or PROFILE_SLOW_MS > 0:
+        g.profile_forced = forced
+        g.profile = PROFILER.start(request.full_path, None if forced else SLOW_PROFILE_INTERVAL)
+
+
+@app.after_request
+def _finish_profile(response: Response) -> Response:
+    session = g.pop("profile", None)
+    if session is None:
+        return response
+    PROFILER.stop(session)
+    if g.profile_forced or session.elapsed * 1000 >= PROFILE_SLOW_MS:
+        try:
+            PROFILER.save(session)
+            response.headers["X-PriceHawk-Profile-Id"] = session.id
+            print(f"  🔬 Profile {session.id} saved ({session.sample_count} samples over "
+                  f"{session.elapsed:.1f}s) — GET /api/profiles/{session.id}.speedscope.json")
+        except OSError as exc:
+            print(f"  ⚠️  Profile not saved: {exc}")
+    return response
+
+
+@app.teardown_request
+def _drop_profile(exc=None) -> None:
+    # A view that raised never reaches after_request: stop its sampling anyway
+    session = g.pop("profile", None)
+    if session is not None:
+        PROFILER.stop(session)
+
+
 @app.route("/")
 def home():
     return jsonify({
         "name": "🦅 PriceHawk Pro API",
         "status": "running",
         "version": "3.0",
+        "scoring_model": get_scoring_model().version,
         "endpoints": {
-            "GET /api/compare": "?flipkart_url=...&amazon_url=...",
-            "GET /api/dashboard": "Returns saved products",
+            "GET /api/compare": "?flipkart_url=...&amazon_url=...|?url=...&url=...[&deep_reviews=1]"
+                                "[&fields=title,price,ai_score][&include_reviews=false][&timeout=30]",
+            "GET /api/dashboard": "Returns saved products [?limit=50] (streamed)",
+            "GET /api/match": "?url=...[&platform=amazon][&timeout=30] → best matching products on the other platforms",
+            "GET /api/sites": "Registered marketplaces with their fetch strategy and budgets",
+            "GET /api/resolve": "?url=... → canonical product URL (share links like dl.flipkart.com/s/… resolved)",
+            "GET /api/fetch_stats": "Flipkart fetch tier hit rates, latency and browser queue wait",
+            "GET /api/selector_stats": "Extractor selector hit rates, chain order and alerts",
+            "GET /api/health": "Worker RSS, memory watermarks, open browsers and browser slots",
+            "GET /api/profiles": "Saved request profiles (PRICEHAWK_PROFILING=1 and ?profile=1, "
+                                 "or PRICEHAWK_PROFILE_SLOW_MS); /api/profiles/<file> to download",
+            "GET /api/changes": "Price drops, rating changes and new reviews seen by re-scrapes "
+                                "[?kind=price_drop&platform=&since=&limit=100]",
+            "POST /api/jobs": "?url=... → queue a scrape for the workers (scrape_worker.py)",
+            "GET /api/jobs/<id>": "A queued scrape's status and extracted product",
+            "GET /api/jobs": "Work queue depth by status",
+            "GET /api/rankings": "?by=ai_score|price_per_score|category[&category=Camera]"
+                                 "[&k=10&brand=&platform=&min_price=&max_price=&min_ram=&min_storage=]",
         },
     })
 
 
+DASHBOARD_PAGE_SIZE = 200
+
+# Overall budget of a scraping request; clients may ask for less or more
+# with ?timeout=<seconds>, up to MAX_REQUEST_TIMEOUT
+DEFAULT_REQUEST_TIMEOUT = float(os.environ.get("PRICEHAWK_REQUEST_TIMEOUT", "45"))
+MAX_REQUEST_TIMEOUT = float(os.environ.get("PRICEHAWK_MAX_REQUEST_TIMEOUT", "90"))
+
+
+def _request_deadline() -> Deadline:
+    """The request's Deadline from ?timeout=; raises ValueError on a bad value."""
+    raw = request.args.get("timeout", "").strip()
+    seconds = float(raw) if raw else DEFAULT_REQUEST_TIMEOUT
+    if not seconds > 0:
+        raise ValueError("timeout must be a positive number of seconds")
+    return Deadline(min(seconds, MAX_REQUEST_TIMEOUT))
+
+
+def _decode_json_columns(product: dict) -> dict:
+    for field in ("category_ratings", "ai_reasons", "ai_breakdown"):
+        raw = product.get(field)
+        if raw:
+            try:
+                product[field] = loads(raw)
+            except (ValueError, TypeError):
+                product[field] = {} if field != "ai_reasons" else []
+    return product
+
+
 @app.route("/api/dashboard")
 def dashboard():
+    """
+    Saved products, newest first.
+    Query params:
+        limit  – number of products (default 50, max 5000)
+    Rows are read from Supabase DASHBOARD_PAGE_SIZE at a time and streamed
+    out as each page arrives.
+    """
     if not supabase:
         return jsonify({"error": "Database not configured"}), 500
     try:
-        result = (
+        limit = max(1, min(int(request.args.get("limit", 50)), 5000))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    def fetch(start: int) -> list[dict]:
+        end = min(start + DASHBOARD_PAGE_SIZE, limit) - 1
+        return (
             supabase.table("products")
             .select("*")
             .order("created_at", desc=True)
-            .limit(50)
+            .range(start, end)
             .execute()
-        )
-        for product in result.data:
-            for field in ("category_ratings", "ai_reasons", "ai_breakdown"):
-                raw = product.get(field)
-                if raw:
-                    try:
-                        product[field] = json.loads(raw)
-                    except (json.JSONDecodeError, TypeError):
-                        product[field] = {} if field != "ai_reasons" else []
-        return jsonify({"status": "success", "products": result.data, "count": len(result.data)})
+        ).data
+
+    # The first page is fetched up front so a DB error still gets a 500
+    try:
+        first = fetch(0)
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
 
+    def rows():
+        page, start = first, 0
+        while True:
+            for product in page:
+                yield _decode_json_columns(product)
+            start += len(page)
+            if start >= limit or len(page) < min(DASHBOARD_PAGE_SIZE, limit):
+                return
+            page = fetch(start)
+
+    return _json_stream("products", rows())
+
+
+@app.route("/api/rankings", methods=["GET"])
+def rankings():
+    """
+    Top-K saved products, served from the indexed RANKINGS store.
+    Query params:
+        by           – ai_score (default) | price_per_score | category
+        category     – category name when by=category (e.g. Camera, Battery)
+        k            – number of products (default 10, max 100)
+        brand, platform              – exact filters
+        min_price, max_price         – price band in ₹
+        min_ram, min_storage         – minimum GB (e.g. min_ram=8)
+    """
+    args = request.args
+    try:
+        k = max(1, min(int(args.get("k", 10)), 100))
+        numeric = {
+            name: float(args[name])
+            for name in ("min_price", "max_price", "min_ram", "min_storage")
+            if args.get(name, "").strip()
+        }
+    except ValueError:
+        return jsonify({"error": "k, min_price, max_price, min_ram and min_storage must be numbers"}), 400
+
+    start = time.perf_counter()
+    try:
+        products = RANKINGS.top(
+            by=args.get("by", "ai_score"),
+            k=k,
+            category=args.get("category") or None,
+            brand=args.get("brand") or None,
+            platform=args.get("platform") or None,
+            **numeric,
+        )
+    except ValueError as exc:
+        return jsonify({"error": str(exc), "rankings": RANKING_METRICS}), 400
+
+    return _json_stream(
+        "products", products,
+        total_ranked=len(RANKINGS),
+        elapsed_ms=round((time.perf_counter() - start) * 1000, 2),
+    )
+
+
+@app.route("/api/fetch_stats")
+def fetch_stats():
+    return jsonify({
+        "status": "success",
+        "tiers": list(FLIPKART_TIERS),
+        "flipkart": flipkart_tier_stats(),
+        "browser_governor": BROWSER_GOVERNOR.stats(),
+    })
+
+
+@app.route("/api/health")
+def health():
+    return jsonify({
+        "status": "success",
+        "pid": os.getpid(),
+        "memory": MEMORY.stats(),
+        "live_browsers": _live_browsers,
+        "browser_governor": BROWSER_GOVERNOR.stats(),
+        "change_tracker": CHANGES.stats(),
+    })
+
+
+@app.route("/api/changes")
+def list_changes():
+    """
+    Price/rating/review change events seen by re-scrapes, newest first.
+    Query params:
+        kind     – price_drop | price_rise | rating_change | new_reviews (optional)
+        platform – only this marketplace (optional)
+        since    – unix timestamp (optional)
+        limit    – max events (default 100, max 1000)
+    """
+    try:
+        limit = max(1, min(int(request.args.get("limit", 100)), 1000))
+        since = float(request.args["since"]) if request.args.get("since") else None
+    except ValueError:
+        return jsonify({"error": "limit and since must be numbers"}), 400
+    events = CHANGES.events(since, request.args.get("kind") or None,
+                            request.args.get("platform") or None, limit)
+    return jsonify({"status": "success", "count": len(events), "events": events, **CHANGES.stats()})
+
+
+@app.route("/api/profiles")
+def list_profiles():
+    """Saved request profiles, newest first (see PRICEHAWK_PROFILING)."""
+    return jsonify({"status": "success", "profiles": PROFILER.list()})
+
+
+@app.route("/api/profiles/<name>")
+def get_profile(name: str):
+    """One saved profile file: .collapsed.txt or .speedscope.json (load it at speedscope.app)."""
+    return send_from_directory(PROFILER.directory, name)
+
+
+@app.route("/api/jobs", methods=["POST"])
+def enqueue_job():
+    """
+    Queue a product-page scrape for the workers and return its job id.
+    Query params (or a JSON body):
+        url     – Flipkart or Amazon product page URL
+        timeout – the worker's fetch budget in seconds (optional)
+    """
+    body = request.get_json(silent=True) or {}
+    url = _clean_url(_product_url(str(body.get("url") or request.args.get("url", "")), Deadline(10)))
+    platform = _detect_platform(url)
+    if not platform:
+        return jsonify({"error": "Please provide a Flipkart or Amazon product URL"}), 400
+    try:
+        raw = body.get("timeout") or request.args.get("timeout")
+        timeout = min(float(raw), MAX_REQUEST_TIMEOUT) if raw else None
+    except ValueError:
+        return jsonify({"error": "timeout must be a number of seconds"}), 400
+
+    job_id = WORK_QUEUE.enqueue(url, platform, timeout=timeout)
+    return jsonify({"status": "queued", "job_id": job_id, "poll": f"/api/jobs/{job_id}"}), 202
+
+
+@app.route("/api/jobs/<job_id>")
+def get_job(job_id: str):
+    job = WORK_QUEUE.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return _json_response({"status": "success", "job": job})
+
+
+@app.route("/api/jobs")
+def job_stats():
+    return jsonify({"status": "success", "queue_mode": SCRAPE_QUEUE, "jobs": WORK_QUEUE.stats()})
+
+
+@app.route("/api/selector_stats")
+def selector_stats():
+    return jsonify({
+        "status": "success",
+        "fields": SELECTOR_STATS.snapshot(),
+        "alerts": list(SELECTOR_STATS.alerts),
+    })
+
+
+@app.route("/api/match", methods=["GET"])
+def match_product():
+    """
+    Find a product's counterparts on the other marketplaces.
+    Query params:
+        url    – product page URL on any registered marketplace
+        platform – only match on this marketplace (default: every other one)
+        limit  – max matches to return (default 3)
+        timeout – seconds allowed for scraping an unknown URL (default
+                  PRICEHAWK_REQUEST_TIMEOUT, capped at PRICEHAWK_MAX_REQUEST_TIMEOUT)
+    Products already in the index are matched without any network I/O;
+    unknown URLs are scraped once and indexed first.
+    """
+    try:
+        deadline = _request_deadline()
+    except ValueError:
+        return jsonify({"error": "timeout must be a positive number of seconds"}), 400
+    url = _clean_url(_product_url(request.args.get("url", ""), deadline))
+    platform = _detect_platform(url)
+    if not platform:
+        return jsonify({"error": f"Please provide a product URL from: {', '.join(SITES)}"}), 400
+    targets = [p for p in SITES if p != platform]
+    wanted = request.args.get("platform", "").strip().lower()
+    if wanted:
+        if wanted not in targets:
+            return jsonify({"error": f"platform must be one of: {', '.join(targets)}"}), 400
+        targets = [wanted]
+    try:
+        limit = max(1, min(int(request.args.get("limit", 3)), 10))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    start = time.perf_counter()
+    product = PRODUCT_INDEX.get(url)
+    scraped = product is None
+    if scraped:
+        print(f"\n🔎 Not indexed yet, fetching {platform}…")
+        data = scrape(url, platform, deadline)
+        if not data or not data.get("title"):
+            return jsonify({"error": f"Could not extract the {platform} product"}), 502
+        PRODUCT_INDEX.add(data, url)
+        product = PRODUCT_INDEX.get(url)
+
+    matches = [m for other in targets for m in PRODUCT_INDEX.match(product, other, limit=limit)]
+    matches.sort(key=lambda m: m["score"], reverse=True)
+    return _json_response({
+        "status": "success",
+        "product": product,
+        "platform": targets[0] if len(targets) == 1 else None,
+        "platforms": targets,
+        "matches": matches[:limit],
+        "scraped": scraped,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+    })
+
+
+@app.route("/api/resolve")
+def resolve_url():
+    """
+    Canonical form of a product URL, share links resolved (cached).
+    Query params:
+        url – any product or share link
+    """
+    raw = request.args.get("url", "").strip()
+    if not raw:
+        return jsonify({"error": "Please provide a url"}), 400
+    resolved = _product_url(raw, Deadline(10))
+    return jsonify({
+        "status": "success",
+        "url": raw,
+        "short_link": RESOLVER.is_short(raw),
+        "resolved": resolved,
+        "canonical": _clean_url(resolved),
+        "platform": _detect_platform(resolved),
+        "resolver": RESOLVER.stats(),
+    })
+
+
+@app.route("/api/sites")
+def list_sites():
+    return jsonify({"status": "success", "sites": {name: site.stats() for name, site in SITES.items()}})
+
+
+def _compare_targets(deadline: Deadline) -> dict[str, str]:
+    """
+    {platform: url} from ?url=… (repeatable, platform auto-detected) and
+    ?<platform>_url=… (flipkart_url, amazon_url…), share links resolved.
+    ValueError on bad input.
+    """
+    targets: dict[str, str] = {}
+    given = [(p, request.args.get(f"{p}_url", "").strip()) for p in SITES]
+    given += [(None, u.strip()) for u in request.args.getlist("url")]
+    for expected, url in given:
+        if not url:
+            continue
+        url = _product_url(url, deadline)
+        platform = _detect_platform(url)
+        if platform is None:
+            raise ValueError(f"Unsupported marketplace URL: {url[:80]}")
+        if expected and platform != expected:
+            raise ValueError(f"{expected}_url is not a {SITES[expected].label} URL")
+        if platform in targets:
+            raise ValueError(f"More than one {SITES[platform].label} URL")
+        targets[platform] = url
+    return targets
+
+
+def _compare_one(platform: str, url: str, deadline: Deadline, deep_reviews: bool,
+                 comparison_id: str) -> tuple[ProductRecord | None, dict | None]:
+    """
+    Scrape, score, store and index one marketplace's product for /api/compare.
+    Returns the product and its change status ("new", "changed" with the
+    change events, or "unchanged" — then the stored score is reused and
+    only last_seen is written, or "unsaved" when the database write failed).
+    """
+    site = SITES[platform]
+    print(f"\n🛒 Fetching {site.label}…")
+    product = scrape(url, platform, deadline)
+    if product is None:
+        print(f"  ❌  Failed to fetch {site.label} page.")
+        return None, None
+    if not (product.get("title") or product.get("price")):
+        print(f"  ⚠️  No usable data extracted from {site.label} page.")
+        return None, None
+
+    if deep_reviews and site.crawls_reviews and not deadline.skip(f"{platform} review crawl"):
+        try:
+            product["review_summary"] = crawl_reviews(url, platform, deadline=deadline)
+        except Exception as exc:
+            print(f"  ⚠️  Review crawl failed: {exc}")
+    product["url"] = url
+
+    product_id = _product_id(url)
+    fingerprint = product_fingerprint(product)
+    model = get_scoring_model()
+    stored_score = CHANGES.lookup(product_id, fingerprint, model.version)
+    if stored_score is not None:
+        product.update(stored_score)
+        CHANGES.touch(product_id)
+        touch_in_supabase(product_id, deadline)
+        change = {"status": "unchanged", "events": []}
+        print(f"  → {site.label} unchanged since last scrape — score reused, last_seen touched")
+    else:
+        product.update(calculate_ai_recommendation(product, model))
+        saved = save_to_supabase(product, url, comparison_id, deadline)
+        PRODUCT_INDEX.add(product, _clean_url(url))
+        events = []
+        if saved or not supabase:
+            events = CHANGES.record(product_id, _clean_url(url), product, fingerprint)
+            change = {"status": "changed" if events else "new", "events": events}
+        else:
+            # The row was not written (DB error or no time left): leave the
+            # fingerprint alone so the next scrape saves it instead of touching it
+            change = {"status": "unsaved", "events": []}
+        for event in events:
+            print(f"  🔔 {event['kind'].replace('_', ' ').capitalize()}: {event['old']} → {event['new']}")
+    print(f"  {site.label} → {product.get('title', 'N/A')[:50]} | {product.get('price', 'N/A')} | "
+          f"⭐ {product.get('rating', 'N/A')} | AI {product.get('ai_score')}/100 | "
+          f"{len(product.get('reviews', []))} reviews")
+    return product, change
+
 
 @app.route("/api/compare", methods=["GET"])
 def compare_products():
@@ -945,113 +3095,99 @@ def compare_products():
     Query params:
         flipkart_url  – Flipkart product page URL (optional)
         amazon_url    – Amazon India product page URL (optional)
-    At least one must be provided.
+        <platform>_url – likewise for every other registered marketplace (optional)
+        url           – any marketplace's product URL, platform auto-detected;
+                        repeatable (optional)
+        deep_reviews  – "1" to crawl the review pages (crawl_reviews) and
+                        score sentiment over all of them (optional)
+        fields        – comma-separated product fields to return, e.g.
+                        title,price,ai_score,ai_verdict (optional)
+        include_reviews – "false" to leave the review texts out (optional)
+        timeout       – overall budget in seconds (default PRICEHAWK_REQUEST_TIMEOUT,
+                        capped at PRICEHAWK_MAX_REQUEST_TIMEOUT); stages that would
+                        run past it are skipped and listed in "deadline.skipped"
+    At least one URL must be provided, at most one per marketplace. The
+    marketplaces are scraped in parallel; each appears under its own key.
     """
-    flipkart_url = request.args.get("flipkart_url", "").strip()
-    amazon_url   = request.args.get("amazon_url", "").strip()
+    deep_reviews = request.args.get("deep_reviews", "").lower() in ("1", "true", "yes")
+    fields = {f.strip() for f in request.args.get("fields", "").split(",") if f.strip()} or None
+    include_reviews = request.args.get("include_reviews", "").lower() not in ("0", "false", "no")
 
-    if not flipkart_url and not amazon_url:
+    try:
+        deadline = _request_deadline()
+    except ValueError:
+        return jsonify({"error": "timeout must be a positive number of seconds"}), 400
+    try:
+        targets = _compare_targets(deadline)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    if not targets:
         return jsonify({"error": "Please provide at least one product URL"}), 400
 
     print(f"\n{'═'*70}")
     print(f"🦅  NEW COMPARISON")
-    if flipkart_url:
-        print(f"  Flipkart : {flipkart_url[:80]}")
-    if amazon_url:
-        print(f"  Amazon   : {amazon_url[:80]}")
+    for platform, url in targets.items():
+        print(f"  {SITES[platform].label:<9}: {url[:80]}")
     print(f"{'═'*70}")
 
     comparison_id = hashlib.md5(
-        f"{flipkart_url}{amazon_url}{time.time()}".encode()
+        f"{''.join(targets.values())}{time.time()}".encode()
     ).hexdigest()[:20]
 
     results: dict = {
-        "flipkart": None,
-        "amazon": None,
+        **{platform: None for platform in SITES},
         "winner": None,
         "price_difference": None,
+        "changes": {},
         "status": "success",
     }
 
-    # ── Flipkart ──────────────────────────────────────────────────────────────
-    if flipkart_url:
-        print("\n📱 Fetching Flipkart…")
-        html = fetch_page(flipkart_url, "flipkart")
-        if html:
-            fk = extract_flipkart(html)
-            if fk.get("title") or fk.get("price"):
-                fk.update(calculate_ai_recommendation(fk))
-                fk["url"] = flipkart_url
-                results["flipkart"] = fk
-                save_to_supabase(fk, flipkart_url, comparison_id)
-                print(f"  Title    : {fk.get('title', 'N/A')[:60]}")
-                print(f"  Price    : {fk.get('price', 'N/A')}")
-                print(f"  Rating   : {fk.get('rating', 'N/A')}")
-                print(f"  AI Score : {fk.get('ai_score')}/100")
-                print(f"  Reviews  : {len(fk.get('reviews', []))}")
-            else:
-                print("  ⚠️  No usable data extracted from Flipkart page.")
-        else:
-            print("  ❌  Failed to fetch Flipkart page.")
-
-    # ── Amazon ────────────────────────────────────────────────────────────────
-    if amazon_url:
-        time.sleep(2)
-        print("\n📦 Fetching Amazon…")
-        html = fetch_page(amazon_url, "amazon")
-        if html:
-            az = extract_amazon(html)
-            if az.get("title") or az.get("price"):
-                az.update(calculate_ai_recommendation(az))
-                az["url"] = amazon_url
-                results["amazon"] = az
-                save_to_supabase(az, amazon_url, comparison_id)
-                print(f"  Title    : {az.get('title', 'N/A')[:60]}")
-                print(f"  Price    : {az.get('price', 'N/A')}")
-                print(f"  Rating   : {az.get('rating', 'N/A')}")
-                print(f"  AI Score : {az.get('ai_score')}/100")
-                print(f"  Reviews  : {len(az.get('reviews', []))}")
-            else:
-                print("  ⚠️  No usable data extracted from Amazon page.")
-        else:
-            print("  ❌  Failed to fetch Amazon page.")
+    with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+        futures = {
+            platform: pool.submit(PROFILER.bind(_compare_one), platform, url, deadline, deep_reviews, comparison_id)
+            for platform, url in targets.items()
+        }
+    for platform, future in futures.items():
+        try:
+            results[platform], change = future.result()
+            if change is not None:
+                results["changes"][platform] = change
+        except Exception as exc:
+            print(f"  ❌  {SITES[platform].label} failed: {exc}")
 
     # ── Winner ────────────────────────────────────────────────────────────────
-    if results["flipkart"] and results["amazon"]:
-        f_score = results["flipkart"].get("ai_score", 0)
-        a_score = results["amazon"].get("ai_score", 0)
-
-        if abs(f_score - a_score) < 3:
+    found = {p: r for p, r in results.items() if p in SITES and r is not None}
+    if found:
+        ranked = sorted(found, key=lambda p: found[p].get("ai_score", 0), reverse=True)
+        if len(ranked) > 1 and found[ranked[0]].get("ai_score", 0) - found[ranked[1]].get("ai_score", 0) < 3:
             results["winner"] = "tie"
-        elif f_score > a_score:
-            results["winner"] = "flipkart"
         else:
-            results["winner"] = "amazon"
-
-        print(f"\n  🏆 Winner : {results['winner'].upper()}")
-
-        # Price delta
-        try:
-            f_val = float(results["flipkart"]["price"].replace("₹", "").replace(",", ""))
-            a_val = float(results["amazon"]["price"].replace("₹", "").replace(",", ""))
-            diff = abs(f_val - a_val)
-            cheaper = "flipkart" if f_val < a_val else "amazon"
+            results["winner"] = ranked[0]
+        if len(found) > 1:
+            print(f"\n  🏆 Winner : {results['winner'].upper()}")
+
+        # Price delta between the cheapest and the dearest listing
+        priced = {p: r.price_rupees for p, r in found.items() if r.price_rupees}
+        if len(priced) > 1:
+            cheaper = min(priced, key=priced.get)
+            dearest = max(priced.values())
+            diff = dearest - priced[cheaper]
             results["price_difference"] = {
                 "amount": round(diff, 2),
                 "cheaper_on": cheaper,
-                "percentage": round((diff / max(f_val, a_val)) * 100, 1),
+                "percentage": round((diff / dearest) * 100, 1),
             }
             print(f"  💰 ₹{diff:,.0f} cheaper on {cheaper}")
-        except Exception:
-            pass
 
-    elif results["flipkart"]:
-        results["winner"] = "flipkart"
-    elif results["amazon"]:
-        results["winner"] = "amazon"
+    if fields or not include_reviews:
+        for platform in found:
+            results[platform] = results[platform].to_dict(only=fields, include_reviews=include_reviews)
 
+    results["deadline"] = deadline.report()
+    if deadline.skipped:
+        print(f"\n  ⏱️  Partial result after {deadline.elapsed():.1f}s — skipped: {', '.join(deadline.skipped)}")
     print(f"\n{'═'*70}\n")
-    return jsonify(results)
+    return _json_response(results)
 
 
 # ════════════════════════════════════════════════════════════════════════════
@@ -0,0 +1,105 @@
+"""
+Review de-duplication: legacy list scans vs ReviewDeduper.
+Run: python benchmarks/bench_dedup.py [--reviews 5000] [--depth 12]
+
+1. Keyword fallback over a deeply nested page where few divs match, so the
+   scan covers every div: legacy get_text() per div vs _text_lengths().
+2. Seen-checks over a crawl-sized review stream with repeats: legacy
+   `text not in [r["text"] for r in reviews]` vs ReviewDeduper.add().
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from app import ReviewDeduper, _flipkart_keyword_review, _flipkart_keyword_reviews  # noqa: E402
+
+_WORDS = ("camera battery display screen phone product quality good excellent best build "
+          "performance fast value money happy satisfied smooth bright lag heating charging "
+          "speaker sound design premium price worth gaming selfie night photo video backup").split()
+
+
+def _review(rnd: random.Random, i: int) -> str:
+    return " ".join(rnd.choice(_WORDS) for _ in range(rnd.randint(12, 40))) + f" order {i}"
+
+
+def _nested_page(n_blocks: int, depth: int, n_reviews: int, rnd: random.Random) -> str:
+    blocks = []
+    for i in range(n_blocks):
+        text = _review(rnd, i) if i % max(1, n_blocks // n_reviews) == 0 else f"spec row {i} lorem ipsum"
+        inner = f"<div>{text}</div>"
+        for _ in range(depth):
+            inner = f"<div>{inner}</div>"
+        blocks.append(f'<div class="c"><div>{rnd.randint(1, 5)}</div>{inner}<p>Certified Buyer</p></div>')
+    return "<html><body><div><div>" + "".join(blocks) + "</div></div></body></html>"
+
+
+def _legacy_keyword_reviews(soup: BeautifulSoup) -> list:
+    reviews: list = []
+    for div in soup.find_all("div"):
+        if len(reviews) >= 10:
+            break
+        text = div.get_text(" ", strip=True)
+        if text in [r["text"] for r in reviews]:
+            continue
+        review = _flipkart_keyword_review(text)
+        if review:
+            reviews.append(review)
+    return reviews
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reviews", type=int, default=5_000)
+    parser.add_argument("--depth", type=int, default=12)
+    args = parser.parse_args()
+    rnd = random.Random(11)
+
+    print("1️⃣  Keyword fallback over a nested page")
+    for blocks in (500, 2_000, 5_000):
+        soup = BeautifulSoup(_nested_page(blocks, args.depth, 4, rnd), "html.parser")
+        legacy, t_old = _timed(_legacy_keyword_reviews, soup)
+        fresh: list = []
+        _, t_new = _timed(_flipkart_keyword_reviews, soup, fresh, ReviewDeduper())
+        print(f"  {blocks:>6,} blocks : legacy {t_old * 1000:>8.1f} ms ({len(legacy)} reviews)"
+              f"  |  new {t_new * 1000:>7.1f} ms ({len(fresh)} reviews)")
+
+    print("\n2️⃣  Seen-checks over a review stream (30% repeats)")
+    uniques = [_review(rnd, i) for i in range(args.reviews)]
+    stream = uniques + [
+        f"{rnd.randint(1, 5)} {rnd.choice(uniques)} Certified Buyer"
+        for _ in range(int(args.reviews * 0.3))
+    ]
+    rnd.shuffle(stream)
+
+    def legacy(texts):
+        kept: list = []
+        for t in texts:
+            if t not in [r["text"] for r in kept]:
+                kept.append({"text": t})
+        return kept
+
+    def deduped(texts):
+        seen = ReviewDeduper()
+        return [t for t in texts if seen.add(t)]
+
+    kept_old, t_old = _timed(legacy, stream)
+    kept_new, t_new = _timed(deduped, stream)
+    print(f"  {len(stream):>6,} texts  : legacy {t_old * 1000:>8.1f} ms ({len(kept_old):,} kept)"
+          f"  |  new {t_new * 1000:>7.1f} ms ({len(kept_new):,} kept)")
+
+
+if __name__ == "__main__":
+    main()
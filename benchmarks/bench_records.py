@@ -0,0 +1,106 @@
+"""
+Memory and serialization cost of ProductRecord vs the extractor dicts.
+Run: python benchmarks/bench_records.py [--products 20000]
+
+Builds the same synthetic catalogue (10 reviews per product) both ways,
+reports the retained heap size of each (tracemalloc), then the time to
+serialize the whole batch: stdlib json over dicts, as the API and
+save_to_supabase() used to, against records.dumps() over records.
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import records  # noqa: E402
+from records import ProductRecord  # noqa: E402
+
+_BRANDS = ["Samsung", "Apple", "Redmi", "Realme", "OnePlus", "Vivo", "Motorola", "POCO"]
+_TEXTS = ["Camera is amazing and battery lasts a full day, very happy with it.",
+          "Heats up while gaming and the speaker is too low. Not worth the price.",
+          "Display is very bright, performance is smooth, value for money.",
+          "Average product, charging is quick but photos are blurry at night."]
+
+
+def _synthetic_products(n: int, seed: int = 7) -> list[dict]:
+    rnd = random.Random(seed)
+    products = []
+    for i in range(n):
+        products.append({
+            "platform": rnd.choice(["flipkart", "amazon"]),
+            "title": f"{rnd.choice(_BRANDS)} Model {i} 5G (Black, 8GB RAM, 128GB Storage)",
+            "price": f"₹{rnd.randint(6, 150) * 1000 - 1:,}",
+            "rating": round(rnd.uniform(3.0, 4.8), 1),
+            "brand": rnd.choice(_BRANDS),
+            "image": f"https://rukminim2.flixcart.com/image/416/416/{i:08x}.jpeg",
+            "ram": "8 GB", "storage": "128 GB", "processor": "Snapdragon 7s Gen 2",
+            "camera": "50MP", "battery": "5000 mAh", "display": "6.7 inch",
+            "category_ratings": {"Camera": 4.1, "Battery": 4.4, "Display": 4.3, "Design": 4.0},
+            "reviews": [
+                {"rating": rnd.randint(1, 5), "text": rnd.choice(_TEXTS), "sentiment": rnd.uniform(-1, 1)}
+                for _ in range(10)
+            ],
+            "ai_score": rnd.randint(30, 95), "ai_verdict": "👍 Good Buy",
+            "ai_reasons": ["⭐ Good rating (4.2/5)", "💬 Mostly positive reviews (80% positive)"],
+            "ai_breakdown": {"rating": 33, "sentiment": 24, "categories": 14, "specs": 10},
+        })
+    return products
+
+
+def _retained(build) -> tuple[object, int]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return obj, size
+
+
+def _timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=20000)
+    args = parser.parse_args()
+
+    # Each side builds its own catalogue so no strings are shared between them
+    dicts, dict_bytes = _retained(lambda: _synthetic_products(args.products))
+    recs, rec_bytes = _retained(
+        lambda: [ProductRecord.from_dict(p) for p in _synthetic_products(args.products)]
+    )
+
+    print(f"  → {args.products:,} products, 10 reviews each "
+          f"(serializer: {'orjson' if records.orjson else 'stdlib json'})")
+    print(f"  dicts   : {dict_bytes / 2**20:7.1f} MiB")
+    print(f"  records : {rec_bytes / 2**20:7.1f} MiB  ({1 - rec_bytes / dict_bytes:.0%} smaller)")
+
+    t_dict = _timed(lambda: json.dumps(dicts).encode())
+    t_rec = _timed(lambda: records.dumps(recs))
+    print(f"  json.dumps(dicts)      : {t_dict * 1000:7.1f} ms")
+    print(f"  records.dumps(records) : {t_rec * 1000:7.1f} ms  ({t_dict / t_rec:.1f}x faster)")
+
+    row_fields = ("category_ratings", "ai_reasons", "ai_breakdown")
+    t_row_dict = _timed(lambda: [[json.dumps(p[f]) for f in row_fields] for p in dicts])
+    t_row_rec = _timed(lambda: [[records.dumps(p[f]).decode() for f in row_fields] for p in recs])
+    print(f"  row JSON columns (json)    : {t_row_dict * 1000:7.1f} ms")
+    print(f"  row JSON columns (records) : {t_row_rec * 1000:7.1f} ms  ({t_row_dict / t_row_rec:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Sentiment engine throughput in reviews/sec.
+Run: python benchmarks/bench_sentiment.py [--reviews 50000] [--workers N]
+
+Reports cold (uncached) throughput on a single core and across N worker
+processes, then warm throughput when every text is served from the cache.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sentiment import SentimentEngine  # noqa: E402
+
+_OPENERS = ["Great phone", "Not worth it", "Decent buy", "Worst purchase", "Value for money",
+            "Very happy with this", "Disappointed", "Superb device", "Average product"]
+_CLAUSES = ["camera is amazing", "battery drains fast", "display is very bright",
+            "performance is smooth", "heats up while gaming", "sound is too low",
+            "build quality feels premium", "screen is not sharp", "charging is quick",
+            "photos are blurry at night", "no lag at all", "speaker is loud and clear"]
+
+
+def _synthetic_reviews(n: int, seed: int = 7) -> list[str]:
+    rnd = random.Random(seed)
+    reviews = []
+    for i in range(n):
+        clauses = rnd.sample(_CLAUSES, rnd.randint(2, 4))
+        joiner = rnd.choice([", ", " but ", ". ", " and "])
+        reviews.append(f"{rnd.choice(_OPENERS)}! {joiner.join(clauses).capitalize()}. Order #{i}")
+    return reviews
+
+
+def _run(engine: SentimentEngine, texts: list[str]) -> float:
+    start = time.perf_counter()
+    engine.score_batch(texts)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reviews", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    texts = _synthetic_reviews(args.reviews)
+    print(f"Scoring {len(texts):,} synthetic reviews ({os.cpu_count()} CPUs visible)\n")
+
+    single = SentimentEngine(workers=1, cache_size=len(texts))
+    print(f"  single core, cold : {_run(single, texts):>12,.0f} reviews/sec")
+    print(f"  single core, warm : {_run(single, texts):>12,.0f} reviews/sec")
+
+    multi = SentimentEngine(workers=args.workers, cache_size=len(texts), parallel_threshold=0)
+    try:
+        _run(multi, texts[:args.workers * 10])  # spin up the process pool
+        multi.clear()
+        label = f"{args.workers} workers, cold"
+        print(f"  {label:<18}: {_run(multi, texts):>12,.0f} reviews/sec")
+    finally:
+        multi.close()
+
+
+if __name__ == "__main__":
+    main()
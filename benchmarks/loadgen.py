@@ -0,0 +1,110 @@
+"""
+Open-loop load generator for /api/compare.
+Run: python benchmarks/loadgen.py [--base http://127.0.0.1:5000] [--rps 5] [--duration 30]
+         [--products 50] [--timeout 30] [--mode both|flipkart|amazon] [--deep-reviews]
+
+Requests are issued on a fixed schedule (one every 1/--rps seconds) whatever
+the response times, so a slow server shows up as latency rather than as a
+lower request rate. Product URLs cycle through --products synthetic
+phones, which benchmarks/stub_marketplace.py serves for both marketplaces —
+start the app with PRICEHAWK_UPSTREAM pointing at the stub.
+Reports the achieved issue rate, throughput, latency percentiles, status codes and how many
+responses came back partial (stages skipped by the request deadline).
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _urls(i: int) -> tuple[str, str]:
+    slug = f"stubphone-{i}-5g"
+    return (f"https://www.flipkart.com/{slug}/p/itm{i:012x}",
+            f"https://www.amazon.in/{slug}/dp/B0{i:08d}")
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    idx = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base", default="http://127.0.0.1:5000")
+    parser.add_argument("--rps", type=float, default=5.0)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=None, help="?timeout= sent to /api/compare")
+    parser.add_argument("--mode", choices=("both", "flipkart", "amazon"), default="both")
+    parser.add_argument("--deep-reviews", action="store_true")
+    parser.add_argument("--max-inflight", type=int, default=256)
+    args = parser.parse_args()
+
+    lock = threading.Lock()
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    partial = 0
+
+    def one(i: int) -> None:
+        nonlocal partial
+        fk, az = _urls(i % args.products)
+        params = {}
+        if args.mode in ("both", "flipkart"):
+            params["flipkart_url"] = fk
+        if args.mode in ("both", "amazon"):
+            params["amazon_url"] = az
+        if args.timeout:
+            params["timeout"] = args.timeout
+        if args.deep_reviews:
+            params["deep_reviews"] = "1"
+        url = f"{args.base}/api/compare?{urllib.parse.urlencode(params)}"
+
+        t0 = time.perf_counter()
+        skipped = False
+        try:
+            with urllib.request.urlopen(url, timeout=600) as resp:
+                body = json.loads(resp.read())
+                status = resp.status
+            skipped = bool((body.get("deadline") or {}).get("skipped"))
+        except urllib.error.HTTPError as exc:
+            status = exc.code
+        except Exception as exc:
+            status = type(exc).__name__
+        elapsed = time.perf_counter() - t0
+        with lock:
+            latencies.append(elapsed)
+            statuses[status] += 1
+            partial += skipped
+
+    total = int(args.rps * args.duration)
+    print(f"  → {total} requests at {args.rps:g} RPS against {args.base} ({args.mode})")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.max_inflight) as pool:
+        for i in range(total):
+            delay = start + i / args.rps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(one, i)
+        issued = time.perf_counter() - start
+    drained = time.perf_counter() - start
+
+    lat = sorted(latencies)
+    print(f"\n  issued       : {(total - 1) / issued if issued else 0:.2f} RPS over {issued:.1f}s (last response at {drained:.1f}s)")
+    print(f"  throughput   : {len(lat) / drained:.2f} responses/s")
+    for q in (50, 90, 95, 99):
+        print(f"  p{q:<11}: {_percentile(lat, q) * 1000:8.0f} ms")
+    print(f"  max          : {lat[-1] * 1000 if lat else float('nan'):8.0f} ms")
+    print(f"  statuses     : {dict(statuses)}")
+    print(f"  partial      : {partial} (deadline skipped a stage)")
+
+
+if __name__ == "__main__":
+    main()
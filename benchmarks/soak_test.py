@@ -0,0 +1,146 @@
+"""
+Soak test: thousands of offline extractions, reporting memory growth.
+Run: python benchmarks/soak_test.py [--iterations 5000] [--report-every 500] [--max-growth-mb 20]
+
+Cycles through synthetic Flipkart HTML, Flipkart in-page payload, Amazon
+HTML and review-listing pages, running the same steps as a live request
+(extract → analyse_reviews → ProductRecord → calculate_ai_recommendation)
+with no network or browser. RSS is sampled every --report-every
+iterations; growth is measured from the end of a 10% warm-up, so caches
+filling up (sentiment LRU over a fixed review pool, selector stats) are
+not counted as leaks.
+Exits with status 1 when growth exceeds --max-growth-mb.
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+# Keep the soak run's index/selector databases out of the real data dir
+os.environ.setdefault("PRICEHAWK_DATA_DIR", tempfile.mkdtemp(prefix="pricehawk-soak-"))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import app  # noqa: E402
+from memory_guard import rss_mb  # noqa: E402
+from records import ProductRecord  # noqa: E402
+from sentiment import analyse_reviews, get_engine  # noqa: E402
+
+_WORDS = ("camera battery display screen phone quality good excellent build performance fast "
+          "value money happy smooth bright lag heating charging speaker sound design premium "
+          "price worth gaming selfie night photo video backup not very too").split()
+
+
+_POOL_RND = random.Random(5)
+# A fixed pool: the sentiment engine's LRU cache saturates during warm-up
+# instead of growing for the whole run and reading as a leak
+_REVIEW_POOL = [" ".join(_POOL_RND.choice(_WORDS) for _ in range(_POOL_RND.randint(10, 50)))
+                for _ in range(2_000)]
+
+
+def _review(rnd: random.Random) -> str:
+    return rnd.choice(_REVIEW_POOL)
+
+
+def _flipkart_html(rnd: random.Random, i: int) -> str:
+    ld = {"@type": "Product", "name": f"Phone {i} 5G (Blue, 128 GB)", "offers": {"price": str(rnd.randint(8, 90) * 1000)},
+          "aggregateRating": {"ratingValue": str(round(rnd.uniform(3, 4.8), 1))}, "brand": {"name": "Brand"}}
+    cards = "".join(
+        f'<div class="t-ZTKy"><div class="_11pzQk">{rnd.randint(1, 5)}</div>'
+        f'<div class="row">{_review(rnd)}</div><p>Certified Buyer</p></div>'
+        for _ in range(12)
+    )
+    filler = "".join(f"<div><div><span>spec row {j}</span></div></div>" for j in range(rnd.randint(100, 400)))
+    return (f'<html><head><title>Phone {i} | Flipkart</title><script type="application/ld+json">{json.dumps(ld)}'
+            f'</script></head><body><div class="Nx9bqj">₹{rnd.randint(8, 90)},999</div>'
+            f"<li>8 GB RAM | 128 GB ROM</li><li>6000 mAh Battery</li>"
+            f'<div class="_2x1Yo4">Camera 4.2 Battery 4.6</div>{cards}{filler}</body></html>')
+
+
+def _flipkart_payload(rnd: random.Random, i: int) -> dict:
+    return {
+        "meta": {"og:title": f"Phone {i} - Buy Online"},
+        "prices": {"Nx9bqj": f"₹{rnd.randint(8, 90)},999"},
+        "ratings": {"XQDdHH": str(round(rnd.uniform(3, 4.8), 1))},
+        "review_cards": [{"rating": str(rnd.randint(1, 5)), "body": _review(rnd)} for _ in range(10)],
+        "text": "8 GB RAM | 128 GB ROM 5000 mAh " + _review(rnd) * 20,
+    }
+
+
+def _amazon_html(rnd: random.Random, i: int) -> str:
+    cards = "".join(
+        f'<div data-hook="review"><i class="review-rating"><span class="a-icon-alt">{rnd.randint(1, 5)}.0 out of 5 stars'
+        f'</span></i><span data-hook="review-body"><span>{_review(rnd)}</span></span></div>'
+        for _ in range(10)
+    )
+    filler = "".join(f"<div><div><span>row {j}</span></div></div>" for j in range(rnd.randint(100, 400)))
+    return (f'<html><body><span id="productTitle">Phone {i} (Black, 8GB RAM, 128GB Storage)</span>'
+            f'<span class="a-price-whole">{rnd.randint(8, 90)},999.</span>'
+            f'<span class="a-icon-alt">4.1 out of 5 stars</span>{cards}{filler}</body></html>')
+
+
+def _one(i: int, rnd: random.Random) -> None:
+    kind = i % 4
+    if kind == 0:
+        data = app.extract_flipkart(_flipkart_html(rnd, i))
+    elif kind == 1:
+        data = app.extract_flipkart_payload(_flipkart_payload(rnd, i))
+    elif kind == 2:
+        data = app.extract_amazon(_amazon_html(rnd, i))
+    else:
+        data = {"platform": "amazon", "title": f"Phone {i}", "price": "₹9,999",
+                "reviews": list(app._iter_page_reviews(_amazon_html(rnd, i), "amazon"))}
+    analyse_reviews(data)
+    record = ProductRecord.from_dict(data)
+    record.update(app.calculate_ai_recommendation(record))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=5_000)
+    parser.add_argument("--report-every", type=int, default=500)
+    parser.add_argument("--max-growth-mb", type=float, default=20.0)
+    args = parser.parse_args()
+
+    rnd = random.Random(3)
+    warmup = max(1, args.iterations // 10)
+    baseline = None
+    start = time.perf_counter()
+    print(f"  → {args.iterations:,} extractions, RSS at start {rss_mb():.1f} MiB")
+
+    for i in range(1, args.iterations + 1):
+        _one(i, rnd)
+        if i == warmup:
+            gc.collect()
+            baseline = rss_mb()
+            print(f"  → warm-up done at {i:,}: baseline {baseline:.1f} MiB")
+        if i % args.report_every == 0:
+            rss = rss_mb()
+            rate = i / (time.perf_counter() - start)
+            growth = f"{rss - baseline:+.1f} MiB" if baseline is not None else "warming up"
+            print(f"  {i:>7,}  RSS {rss:7.1f} MiB  ({growth})  {rate:,.0f} extractions/s")
+
+    gc.collect()
+    final = rss_mb()
+    growth = final - baseline
+    live_soups = sum(1 for o in gc.get_objects() if isinstance(o, BeautifulSoup))
+    print(f"\n  RSS growth after warm-up : {growth:+.1f} MiB "
+          f"({growth / max(1, args.iterations - warmup) * 1000:+.2f} MiB per 1,000)")
+    print(f"  live BeautifulSoup trees : {live_soups}")
+    print(f"  gc.garbage               : {len(gc.garbage)}")
+    print(f"  open browsers            : {app._live_browsers}")
+    print(f"  sentiment cache entries  : {len(get_engine()._cache):,}")
+    if growth > args.max_growth_mb:
+        print(f"  ❌ growth above {args.max_growth_mb} MiB")
+        sys.exit(1)
+    print("  ✅ memory bounded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Local stand-in for flipkart.com / amazon.in, for load and regression testing.
+Run: python benchmarks/stub_marketplace.py [--port 8900] [--pages DIR]
+         [--latency-ms 150] [--jitter-ms 50] [--block-rate 0.05] [--tiny-rate 0.02]
+         [--require-cookie] [--review-pages 3]
+     python benchmarks/stub_marketplace.py --record URL [URL ...] [--pages DIR]
+
+Point the app at it with PRICEHAWK_UPSTREAM=http://127.0.0.1:8900: every
+scraper request for https://<host>/<path> then arrives here as
+/<host>/<path>. Served:
+  /www.amazon.in/                  homepage, sets the session-id cookie
+  /<amazon host>/…/dp/<ASIN>       product page
+  /<amazon host>/product-reviews/… review listing (?pageNumber=N)
+  /<flipkart host>/…/p/<itm>       product page (www. and m.)
+  /<flipkart host>/…/product-reviews/… review listing (?page=N)
+  /dl.flipkart.com/s/<N>, /amzn.in/d/<N>  share links: 301 to stub phone N
+  /__stats                         request counters (JSON)
+
+Pages come from --pages DIR when recorded there (--record saves live pages
+with the app's own fetchers), otherwise they are synthesised from the URL
+slug, deterministically, so the same URL always yields the same product
+and the two marketplaces' pages for one slug describe the same phone
+(slug-less Amazon /dp/B0<N> URLs map to the slug stubphone-<N>-5g).
+--block-rate answers 403, --tiny-rate a 200 "blocked" page under the
+fetchers' 10 kB floor; --require-cookie 403s Amazon product pages fetched
+without the homepage cookie.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+_WORDS = ("camera battery display screen phone quality good excellent build performance fast "
+          "value money happy smooth bright lag heating charging speaker sound design premium "
+          "price worth gaming selfie night photo video backup not very too").split()
+
+_BLOCKED_PAGE = b"<html><head><title>Access Denied</title></head><body>Request blocked.</body></html>"
+
+
+def _page_key(path: str) -> str:
+    return hashlib.sha1(path.encode()).hexdigest()[:16]
+
+
+def _product(slug: str) -> dict:
+    """The synthetic product behind a URL slug — identical on both marketplaces."""
+    rnd = random.Random(slug)
+    name = " ".join(w.capitalize() for w in re.split(r"[-_]+", slug) if w) or "Stub Phone"
+    ram, storage = rnd.choice([(4, 64), (6, 128), (8, 128), (8, 256), (12, 256)])
+    return {
+        "title": f"{name} ({rnd.choice(['Black', 'Blue', 'Green'])}, {ram}GB RAM, {storage}GB Storage)",
+        "name": name,
+        "brand": name.split()[0],
+        "price": rnd.randint(8, 90) * 1000 - 1,
+        "rating": round(rnd.uniform(3.2, 4.7), 1),
+        "ram": ram,
+        "storage": storage,
+        "battery": rnd.choice([4500, 5000, 6000]),
+        "seed": rnd.random(),
+    }
+
+
+def _reviews(product: dict, page: int, n: int = 10) -> list[tuple[int, str]]:
+    rnd = random.Random(f"{product['seed']}:{page}")
+    return [(rnd.randint(1, 5), " ".join(rnd.choice(_WORDS) for _ in range(rnd.randint(12, 40))))
+            for _ in range(n)]
+
+
+def _filler(n: int = 300) -> str:
+    # Real product pages are hundreds of kB; keep the stub well above the 10 kB "blocked" floor
+    return "".join(f"<div><div><span>specification row {j}</span></div></div>" for j in range(n))
+
+
+def _flipkart_cards(product: dict, page: int) -> str:
+    return "".join(
+        f'<div class="t-ZTKy"><div class="_11pzQk">{r}</div><div class="row">{text}</div>'
+        f"<p>Certified Buyer</p></div>"
+        for r, text in _reviews(product, page)
+    )
+
+
+def _amazon_cards(product: dict, page: int) -> str:
+    return "".join(
+        f'<div data-hook="review"><i class="review-rating"><span class="a-icon-alt">{r}.0 out of 5 stars'
+        f'</span></i><span data-hook="review-body"><span>{text}</span></span></div>'
+        for r, text in _reviews(product, page)
+    )
+
+
+def flipkart_page(slug: str) -> str:
+    p = _product(slug)
+    ld = {"@type": "Product", "name": p["title"], "brand": {"name": p["brand"]},
+          "offers": {"price": str(p["price"])}, "aggregateRating": {"ratingValue": str(p["rating"])}}
+    return (f"<html><head><title>{p['title']} | Flipkart</title>"
+            f'<script type="application/ld+json">{json.dumps(ld)}</script></head><body>'
+            f'<h1><span class="VU-ZEz">{p["title"]}</span></h1>'
+            f'<div class="Nx9bqj">₹{p["price"]:,}</div><div class="XQDdHH">{p["rating"]}</div>'
+            f"<li>{p['ram']} GB RAM | {p['storage']} GB ROM</li><li>{p['battery']} mAh Battery</li>"
+            f"{_flipkart_cards(p, 0)}{_filler()}</body></html>")
+
+
+def flipkart_reviews_page(slug: str, page: int, pages: int) -> str:
+    cards = _flipkart_cards(_product(slug), page) if page <= pages else ""
+    return f"<html><body>{cards}{_filler(50)}</body></html>"
+
+
+def amazon_page(slug: str) -> str:
+    p = _product(slug)
+    return (f"<html><head><title>Amazon.in: {p['title']}</title></head><body>"
+            f'<span id="productTitle">{p["title"]}</span>'
+            f'<span class="a-price-whole">{p["price"]:,}.</span>'
+            f'<span class="a-icon-alt">{p["rating"]} out of 5 stars</span>'
+            f'<a id="bylineInfo">Visit the {p["brand"]} Store</a>'
+            f"<table id=\"productDetails_techSpec_section_1\"><tr><th>RAM</th><td>{p['ram']} GB</td></tr>"
+            f"<tr><th>Battery Power Rating</th><td>{p['battery']} Milliamp Hours</td></tr></table>"
+            f"{_amazon_cards(p, 0)}{_filler()}</body></html>")
+
+
+def amazon_reviews_page(slug: str, page: int, pages: int) -> str:
+    cards = _amazon_cards(_product(slug), page) if page <= pages else ""
+    return f"<html><body>{cards}{_filler(50)}</body></html>"
+
+
+class StubMarketplace:
+    def __init__(self, args):
+        self.args = args
+        self.rnd = random.Random(args.seed)
+        self.lock = threading.Lock()
+        self.counts: dict[str, int] = {}
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def recorded(self, host: str, path: str) -> bytes | None:
+        if not self.args.pages:
+            return None
+        for name in (_page_key(path), "default"):
+            fp = os.path.join(self.args.pages, host, f"{name}.html")
+            if os.path.exists(fp):
+                with open(fp, "rb") as fh:
+                    return fh.read()
+        return None
+
+    def respond(self, host: str, path: str, cookies: str) -> tuple[int, bytes, dict]:
+        """(status, body, extra headers) for a rewritten marketplace request."""
+        a = self.args
+        parts = urlsplit(path)
+        query = parse_qs(parts.query)
+        segments = [s for s in parts.path.split("/") if s]
+        slug = segments[0] if segments else ""
+        if slug == "dp" and len(segments) > 1 and re.fullmatch(r"B0\d{8}", segments[1]):
+            slug = f"stubphone-{int(segments[1][2:])}-5g"
+
+        if len(segments) == 2 and ((host == "dl.flipkart.com" and slug == "s") or (host == "amzn.in" and slug == "d")):
+            self.count("short_link")
+            n = int(segments[1]) if segments[1].isdigit() else 0
+            target = (f"https://www.flipkart.com/stubphone-{n}-5g/p/itm{n:012x}" if host == "dl.flipkart.com"
+                      else f"https://www.amazon.in/stubphone-{n}-5g/dp/B0{n:08d}")
+            return 301, b"", {"Location": target}
+
+        if "amazon." in host and not segments:
+            self.count("amazon_home")
+            return 200, b"<html><body>Amazon.in</body></html>", {
+                "Set-Cookie": f"session-id={self.rnd.randint(10**8, 10**9)}; Path=/"}
+
+        with self.lock:
+            roll = self.rnd.random()
+        if roll < a.block_rate:
+            self.count("blocked_403")
+            return 403, _BLOCKED_PAGE, {}
+        if roll < a.block_rate + a.tiny_rate:
+            self.count("blocked_tiny")
+            return 200, _BLOCKED_PAGE, {}
+
+        body = self.recorded(host, path)
+        if "amazon." in host:
+            if a.require_cookie and "session-id=" not in cookies:
+                self.count("amazon_no_cookie")
+                return 403, _BLOCKED_PAGE, {}
+            if "product-reviews" in segments:
+                self.count("amazon_reviews")
+                page = int(query.get("pageNumber", ["1"])[0])
+                asin = segments[segments.index("product-reviews") + 1]
+                return 200, body or amazon_reviews_page(asin, page, a.review_pages).encode(), {}
+            if "dp" in segments:
+                self.count("amazon_product")
+                return 200, body or amazon_page(slug).encode(), {}
+        elif "flipkart." in host:
+            if "product-reviews" in segments:
+                self.count("flipkart_reviews")
+                page = int(query.get("page", ["1"])[0])
+                return 200, body or flipkart_reviews_page(slug, page, a.review_pages).encode(), {}
+            if "p" in segments:
+                self.count("flipkart_mobile" if host.startswith("m.") else "flipkart_product")
+                return 200, body or flipkart_page(slug).encode(), {}
+        self.count("not_found")
+        return 404, b"<html><body>Not found</body></html>", {}
+
+
+def _handler(stub: StubMarketplace):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if self.path == "/__stats":
+                with stub.lock:
+                    self._send(200, json.dumps(stub.counts).encode(), {}, "application/json")
+                return
+            host, _, rest = self.path.lstrip("/").partition("/")
+            a = stub.args
+            delay = max(0.0, a.latency_ms + random.uniform(-a.jitter_ms, a.jitter_ms)) / 1000
+            time.sleep(delay)
+            status, body, headers = stub.respond(host.lower(), "/" + rest, self.headers.get("Cookie", ""))
+            self._send(status, body, headers, "text/html; charset=utf-8")
+
+        def do_HEAD(self):
+            host, _, rest = self.path.lstrip("/").partition("/")
+            status, _, headers = stub.respond(host.lower(), "/" + rest, self.headers.get("Cookie", ""))
+            self.send_response(status)
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def _send(self, status, body, headers, ctype):
+            self.send_response(status)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            if stub.args.verbose:
+                super().log_message(fmt, *args)
+
+    return Handler
+
+
+def record(urls: list[str], pages_dir: str) -> None:
+    """Fetch live pages with the app's fetchers and save them for --pages."""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    import app
+
+    for url in urls:
+        platform = app._detect_platform(url)
+        if not platform:
+            print(f"  ❌ Not a Flipkart/Amazon URL: {url}")
+            continue
+        html = app.fetch_page(url, platform)
+        if not html:
+            print(f"  ❌ Could not fetch {url}")
+            continue
+        parts = urlsplit(app._clean_url(url))
+        out_dir = os.path.join(pages_dir, parts.netloc)
+        os.makedirs(out_dir, exist_ok=True)
+        fp = os.path.join(out_dir, f"{_page_key(parts.path)}.html")
+        with open(fp, "w", encoding="utf-8") as fh:
+            fh.write(html)
+        print(f"  ✅ {url[:70]} → {fp}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--pages", help="directory of recorded pages (<host>/<key>.html, <host>/default.html)")
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--block-rate", type=float, default=0.0, help="fraction of requests answered 403")
+    parser.add_argument("--tiny-rate", type=float, default=0.0, help="fraction answered with a tiny blocked page")
+    parser.add_argument("--require-cookie", action="store_true", help="403 Amazon pages without the homepage cookie")
+    parser.add_argument("--review-pages", type=int, default=3, help="review-listing pages per product")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--record", nargs="+", metavar="URL", help="save live pages into --pages and exit")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, args.pages or "stub_pages")
+        return
+
+    server = ThreadingHTTPServer((args.host, args.port), _handler(StubMarketplace(args)))
+    server.daemon_threads = True
+    print(f"🦅 Stub marketplace on http://{args.host}:{args.port} "
+          f"(latency {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms, "
+          f"403 {args.block_rate:.0%}, tiny {args.tiny_rate:.0%})")
+    print(f"  → run the app with PRICEHAWK_UPSTREAM=http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
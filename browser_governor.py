@@ -0,0 +1,203 @@
+"""
+🦅 PRICEHAWK PRO - BROWSER GOVERNOR
+Caps concurrent Chromium instances host-wide and queues the excess.
+
+Slots are lock files under PRICEHAWK_DATA_DIR/browser_slots; a browser may
+only run while its caller holds an exclusive flock on one, so the cap holds
+across every worker process on the host (on platforms without fcntl it
+falls back to a per-process cap). Waiters inside a process are served
+earliest-deadline-first, and a waiter is dropped as soon as the expected
+queue wait plus a typical browser fetch would overrun its deadline —
+it would have timed out anyway, and leaving now frees the client sooner.
+
+Each Chromium is launched with a capped V8 heap and a single renderer
+process, and its whole process tree (found through a marker switch on the
+browser's command line) can be measured against PRICEHAWK_BROWSER_MAX_MB.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from product_index import DATA_DIR
+
+SLOTS = int(os.environ.get("PRICEHAWK_BROWSER_SLOTS", "2"))
+JS_HEAP_MB = int(os.environ.get("PRICEHAWK_BROWSER_JS_HEAP_MB", "512"))
+MAX_BROWSER_MB = float(os.environ.get("PRICEHAWK_BROWSER_MAX_MB", "1024"))
+
+
+class BrowserQueueTimeout(Exception):
+    """A browser slot could not be had in time for the caller's deadline."""
+
+
+class BrowserMemoryExceeded(Exception):
+    """A Chromium process tree grew past MAX_BROWSER_MB."""
+
+
+def chromium_args() -> tuple[list[str], str]:
+    """Memory-capped launch switches plus the marker identifying this browser."""
+    marker = uuid.uuid4().hex
+    return [
+        f"--js-flags=--max-old-space-size={JS_HEAP_MB}",
+        "--renderer-process-limit=1",
+        "--disable-gpu",
+        "--disable-extensions",
+        f"--pricehawk-browser={marker}",  # unknown switches are ignored by Chromium
+    ], marker
+
+
+def browser_rss_mb(marker: str) -> float | None:
+    """RSS (MiB) of the browser launched with `marker` and all its children; None without /proc."""
+    children: dict[int, list[int]] = {}
+    root = None
+    try:
+        pids = [int(p) for p in os.listdir("/proc") if p.isdigit()]
+    except OSError:
+        return None
+    rss = {}
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as fh:
+                stat = fh.read()
+            # comm may contain spaces; fields after it are fixed
+            fields = stat[stat.rindex(")") + 2:].split()
+            children.setdefault(int(fields[1]), []).append(pid)
+            rss[pid] = int(fields[21])
+            if root is None:
+                with open(f"/proc/{pid}/cmdline", "rb") as fh:
+                    if marker.encode() in fh.read():
+                        root = pid
+        except (OSError, ValueError, IndexError):
+            continue
+    if root is None:
+        return None
+    total, stack = 0, [root]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(children.get(pid, ()))
+    return total * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def check_browser_memory(marker: str) -> None:
+    """Raise BrowserMemoryExceeded when the marked browser is over MAX_BROWSER_MB."""
+    used = browser_rss_mb(marker)
+    if used is not None and used > MAX_BROWSER_MB:
+        raise BrowserMemoryExceeded(f"Chromium using {used:.0f} MiB (limit {MAX_BROWSER_MB:.0f} MiB)")
+
+
+class BrowserGovernor:
+    def __init__(self, slots: int = SLOTS, lock_dir: str | None = None, initial_hold: float = 15.0):
+        self.slots = max(1, slots)
+        self.lock_dir = lock_dir or os.path.join(DATA_DIR, "browser_slots")
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self._cond = threading.Condition()
+        self._waiting: list = []           # heap of (deadline, seq)
+        self._seq = itertools.count()
+        self._local_free = self.slots      # used only without fcntl
+        self.avg_hold = initial_hold       # EWMA of how long a slot is held (s)
+        self.granted = self.dropped = 0
+        self.total_wait = 0.0
+        self.active = 0
+
+    # ── slot files ────────────────────────────────────────────────────────────
+
+    def _try_acquire(self):
+        """A held slot handle, or None if all slots are busy."""
+        if fcntl is None:
+            if self._local_free:
+                self._local_free -= 1
+                return -1
+            return None
+        for i in range(self.slots):
+            fd = os.open(os.path.join(self.lock_dir, f"slot-{i}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except OSError:
+                os.close(fd)
+        return None
+
+    def _release(self, fd) -> None:
+        if fcntl is None:
+            with self._cond:
+                self._local_free += 1
+            return
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    # ── queue ─────────────────────────────────────────────────────────────────
+
+    @contextmanager
+    def slot(self, deadline: float):
+        """
+        Hold a browser slot for the duration of the with-block and yield the
+        seconds spent queueing. `deadline` is a time.monotonic() timestamp.
+        Raises BrowserQueueTimeout instead of waiting past any hope.
+        """
+        start = time.monotonic()
+        ticket = (deadline, next(self._seq))
+        fd = None
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    if self._waiting[0] == ticket:
+                        fd = self._try_acquire()
+                        if fd is not None:
+                            break
+                    now = time.monotonic()
+                    ahead = sum(1 for t in self._waiting if t < ticket)
+                    expected_done = now + self.avg_hold * (ahead + 1) / self.slots + self.avg_hold
+                    if expected_done > deadline:
+                        self.dropped += 1
+                        raise BrowserQueueTimeout(
+                            f"browser queue: {ahead} ahead, ~{expected_done - now:.0f}s needed, "
+                            f"{max(0.0, deadline - now):.0f}s left"
+                        )
+                    self._cond.wait(timeout=0.2)  # also polls for slots freed by other processes
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+            waited = time.monotonic() - start
+            self.granted += 1
+            self.total_wait += waited
+            self.active += 1
+
+        held_from = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self._release(fd)
+            with self._cond:
+                self.active -= 1
+                self.avg_hold += 0.2 * ((time.monotonic() - held_from) - self.avg_hold)
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "slots": self.slots,
+                "host_wide": fcntl is not None,
+                "active": self.active,
+                "queued": len(self._waiting),
+                "granted": self.granted,
+                "dropped": self.dropped,
+                "avg_wait_ms": round(self.total_wait / self.granted * 1000, 1) if self.granted else None,
+                "avg_hold_s": round(self.avg_hold, 2),
+                "js_heap_mb": JS_HEAP_MB,
+                "max_browser_mb": MAX_BROWSER_MB,
+            }
@@ -0,0 +1,165 @@
+"""
+🦅 PRICEHAWK PRO - CHANGE DETECTION
+Remembers what each product looked like the last time it was scraped.
+
+Every save stores the product's fingerprint (a digest of its price, rating,
+specs, category ratings and review ids — see app.product_fingerprint) with
+the score it produced. When a re-scrape comes back with the same
+fingerprint under the same scoring model, the stored score is reused and
+the product is only touched (last_seen) instead of rescored and rewritten.
+When it differs, the price/rating/review deltas against the previous
+scrape are logged as change events (price_drop, price_rise,
+rating_change, new_reviews); record() deletes events older than
+KEEP_EVENTS at most once every PRUNE_EVERY seconds.
+State lives in SQLite under PRICEHAWK_DATA_DIR and is shared by every
+process on the host.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from product_index import DATA_DIR
+from records import format_price
+
+# The scoring output reused for an unchanged product
+SCORE_FIELDS = ("ai_score", "ai_verdict", "ai_reasons", "ai_breakdown", "ai_model_version")
+KEEP_EVENTS = 90 * 24 * 3600
+PRUNE_EVERY = 3600
+
+
+class ChangeTracker:
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(DATA_DIR, "changes.db")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """CREATE TABLE IF NOT EXISTS fingerprints (
+                   id TEXT PRIMARY KEY, url TEXT, platform TEXT, fingerprint TEXT,
+                   price_paise INTEGER, rating REAL, review_count INTEGER, score TEXT,
+                   first_seen REAL, last_seen REAL, changed_at REAL);
+               CREATE TABLE IF NOT EXISTS change_events (
+                   seq INTEGER PRIMARY KEY AUTOINCREMENT, product_id TEXT, url TEXT,
+                   platform TEXT, kind TEXT, old TEXT, new TEXT, at REAL);
+               CREATE INDEX IF NOT EXISTS change_events_at ON change_events (at);"""
+        )
+        self.unchanged = self.changed = self.new = 0
+        self._pruned = 0.0
+
+    def lookup(self, pid: str, fingerprint: str, model_version: str) -> dict | None:
+        """
+        The stored score fields when `pid` was last seen with this fingerprint
+        and scored by this model version, else None (score and save it).
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fingerprint, score FROM fingerprints WHERE id = ?", (pid,)
+            ).fetchone()
+        if row is None or row[0] != fingerprint or not row[1]:
+            return None
+        score = json.loads(row[1])
+        if score.get("ai_model_version") != model_version:
+            return None
+        return score
+
+    def touch(self, pid: str) -> None:
+        """An unchanged re-scrape: only last_seen moves."""
+        with self._lock:
+            self._db.execute("UPDATE fingerprints SET last_seen = ? WHERE id = ?", (time.time(), pid))
+            self.unchanged += 1
+
+    def record(self, pid: str, url: str, data, fingerprint: str) -> list[dict]:
+        """
+        Store a freshly scored product's fingerprint and score; returns the
+        change events against its previous scrape (none for a new product).
+        """
+        now = time.time()
+        price = data.get("price_paise")
+        rating = data.get("rating")
+        summary = data.get("review_summary") or {}
+        reviews = summary.get("count") or len(data.get("reviews") or [])
+        score = json.dumps({k: data.get(k) for k in SCORE_FIELDS})
+        platform = data.get("platform")
+
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                prev = self._db.execute(
+                    "SELECT price_paise, rating, review_count, first_seen FROM fingerprints WHERE id = ?",
+                    (pid,),
+                ).fetchone()
+                events = [] if prev is None else _diff(prev[:3], (price, rating, reviews))
+                self._db.execute(
+                    "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (pid, url, platform, fingerprint, price, rating, reviews, score,
+                     prev[3] if prev else now, now, now),
+                )
+                self._db.executemany(
+                    "INSERT INTO change_events (product_id, url, platform, kind, old, new, at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(pid, url, platform, e["kind"], e["old"], e["new"], now) for e in events],
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            if prev is None:
+                self.new += 1
+            else:
+                self.changed += 1
+        if now - self._pruned >= PRUNE_EVERY:
+            self._pruned = now
+            try:
+                self.prune()
+            except sqlite3.Error as exc:
+                print(f"  ⚠️  Change event prune failed: {exc}")
+        return events
+
+    def events(self, since: float | None = None, kind: str | None = None,
+               platform: str | None = None, limit: int = 100) -> list[dict]:
+        """Change events, newest first."""
+        query, params = "SELECT seq, product_id, url, platform, kind, old, new, at FROM change_events WHERE 1=1", []
+        if since is not None:
+            query += " AND at >= ?"
+            params.append(since)
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        if platform:
+            query += " AND platform = ?"
+            params.append(platform)
+        query += " ORDER BY seq DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        keys = ("seq", "product_id", "url", "platform", "kind", "old", "new", "at")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def prune(self, older_than: float = KEEP_EVENTS) -> int:
+        """Delete change events older than `older_than` seconds."""
+        with self._lock:
+            cur = self._db.execute("DELETE FROM change_events WHERE at < ?", (time.time() - older_than,))
+            return cur.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            tracked = self._db.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+        return {"tracked": tracked, "unchanged": self.unchanged, "changed": self.changed, "new": self.new}
+
+
+def _diff(old: tuple, new: tuple) -> list[dict]:
+    """Events between (price_paise, rating, review_count) snapshots."""
+    (old_price, old_rating, old_reviews), (price, rating, reviews) = old, new
+    events = []
+    if old_price and price and price != old_price:
+        events.append({"kind": "price_drop" if price < old_price else "price_rise",
+                       "old": format_price(old_price), "new": format_price(price)})
+    if old_rating is not None and rating is not None and float(rating) != float(old_rating):
+        events.append({"kind": "rating_change", "old": str(old_rating), "new": str(rating)})
+    if old_reviews is not None and reviews and reviews > old_reviews:
+        events.append({"kind": "new_reviews", "old": str(old_reviews), "new": str(reviews)})
+    return events
@@ -0,0 +1,62 @@
+"""
+🦅 PRICEHAWK PRO - REQUEST DEADLINES
+One time budget per request, handed down to every stage that can block.
+
+Each stage asks the Deadline for its timeout instead of using a fixed
+constant: timeout(20) is 20 s while plenty of budget is left and the
+remaining budget once it runs low. Sleeps are clipped the same way, and
+stages that cannot start in time are skipped and listed in `skipped`, so
+the caller can return the best partial result on time.
+A Deadline(None) never expires; with it every stage keeps its old constant.
+"""
+
+import time
+
+MIN_TIMEOUT = 0.05  # never hand out 0: Playwright reads timeout=0 as "wait forever"
+
+
+class Deadline:
+    def __init__(self, seconds: float | None):
+        self.budget = seconds
+        self.started = time.monotonic()
+        self.expires = float("inf") if seconds is None else self.started + seconds
+        self.skipped: list[str] = []
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def expired(self, reserve: float = 0.0) -> bool:
+        """True when less than `reserve` seconds are left."""
+        return self.expires - time.monotonic() <= reserve
+
+    def timeout(self, cap: float) -> float:
+        """A stage's timeout: `cap` seconds, or whatever is left if that is less."""
+        return max(MIN_TIMEOUT, min(cap, self.remaining()))
+
+    def timeout_ms(self, cap: float) -> float:
+        """timeout() in milliseconds, for Playwright."""
+        return self.timeout(cap) * 1000
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(max(0.0, min(seconds, self.remaining())))
+
+    def skip(self, stage: str) -> bool:
+        """
+        True (and the stage recorded as skipped) when there is no time left for it.
+        Usage: `if not deadline.skip("amazon fetch"): ...`.
+        """
+        if not self.expired():
+            return False
+        self.skipped.append(stage)
+        print(f"  ⏱️  Deadline reached — skipping {stage}")
+        return True
+
+    def report(self) -> dict:
+        return {
+            "budget_s": self.budget,
+            "elapsed_ms": round(self.elapsed() * 1000, 1),
+            "skipped": list(self.skipped),
+        }
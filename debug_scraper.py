@@ -1,125 +1,232 @@
 """
-Run this on YOUR machine: python debug_scraper.py
-It will print EXACTLY what HTML classes are available on the page
-so we can fix the selectors precisely.
+Selector diagnostics: how well the extractors' selectors cover a set of pages.
+Run: python debug_scraper.py --pages DIR [URL ...] [--urls FILE] [--save DIR]
+         [--jobs 4] [--fetch-workers 4] [--json report.json] [--fail-under 90]
+
+Pages come from --pages DIR (saved as <host>/<name>.html — the layout
+benchmarks/stub_marketplace.py --record writes, so the same catalogue serves
+both) and/or URLs given on the command line or in --urls FILE (one per
+line), fetched with the app's own fetchers and optionally kept in --save DIR.
+Each page is parsed once, by its marketplace's extractor, in a pool of
+--jobs processes. The selector chains run in probe mode, so every selector of
+every field is tried rather than only the first that hits.
+The report gives, per marketplace and field, how often the field was
+extracted and how often each selector (and the catch-all fallback) matched.
+Selectors that matched no page are marked ✗. Pages missing a title or price
+are listed. With --fail-under PCT the exit status is 1 when title or price
+coverage falls below PCT, for use from cron/CI.
 """
 
-import requests
-from bs4 import BeautifulSoup
-import json, re
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlsplit
 
-# ─── PASTE YOUR PRODUCT URL HERE ───
-TEST_URL = "https://dl.flipkart.com/s/lA8ckNuuuN"
+FIELDS = ("title", "price", "image", "rating", "brand", "ram", "storage", "processor",
+          "camera", "battery", "display", "category_ratings", "reviews")
+REQUIRED_FIELDS = ("title", "price")
 
-headers = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    "Accept-Language": "en-IN,en;q=0.9",
-}
 
-print("=" * 60)
-print("🔍 PriceHawk Scraper Debugger")
-print("=" * 60)
+def _extractors(app) -> dict:
+    return {name: site.parse for name, site in app.SITES.items() if site.parse}
 
-res = requests.get(TEST_URL, headers=headers, timeout=15)
-print(f"✅ Status: {res.status_code}")
-print(f"📄 Page size: {len(res.text):,} chars\n")
 
-soup = BeautifulSoup(res.text, "html.parser")
+def _analyse(item: tuple) -> dict:
+    """Parse one page (in a pool process) and report its field and selector hits."""
+    import app
+    from selector_stats import FALLBACK
 
-# ── 1. JSON-LD (most reliable) ──
-print("─" * 40)
-print("1️⃣  JSON-LD Structured Data:")
-scripts = soup.find_all("script", type="application/ld+json")
-for i, s in enumerate(scripts):
+    source, platform, path, html = item
+    result = {"source": source, "platform": platform}
     try:
-        data = json.loads(s.string or "")
-        items = data if isinstance(data, list) else [data]
-        for item in items:
-            if item.get("@type") in ["Product", "ItemPage"]:
-                print(f"  ✅ FOUND Product JSON-LD!")
-                print(f"  📝 Name:  {item.get('name', 'N/A')}")
-                print(f"  💰 Price: {item.get('offers', {}).get('price', 'N/A')}")
-                print(f"  🖼️  Image: {str(item.get('image', 'N/A'))[:80]}")
-                agg = item.get("aggregateRating", {})
-                print(f"  ⭐ Rating:{agg.get('ratingValue', 'N/A')}")
-    except:
-        pass
-
-# ── 2. Meta tags ──
-print("\n─" * 40)
-print("2️⃣  Meta Tags:")
-og_title = soup.find("meta", {"property": "og:title"})
-og_image = soup.find("meta", {"property": "og:image"})
-og_price = soup.find("meta", {"property": "product:price:amount"})
-print(f"  og:title  = {og_title.get('content', 'NOT FOUND') if og_title else '❌ NOT FOUND'}")
-print(f"  og:image  = {str(og_image.get('content', 'NOT FOUND'))[:80] if og_image else '❌ NOT FOUND'}")
-print(f"  og:price  = {og_price.get('content', 'NOT FOUND') if og_price else '❌ NOT FOUND'}")
-
-# ── 3. Page title ──
-print("\n─" * 40)
-print("3️⃣  Page Title Tag:")
-t = soup.find("title")
-print(f"  <title> = {t.text.strip()[:100] if t else '❌ NOT FOUND'}")
-
-# ── 4. Find ALL elements containing ₹ ──
-print("\n─" * 40)
-print("4️⃣  All elements with ₹ (price candidates):")
-found_prices = []
-for elem in soup.find_all(text=re.compile(r'₹\s*\d')):
-    parent = elem.parent
-    classes = parent.get("class", [])
-    text = str(elem).strip()
-    if len(text) < 30 and classes and text not in found_prices:
-        found_prices.append(text)
-        print(f"  Tag: <{parent.name}> | Class: {classes} | Text: {text}")
-
-if not found_prices:
-    print("  ❌ No ₹ prices found on page!")
-
-# ── 5. Find h1 tags (title candidates) ──
-print("\n─" * 40)
-print("5️⃣  All <h1> and <h2> tags:")
-for tag in soup.find_all(["h1", "h2"]):
-    text = tag.get_text(strip=True)
-    if text and len(text) > 5:
-        print(f"  <{tag.name}> class={tag.get('class', [])} | {text[:80]}")
-
-# ── 6. Find ALL span/div with class containing known patterns ──
-print("\n─" * 40)
-print("6️⃣  Possible title class names (long text divs/spans):")
-for tag in soup.find_all(["span", "div"]):
-    text = tag.get_text(strip=True)
-    classes = tag.get("class", [])
-    if classes and len(text) > 30 and len(text) < 300 and len(classes) == 1:
-        print(f"  <{tag.name}> class={classes} | {text[:80]}")
-
-# ── 7. Images ──
-print("\n─" * 40)
-print("7️⃣  Product images (rukminim CDN):")
-for img in soup.find_all("img"):
-    src = img.get("src", "")
-    if "rukminim" in src or "fk-p-l5p" in src:
-        print(f"  Class: {img.get('class', [])} | {src[:80]}")
-
-# ── 8. Review containers ──
-print("\n─" * 40)
-print("8️⃣  Review containers (any div with review-like text):")
-for div in soup.find_all("div"):
-    text = div.get_text(strip=True)
-    classes = div.get("class", [])
-    # Look for divs that are likely review containers
-    if classes and 50 < len(text) < 500:
-        if any(word in text.lower() for word in ["product", "quality", "good", "bad", "recommend", "love", "hate", "camera", "battery", "screen"]):
-            print(f"  Class: {classes} | {text[:100]}...")
-
-# ── 9. Ratings ──
-print("\n─" * 40)
-print("9️⃣  Rating elements (numbers 1.0-5.0):")
-for elem in soup.find_all(text=re.compile(r'^[1-5]\.\d$')):
-    parent = elem.parent
-    print(f"  <{parent.name}> class={parent.get('class', [])} | {str(elem).strip()}")
-
-print("\n" + "=" * 60)
-print("✅ Debug complete! Share the output above to fix selectors.")
-print("=" * 60)
+        if html is None:
+            with open(path, encoding="utf-8", errors="replace") as fh:
+                html = fh.read()
+        t0 = time.perf_counter()
+        with app.SELECTOR_STATS.probe() as probe:
+            data = _extractors(app)[platform](html)
+        result["ms"] = (time.perf_counter() - t0) * 1000
+    except Exception as exc:
+        result["error"] = f"{type(exc).__name__}: {exc}"
+        return result
+    result["fields"] = {f: bool(data.get(f)) for f in FIELDS}
+    result["reviews"] = len(data.get("reviews") or [])
+    result["chains"] = {field: hits for (_, field), hits in probe.items()}
+    result["fallback_only"] = [
+        field for field, hits in result["chains"].items()
+        if hits.get(FALLBACK) and not any(v for k, v in hits.items() if k != FALLBACK)
+    ]
+    return result
+
+
+def _saved_pages(pages_dir: str, platform_of) -> list[tuple]:
+    """(source, platform, path, None) for every <host>/<name>.html under pages_dir."""
+    items = []
+    for host in sorted(os.listdir(pages_dir)):
+        host_dir = os.path.join(pages_dir, host)
+        if not os.path.isdir(host_dir):
+            continue
+        platform = platform_of(f"https://{host}/")
+        if platform is None:
+            print(f"  ⚠️  Skipping {host_dir}: not a registered marketplace host")
+            continue
+        for name in sorted(os.listdir(host_dir)):
+            if name.endswith(".html"):
+                path = os.path.join(host_dir, name)
+                items.append((path, platform, path, None))
+    return items
+
+
+def _fetch_pages(app, urls: list[str], workers: int, timeout: float, save_dir: str | None) -> list[tuple]:
+    """(url, platform, None, html) for every URL that fetched; failures are reported."""
+    from deadline import Deadline
+
+    def fetch(url: str):
+        url = app._product_url(url, Deadline(10))
+        platform = app._detect_platform(url)
+        if platform not in _extractors(app):
+            print(f"  ❌ No extractor for {url[:70]}")
+            return None
+        try:
+            html = app.fetch_page(url, platform, Deadline(timeout))
+        except Exception as exc:
+            print(f"  ❌ {url[:70]}: {exc}")
+            return None
+        if not html:
+            print(f"  ❌ Could not fetch {url[:70]}")
+            return None
+        if save_dir:
+            parts = urlsplit(app._clean_url(url))
+            out_dir = os.path.join(save_dir, parts.netloc)
+            os.makedirs(out_dir, exist_ok=True)
+            with open(os.path.join(out_dir, f"{hashlib.sha1(parts.path.encode()).hexdigest()[:16]}.html"),
+                      "w", encoding="utf-8") as fh:
+                fh.write(html)
+        return url, platform, None, html
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return [item for item in pool.map(fetch, urls) if item is not None]
+
+
+def _summarise(results: list[dict]) -> dict:
+    """{platform: {pages, errors, parse_ms, fields: {field: {...}}, misses: {...}}}"""
+    report: dict = {}
+    by_platform = defaultdict(list)
+    for r in results:
+        by_platform[r["platform"]].append(r)
+    for platform, rows in sorted(by_platform.items()):
+        ok = [r for r in rows if "error" not in r]
+        n = len(ok) or 1
+        fields = {}
+        for field in FIELDS:
+            ran = [r["chains"][field] for r in ok if field in r["chains"]]
+            steps: Counter = Counter()
+            for hits in ran:
+                steps.update({name: int(hit) for name, hit in hits.items()})
+            fields[field] = {
+                "coverage": round(sum(r["fields"][field] for r in ok) / n, 3),
+                "chain_ran": len(ran),
+                "selectors": {name: round(hits / len(ran), 3) for name, hits in steps.items()} if ran else {},
+                "fallback_only": sum(field in r["fallback_only"] for r in ok),
+            }
+        report[platform] = {
+            "pages": len(rows),
+            "errors": [{"source": r["source"], "error": r["error"]} for r in rows if "error" in r],
+            "parse_ms": round(sum(r["ms"] for r in ok) / n, 1),
+            "reviews_per_page": round(sum(r["reviews"] for r in ok) / n, 1),
+            "fields": fields,
+            "misses": {f: [r["source"] for r in ok if not r["fields"][f]] for f in REQUIRED_FIELDS},
+        }
+    return report
+
+
+def _print_report(report: dict, show_misses: int) -> None:
+    for platform, rep in report.items():
+        print(f"\n{'─' * 70}")
+        print(f"🔍 {platform} — {rep['pages']} pages, {rep['parse_ms']:.0f} ms/parse, "
+              f"{rep['reviews_per_page']:.1f} reviews/page")
+        for field, f in rep["fields"].items():
+            line = f"  {field:<17}{f['coverage']:>5.0%}"
+            if f["chain_ran"]:
+                steps = " · ".join(
+                    f"{name} {rate:.0%}{' ✗' if rate == 0 else ''}" for name, rate in f["selectors"].items()
+                )
+                line += f"   [{f['chain_ran']} run] {steps}"
+                if f["fallback_only"]:
+                    line += f"   ⚠️  fallback-only on {f['fallback_only']}"
+            print(line)
+        for field, sources in rep["misses"].items():
+            if sources:
+                print(f"  ❌ no {field} on {len(sources)} pages: " + ", ".join(
+                    s[-60:] for s in sources[:show_misses]) + (" …" if len(sources) > show_misses else ""))
+        for err in rep["errors"][:show_misses]:
+            print(f"  ❌ {err['source'][-60:]}: {err['error']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("urls", nargs="*", help="product URLs to fetch and check")
+    parser.add_argument("--pages", help="directory of saved pages (<host>/<name>.html)")
+    parser.add_argument("--urls", dest="url_file", help="file with one product URL per line")
+    parser.add_argument("--save", help="keep fetched pages here, in the --pages layout")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="parser processes")
+    parser.add_argument("--fetch-workers", type=int, default=4, help="concurrent page fetches")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds per page fetch")
+    parser.add_argument("--json", help="write the full report here")
+    parser.add_argument("--show-misses", type=int, default=5, help="pages listed per missing field")
+    parser.add_argument("--fail-under", type=float, help="exit 1 if title/price coverage is below this %%")
+    args = parser.parse_args()
+
+    urls = list(args.urls)
+    if args.url_file:
+        with open(args.url_file, encoding="utf-8") as fh:
+            urls += [line.strip() for line in fh if line.strip() and not line.startswith("#")]
+    if not urls and not args.pages:
+        parser.error("give --pages DIR and/or product URLs")
+
+    import app
+
+    t0 = time.perf_counter()
+    items = _saved_pages(args.pages, app._detect_platform) if args.pages else []
+    if urls:
+        print(f"  → Fetching {len(urls)} pages ({args.fetch_workers} at a time)…")
+        items += _fetch_pages(app, urls, args.fetch_workers, args.timeout, args.save)
+    t1 = time.perf_counter()
+    if not items:
+        raise SystemExit("❌ No pages to check")
+
+    if args.jobs > 1 and len(items) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(_analyse, items, chunksize=max(1, len(items) // (args.jobs * 4))))
+    else:
+        results = [_analyse(item) for item in items]
+    t2 = time.perf_counter()
+
+    report = _summarise(results)
+    print(f"\n🦅 Selector coverage — {len(items)} pages"
+          + (f", fetched in {t1 - t0:.1f}s" if urls else "")
+          + f", parsed in {t2 - t1:.1f}s ({args.jobs} processes)")
+    _print_report(report, args.show_misses)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+        print(f"\n  → Report written to {args.json}")
+
+    if args.fail_under is not None:
+        low = [
+            f"{platform}.{field} {rep['fields'][field]['coverage']:.0%}"
+            for platform, rep in report.items() for field in REQUIRED_FIELDS
+            if rep["fields"][field]["coverage"] * 100 < args.fail_under
+        ]
+        if low:
+            print(f"\n  🚨 Below {args.fail_under:g}%: {', '.join(low)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
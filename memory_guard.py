@@ -0,0 +1,68 @@
+"""
+🦅 PRICEHAWK PRO - MEMORY WATERMARKS
+Keeps long-running processes (API workers, scrape workers) memory-bounded.
+
+MemoryWatermark.check() reads the current RSS: above the soft watermark it
+runs a full gc.collect() (BeautifulSoup trees are reference cycles and
+only go away on a cyclic collection); above the hard watermark it reports
+"hard", and the owner recycles the process gracefully — finish the
+current job, exit, let the supervisor (gunicorn, systemd…) start a fresh one.
+"""
+
+import gc
+import os
+import sys
+import time
+
+SOFT_MB = float(os.environ.get("PRICEHAWK_RSS_SOFT_MB", "768"))
+HARD_MB = float(os.environ.get("PRICEHAWK_RSS_HARD_MB", "1024"))
+
+
+def rss_mb() -> float:
+    """Current resident set size in MiB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as fh:
+            pages = int(fh.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+class MemoryWatermark:
+    def __init__(self, soft_mb: float = SOFT_MB, hard_mb: float = HARD_MB, min_gc_interval: float = 5.0):
+        self.soft_mb = soft_mb
+        self.hard_mb = hard_mb
+        self.min_gc_interval = min_gc_interval
+        self._last_gc = 0.0
+        self.collections = 0
+        self.recycle_requested = False
+
+    def check(self) -> str:
+        """ "ok", "soft" (collected garbage) or "hard" (recycle this process)."""
+        rss = rss_mb()
+        if rss < self.soft_mb:
+            return "ok"
+        now = time.monotonic()
+        if now - self._last_gc >= self.min_gc_interval:
+            self._last_gc = now
+            gc.collect()
+            self.collections += 1
+            rss = rss_mb()
+        if rss < self.hard_mb:
+            return "soft"
+        if not self.recycle_requested:
+            self.recycle_requested = True
+            print(f"  ⚠️  RSS {rss:.0f} MiB over the {self.hard_mb:.0f} MiB watermark — recycling worker")
+        return "hard"
+
+    def stats(self) -> dict:
+        return {
+            "rss_mb": round(rss_mb(), 1),
+            "soft_mb": self.soft_mb,
+            "hard_mb": self.hard_mb,
+            "gc_collections": self.collections,
+            "recycle_requested": self.recycle_requested,
+        }
@@ -0,0 +1,20 @@
+-- PriceHawk Pro: columns the app writes to `products` beyond the original schema.
+-- Run once in the Supabase SQL editor (safe to re-run).
+-- Until it has run, save_to_supabase() leaves these columns out of its writes
+-- and rescore.py refuses to start.
+
+-- Every spec field is stored, so rescore.py sees the same inputs as the scrape
+ALTER TABLE products ADD COLUMN IF NOT EXISTS display TEXT;
+
+-- Which scoring model produced ai_score, and a digest of its inputs
+ALTER TABLE products ADD COLUMN IF NOT EXISTS ai_model_version TEXT;
+ALTER TABLE products ADD COLUMN IF NOT EXISTS ai_inputs_hash TEXT;
+
+-- The deep review crawl's counts (JSON), which decide the sentiment component
+ALTER TABLE products ADD COLUMN IF NOT EXISTS review_summary TEXT;
+
+-- Moved alone when a re-scrape finds the product unchanged
+ALTER TABLE products ADD COLUMN IF NOT EXISTS last_seen TIMESTAMPTZ;
+
+-- Make PostgREST pick up the new columns without a restart
+NOTIFY pgrst, 'reload schema';
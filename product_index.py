@@ -0,0 +1,257 @@
+"""
+🦅 PRICEHAWK PRO - CROSS-PLATFORM PRODUCT INDEX
+Local index of every scraped product, used to find a listing's counterpart
+on the other marketplace without a manual search + second scrape.
+
+Products are persisted in SQLite and mirrored in memory; every lookup first
+pulls in the rows other processes (workers, backfills) wrote since the last
+one, found by a write sequence number. Lookups block on
+an inverted index of title tokens (ignoring tokens too common to be
+discriminative), then rank the candidates by IDF-weighted token overlap,
+title edit similarity and RAM/storage/processor agreement — only the
+MAX_CANDIDATES with the most shared IDF weight get the full comparison.
+Run: python product_index.py --backfill   (index everything in Supabase)
+"""
+
+import difflib
+import heapq
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+DATA_DIR = os.environ.get(
+    "PRICEHAWK_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".pricehawk"),
+)
+
+_COLOURS = {
+    "black", "blue", "white", "green", "red", "silver", "gold", "grey", "gray", "purple",
+    "pink", "yellow", "orange", "midnight", "graphite", "titanium", "starlight", "cyan",
+    "violet", "bronze", "lavender", "mint", "navy", "ocean", "aqua", "cream", "jade",
+}
+_NOISE = {
+    "with", "and", "the", "for", "of", "in", "new", "mobile", "phone", "smartphone",
+    "storage", "ram", "rom", "gb", "tb", "memory", "internal", "expandable", "upto",
+    "up", "to", "offers", "no", "cost", "emi", "dual", "sim", "colour", "color",
+}
+
+
+def normalize_title(title: str) -> list[str]:
+    """Lower-case title tokens with colours, filler words and punctuation removed."""
+    title = (title or "").lower()
+    title = re.sub(r"(\d+)\s*(gb|tb|mp|mah|hz|w)\b", r"\1\2", title)  # "8 GB" → "8gb"
+    tokens = re.findall(r"[a-z0-9+]+", title)
+    return [t for t in tokens if t not in _COLOURS and t not in _NOISE]
+
+
+def _norm_spec(value) -> str | None:
+    if not value:
+        return None
+    return re.sub(r"\s+", "", str(value).lower())
+
+
+def _norm_brand(value) -> str | None:
+    if not value:
+        return None
+    return re.sub(r"[^a-z0-9]", "", str(value).lower()) or None
+
+
+class ProductIndex:
+    """
+    Thread-safe product index. add() upserts a scraped product; match()
+    returns the best counterparts on another platform, highest score first.
+    """
+
+    # Tokens present in more than this share of a platform's products are
+    # too common to block on ("5g", "pro", the dominant brand…)
+    MAX_BLOCK_DF = 0.2
+    # Only the best candidates by shared-token IDF get the (slower) fuzzy scoring
+    MAX_CANDIDATES = 50
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(DATA_DIR, "product_index.db")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS products (
+                   url TEXT PRIMARY KEY, platform TEXT, title TEXT, brand TEXT,
+                   ram TEXT, storage TEXT, processor TEXT, price TEXT, updated_at REAL,
+                   seq INTEGER
+               )"""
+        )
+        # seq: write order across processes (max + 1 inside the writing
+        # statement, so it grows in commit order, unlike wall-clock updated_at)
+        if "seq" not in {row[1] for row in self._db.execute("PRAGMA table_info(products)")}:
+            self._db.execute("ALTER TABLE products ADD COLUMN seq INTEGER")
+        self._db.execute("CREATE INDEX IF NOT EXISTS products_seq ON products (seq)")
+        self._db.commit()
+        self._records: dict[str, dict] = {}
+        self._postings: dict[str, dict[str, set]] = {}  # platform -> token -> urls
+        self._counts: dict[str, int] = {}                # platform -> products
+        self._seq = -1                                   # highest seq loaded
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self) -> None:
+        """Load rows written (by any process) since the last refresh; caller holds the lock."""
+        rows = self._db.execute(
+            "SELECT url, platform, title, brand, ram, storage, processor, price, COALESCE(seq, 0) "
+            "FROM products WHERE COALESCE(seq, 0) > ? ORDER BY seq",
+            (self._seq,),
+        ).fetchall()
+        keys = ("url", "platform", "title", "brand", "ram", "storage", "processor", "price")
+        for row in rows:
+            self._insert(dict(zip(keys, row)))
+            self._seq = max(self._seq, row[-1])
+
+    def _insert(self, rec: dict) -> None:
+        old = self._records.get(rec["url"])
+        if old:
+            for tok in old["tokens"]:
+                self._postings[old["platform"]][tok].discard(rec["url"])
+            self._counts[old["platform"]] -= 1
+        self._counts[rec["platform"]] = self._counts.get(rec["platform"], 0) + 1
+        rec["tokens"] = set(normalize_title(rec.get("title")))
+        self._records[rec["url"]] = rec
+        postings = self._postings.setdefault(rec["platform"], {})
+        for tok in rec["tokens"]:
+            postings.setdefault(tok, set()).add(rec["url"])
+
+    def add(self, data: dict, url: str) -> None:
+        """Index (or refresh) one extracted product under its canonical URL."""
+        if not data.get("title") or not data.get("platform"):
+            return
+        rec = {
+            "url": url,
+            "platform": data["platform"],
+            "title": data["title"],
+            "brand": data.get("brand"),
+            "ram": data.get("ram"),
+            "storage": data.get("storage"),
+            "processor": data.get("processor"),
+            "price": data.get("price"),
+        }
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, "
+                "(SELECT COALESCE(MAX(seq), 0) + 1 FROM products))",
+                (rec["url"], rec["platform"], rec["title"], rec["brand"], rec["ram"],
+                 rec["storage"], rec["processor"], rec["price"], time.time()),
+            )
+            self._db.commit()
+            self._insert(rec)
+
+    def get(self, url: str) -> dict | None:
+        with self._lock:
+            self._refresh()
+            rec = self._records.get(url)
+        return {k: v for k, v in rec.items() if k != "tokens"} if rec else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._records)
+
+    def _idf(self, platform: str, token: str) -> float:
+        n = self._counts.get(platform, 0) or 1
+        df = len(self._postings.get(platform, {}).get(token, ()))
+        return math.log((n + 1) / (df + 1)) + 1.0
+
+    def match(self, product: dict, platform: str, limit: int = 3, min_score: float = 0.55) -> list[dict]:
+        """
+        Best matches for `product` among indexed products on `platform`.
+        Each result is the stored record plus "score" (0–1).
+        """
+        tokens = set(normalize_title(product.get("title")))
+        if not tokens:
+            return []
+
+        with self._lock:
+            self._refresh()
+            postings = self._postings.get(platform, {})
+            n = self._counts.get(platform, 0) or 1
+            block_tokens = [
+                t for t in tokens
+                if t in postings and (len(postings[t]) / n <= self.MAX_BLOCK_DF or n < 20)
+            ]
+            weight: dict[str, float] = {}
+            for t in block_tokens:
+                w = self._idf(platform, t)
+                for u in postings[t]:
+                    weight[u] = weight.get(u, 0.0) + w
+            weight.pop(product.get("url"), None)
+            top = heapq.nlargest(self.MAX_CANDIDATES, weight, key=weight.__getitem__)
+            records = [self._records[u] for u in top]
+            idf = {t: self._idf(platform, t) for r in records for t in r["tokens"] | tokens}
+
+        brand = _norm_brand(product.get("brand"))
+        title = " ".join(normalize_title(product.get("title")))
+        results = []
+        for rec in records:
+            rec_brand = _norm_brand(rec.get("brand"))
+            if brand and rec_brand and brand != rec_brand:
+                continue
+
+            shared = tokens & rec["tokens"]
+            union = tokens | rec["tokens"]
+            overlap = sum(idf[t] for t in shared) / sum(idf[t] for t in union)
+            edit = difflib.SequenceMatcher(None, title, " ".join(normalize_title(rec["title"]))).ratio()
+
+            spec_hits = spec_total = 0
+            conflict = False
+            for field in ("ram", "storage", "processor"):
+                a, b = _norm_spec(product.get(field)), _norm_spec(rec.get(field))
+                if a and b:
+                    spec_total += 1
+                    if a == b:
+                        spec_hits += 1
+                    elif field != "processor":
+                        conflict = True  # same model, different RAM/storage variant
+            spec = spec_hits / spec_total if spec_total else 0.5
+
+            score = 0.6 * overlap + 0.2 * edit + 0.2 * spec
+            if conflict:
+                score *= 0.6
+            if score >= min_score:
+                results.append({**{k: v for k, v in rec.items() if k != "tokens"},
+                                "score": round(score, 3)})
+
+        results.sort(key=lambda r: r["score"], reverse=True)
+        return results[:limit]
+
+
+def _backfill() -> None:
+    from app import supabase, _clean_url
+
+    if not supabase:
+        raise SystemExit("❌ Supabase not available — nothing to backfill")
+    index = ProductIndex()
+    start, page_size, added = 0, 1000, 0
+    while True:
+        rows = (
+            supabase.table("products")
+            .select("url,platform,title,brand,ram,storage,processor,price")
+            .range(start, start + page_size - 1)
+            .execute()
+        ).data
+        for row in rows:
+            index.add(row, _clean_url(row["url"]))
+            added += 1
+        if len(rows) < page_size:
+            break
+        start += page_size
+    print(f"  ✅ Indexed {added:,} products ({len(index):,} unique URLs)")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--backfill" in sys.argv:
+        _backfill()
+    else:
+        print(__doc__)
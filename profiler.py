@@ -0,0 +1,230 @@
+"""
+🦅 PRICEHAWK PRO - SAMPLING PROFILER
+Opt-in, per-request stack sampling for slow comparisons.
+
+A ProfileSession collects the Python stacks of the threads working for one
+request — the request thread plus any pool thread running a function
+wrapped with bind() — by reading sys._current_frames() from a single
+sampler thread every few milliseconds. Nothing is traced: with no session
+open the sampler thread is not running, and the only cost left is the
+check that decides whether to open one.
+Finished profiles are written under DATA_DIR/profiles as collapsed stacks
+(flamegraph.pl / speedscope) and speedscope JSON; the oldest are deleted
+beyond `keep` profiles or `max_age` seconds.
+Playwright's sync API runs its waits on a greenlet, so time spent in a
+browser wait shows up as Playwright's event loop rather than under the
+calling scraper function.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from product_index import DATA_DIR
+
+MAX_DEPTH = 128
+
+
+class ProfileSession:
+    def __init__(self, label: str, interval: float):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.label = label
+        self.interval = interval
+        self.samples: Counter = Counter()  # stack (root first) -> samples
+        self.threads: set[int] = set()
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self.next_due = 0.0
+
+    @property
+    def sample_count(self) -> int:
+        return sum(self.samples.values())
+
+    def collapsed(self) -> str:
+        return "".join(
+            f"{';'.join(stack)} {count}\n"
+            for stack, count in sorted(self.samples.items(), key=lambda kv: -kv[1])
+        )
+
+    def speedscope(self) -> dict:
+        frames, index = [], {}
+        samples, weights = [], []
+        for stack, count in self.samples.items():
+            ids = []
+            for name in stack:
+                if name not in index:
+                    index[name] = len(frames)
+                    func, _, where = name.partition(" (")
+                    file, _, line = where.rstrip(")").rpartition(":")
+                    frames.append({"name": func, "file": file, "line": int(line or 0)})
+                ids.append(index[name])
+            samples.append(ids)
+            weights.append(round(count * self.interval * 1000, 3))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.label,
+            "exporter": "pricehawk",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": self.label,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+
+class SamplingProfiler:
+    def __init__(self, directory: str | None = None, interval: float = 0.005,
+                 keep: int = 50, max_age: float = 72 * 3600):
+        self.directory = directory or os.path.join(DATA_DIR, "profiles")
+        self.interval = interval
+        self.keep = keep
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._threads: dict[int, ProfileSession] = {}  # thread ident -> session
+        self._sessions: set[ProfileSession] = set()
+        self._sampler: threading.Thread | None = None
+        self._labels: dict = {}  # code object -> frame label
+
+    # ── sessions ──────────────────────────────────────────────────────────────
+
+    def start(self, label: str, interval: float | None = None) -> ProfileSession:
+        """Start sampling the calling thread into a new session."""
+        session = ProfileSession(label, interval or self.interval)
+        with self._lock:
+            self._sessions.add(session)
+            session.threads.add(threading.get_ident())
+            self._threads[threading.get_ident()] = session
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._run, name="pricehawk-profiler", daemon=True)
+                self._sampler.start()
+        return session
+
+    def stop(self, session: ProfileSession) -> ProfileSession:
+        with self._lock:
+            self._sessions.discard(session)
+            for ident in session.threads:
+                if self._threads.get(ident) is session:
+                    del self._threads[ident]
+        session.elapsed = time.perf_counter() - session.started
+        return session
+
+    def bind(self, fn):
+        """
+        `fn` wrapped so that, run on another thread, it is sampled into the
+        calling thread's session (if any). Returns `fn` itself when the
+        caller is not being profiled.
+        """
+        session = self._threads.get(threading.get_ident())
+        if session is None:
+            return fn
+
+        def sampled(*args, **kwargs):
+            ident = threading.get_ident()
+            with self._lock:
+                if session in self._sessions:
+                    session.threads.add(ident)
+                    self._threads[ident] = session
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    if self._threads.get(ident) is session:
+                        del self._threads[ident]
+
+        return sampled
+
+    # ── sampling ──────────────────────────────────────────────────────────────
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            path = code.co_filename
+            for root in sys.path:
+                if root and path.startswith(root + os.sep):
+                    path = path[len(root) + 1:]
+                    break
+            label = self._labels[code] = f"{code.co_name} ({path}:{code.co_firstlineno})"
+        return label
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._sessions:
+                    self._sampler = None
+                    return
+                now = time.perf_counter()
+                due = {s for s in self._sessions if s.next_due <= now}
+                for s in due:
+                    s.next_due = now + s.interval
+                threads = [(ident, s) for ident, s in self._threads.items() if s in due]
+                wake = min(s.next_due for s in self._sessions)
+            if threads:
+                frames = sys._current_frames()
+                for ident, session in threads:
+                    frame = frames.get(ident)
+                    stack = []
+                    while frame is not None and len(stack) < MAX_DEPTH:
+                        stack.append(self._label(frame.f_code))
+                        frame = frame.f_back
+                    if stack:
+                        session.samples[tuple(reversed(stack))] += 1
+                del frames
+            time.sleep(max(0.0, wake - time.perf_counter()))
+
+    # ── storage ───────────────────────────────────────────────────────────────
+
+    def save(self, session: ProfileSession) -> list[str]:
+        """Write the collapsed-stack and speedscope files; returns their names."""
+        os.makedirs(self.directory, exist_ok=True)
+        names = [f"{session.id}.collapsed.txt", f"{session.id}.speedscope.json"]
+        with open(os.path.join(self.directory, names[0]), "w", encoding="utf-8") as fh:
+            fh.write(session.collapsed())
+        with open(os.path.join(self.directory, names[1]), "w", encoding="utf-8") as fh:
+            json.dump(session.speedscope(), fh)
+        self.prune()
+        return names
+
+    def prune(self) -> int:
+        """Delete profiles beyond `keep` (newest kept) or older than `max_age`."""
+        try:
+            entries = [e for e in os.scandir(self.directory) if e.is_file()]
+        except FileNotFoundError:
+            return 0
+        by_id: dict[str, list] = {}
+        for e in entries:
+            by_id.setdefault(e.name.split(".", 1)[0], []).append(e)
+        cutoff = time.time() - self.max_age
+        ranked = sorted(by_id.values(), key=lambda es: max(e.stat().st_mtime for e in es), reverse=True)
+        removed = 0
+        for i, group in enumerate(ranked):
+            if i >= self.keep or max(e.stat().st_mtime for e in group) < cutoff:
+                for e in group:
+                    try:
+                        os.remove(e.path)
+                        removed += 1
+                    except OSError:
+                        pass
+        return removed
+
+    def list(self) -> list[dict]:
+        """Saved profiles, newest first."""
+        try:
+            entries = [e for e in os.scandir(self.directory) if e.is_file()]
+        except FileNotFoundError:
+            return []
+        by_id: dict[str, dict] = {}
+        for e in entries:
+            pid = e.name.split(".", 1)[0]
+            info = by_id.setdefault(pid, {"id": pid, "files": [], "saved_at": 0.0})
+            info["files"].append(e.name)
+            info["saved_at"] = max(info["saved_at"], e.stat().st_mtime)
+        return sorted(by_id.values(), key=lambda p: p["saved_at"], reverse=True)
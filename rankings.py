@@ -0,0 +1,246 @@
+"""
+🦅 PRICEHAWK PRO - PRODUCT RANKINGS
+Incrementally maintained rankings over every saved product.
+
+Each saved product is one row of SQLite, with its ranking keys (AI score,
+₹ per score point, one row per category rating) and filter columns
+(platform, brand, price, RAM, storage) stored alongside and indexed, so a
+top-K query is an index walk that stops after K hits instead of a sort of
+the catalogue. Every query reads the database itself: products ranked by
+another server process or by rescore.py show up at once.
+Run: python rankings.py --backfill   (rank everything in Supabase)
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from product_index import DATA_DIR
+from records import parse_price_paise
+
+# metric -> what it ranks by. Lists are ascending, so "higher is better"
+# metrics store the negated value.
+METRICS = {
+    "ai_score": "AI score, best first",
+    "price_per_score": "₹ per AI score point, cheapest first",
+    "category": "a category rating (&category=Camera), best first",
+}
+
+
+def parse_gb(value) -> float | None:
+    """'8 GB' → 8.0, '1 TB' → 1024.0, '512 MB' → 0.5"""
+    m = re.search(r"(\d+(?:\.\d+)?)\s*(TB|GB|MB)", str(value or ""), re.I)
+    if not m:
+        return None
+    size = float(m.group(1))
+    return {"tb": size * 1024, "gb": size, "mb": size / 1024}[m.group(2).lower()]
+
+
+def _norm_brand(value) -> str | None:
+    return (value or "").strip().lower() or None
+
+
+class RankingIndex:
+    """
+    Thread-safe ranking store, shared by every process on the host. add()
+    upserts one scored product; top() answers a filtered top-K query.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(DATA_DIR, "rankings.db")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """CREATE TABLE IF NOT EXISTS ranked (
+                   id TEXT PRIMARY KEY, platform TEXT, brand TEXT, price_value REAL,
+                   ram_gb REAL, storage_gb REAL, ai_score REAL, price_per_score REAL,
+                   data TEXT, updated_at REAL);
+               CREATE INDEX IF NOT EXISTS ranked_score ON ranked (ai_score DESC, id);
+               CREATE INDEX IF NOT EXISTS ranked_platform ON ranked (platform, ai_score DESC, id);
+               CREATE INDEX IF NOT EXISTS ranked_brand ON ranked (brand, ai_score DESC, id);
+               CREATE INDEX IF NOT EXISTS ranked_value ON ranked (price_per_score, id)
+                   WHERE price_per_score IS NOT NULL;
+               CREATE TABLE IF NOT EXISTS ranked_categories (
+                   id TEXT, category TEXT, value REAL, PRIMARY KEY (id, category));
+               CREATE INDEX IF NOT EXISTS ranked_category ON ranked_categories (category, value DESC, id);"""
+        )
+        # Databases from before the indexed schema kept only (id, data, updated_at)
+        if self._db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ranked_products'"
+        ).fetchone():
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._write([(pid, json.loads(raw)) for pid, raw in
+                             self._db.execute("SELECT id, data FROM ranked_products")], time.time())
+                self._db.execute("DROP TABLE ranked_products")
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    # ── maintenance ───────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _record(data: dict, url: str) -> dict | None:
+        score = data.get("ai_score")
+        if score is None:
+            return None
+        categories = data.get("category_ratings") or {}
+        if isinstance(categories, str):
+            try:
+                categories = json.loads(categories)
+            except (json.JSONDecodeError, TypeError):
+                categories = {}
+        paise = data.get("price_paise")
+        if paise is None:
+            paise = parse_price_paise(data.get("price"))
+        return {
+            "url": url,
+            "platform": data.get("platform"),
+            "title": data.get("title"),
+            "brand": data.get("brand"),
+            "image": data.get("image"),
+            "price": data.get("price"),
+            "price_value": None if paise is None else paise / 100,
+            "rating": data.get("rating"),
+            "ram": data.get("ram"),
+            "storage": data.get("storage"),
+            "ram_gb": parse_gb(data.get("ram")),
+            "storage_gb": parse_gb(data.get("storage")),
+            "category_ratings": {k: float(v) for k, v in categories.items() if v is not None},
+            "ai_score": float(score),
+            "ai_verdict": data.get("ai_verdict"),
+        }
+
+    def _write(self, recs: list[tuple[str, dict]], now: float) -> None:
+        """Upsert (id, record) rows and their category keys; the caller holds a transaction."""
+        self._db.executemany(
+            "INSERT OR REPLACE INTO ranked VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(pid, rec["platform"], _norm_brand(rec["brand"]), rec["price_value"],
+              rec["ram_gb"], rec["storage_gb"], rec["ai_score"],
+              rec["price_value"] / rec["ai_score"] if rec["price_value"] and rec["ai_score"] > 0 else None,
+              json.dumps(rec), now)
+             for pid, rec in recs],
+        )
+        self._db.executemany("DELETE FROM ranked_categories WHERE id = ?", [(pid,) for pid, _ in recs])
+        self._db.executemany(
+            "INSERT INTO ranked_categories VALUES (?, ?, ?)",
+            [(pid, name.lower(), value) for pid, rec in recs for name, value in rec["category_ratings"].items()],
+        )
+
+    def add(self, pid: str, data: dict, url: str) -> None:
+        """Rank (or re-rank) one scored product under its database id."""
+        self.add_many([(pid, data, url)])
+
+    def add_many(self, items) -> None:
+        """add() for many (id, data, url) in one transaction — rescore.py's batches."""
+        recs = [(pid, rec) for pid, data, url in items if (rec := self._record(data, url)) is not None]
+        if not recs:
+            return
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._write(recs, time.time())
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM ranked").fetchone()[0]
+
+    # ── queries ───────────────────────────────────────────────────────────────
+
+    def top(
+        self,
+        by: str = "ai_score",
+        k: int = 10,
+        category: str | None = None,
+        brand: str | None = None,
+        platform: str | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        min_ram: float | None = None,
+        min_storage: float | None = None,
+    ) -> list[dict]:
+        """
+        Top-k products by `by` ("ai_score", "price_per_score" or "category").
+        Raises ValueError for an unknown metric or a missing category.
+        """
+        if by not in METRICS:
+            raise ValueError(f"unknown ranking '{by}' (use one of: {', '.join(METRICS)})")
+        if by == "category":
+            if not category:
+                raise ValueError("by=category needs a category parameter")
+            query = ("SELECT r.id, r.data, r.price_per_score FROM ranked_categories c "
+                     "JOIN ranked r ON r.id = c.id WHERE c.category = ?")
+            params: list = [category.lower()]
+            order = "c.value DESC, c.id"
+        elif by == "price_per_score":
+            query, params = "SELECT r.id, r.data, r.price_per_score FROM ranked r WHERE r.price_per_score IS NOT NULL", []
+            order = "r.price_per_score, r.id"
+        else:
+            query, params = "SELECT r.id, r.data, r.price_per_score FROM ranked r WHERE 1=1", []
+            order = "r.ai_score DESC, r.id"
+
+        for clause, value in (
+            ("r.brand = ?", _norm_brand(brand)),
+            ("r.platform = ?", platform),
+            ("r.price_value >= ?", min_price),
+            ("r.price_value <= ?", max_price),
+            ("COALESCE(r.ram_gb, 0) >= ?", min_ram),
+            ("COALESCE(r.storage_gb, 0) >= ?", min_storage),
+        ):
+            if value is not None:
+                query += f" AND {clause}"
+                params.append(value)
+        query += f" ORDER BY {order} LIMIT ?"
+        params.append(k)
+
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        results = []
+        for pid, raw, price_per_score in rows:
+            row = {"id": pid, **json.loads(raw)}
+            if by == "price_per_score":
+                row["price_per_score"] = round(price_per_score, 2)
+            results.append(row)
+        return results
+
+
+def _backfill() -> None:
+    from app import supabase
+
+    if not supabase:
+        raise SystemExit("❌ Supabase not available — nothing to backfill")
+    index = RankingIndex()
+    start, page_size, added = 0, 1000, 0
+    while True:
+        rows = (
+            supabase.table("products")
+            .select("*")
+            .range(start, start + page_size - 1)
+            .execute()
+        ).data
+        for row in rows:
+            index.add(row["id"], row, row["url"])
+            added += 1
+        if len(rows) < page_size:
+            break
+        start += page_size
+    print(f"  ✅ Ranked {added:,} products ({len(index):,} with an AI score)")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--backfill" in sys.argv:
+        _backfill()
+    else:
+        print(__doc__)
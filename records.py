@@ -0,0 +1,222 @@
+"""
+🦅 PRICEHAWK PRO - PRODUCT / REVIEW RECORDS
+Slotted records for products as they flow from the extractors through
+scoring, storage and the API, plus one JSON serializer for all of them.
+
+Prices are parsed once, when the record is built, into integer paise;
+the "₹18,999" display string is derived on demand. Records also answer
+dict-style .get() / [] for their fields, so code written against the
+extractor dicts (scoring, sentiment, indexes) accepts either.
+
+dumps() / loads() use orjson when it is installed and fall back to the
+stdlib json module otherwise.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field, fields
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def parse_price_paise(price) -> int | None:
+    """'₹18,999' / '18999.50' / 18999 → price in paise (1899900), None if unparsable."""
+    if price is None or price == "":
+        return None
+    if isinstance(price, (int, float)):
+        return round(price * 100)
+    m = re.search(r"\d[\d,]*(?:\.\d+)?", str(price))
+    if not m:
+        return None
+    return round(float(m.group(0).replace(",", "")) * 100)
+
+
+def format_price(paise: int | None) -> str | None:
+    """1899900 → '₹18,999' (paise kept only when non-zero)."""
+    if paise is None:
+        return None
+    rupees, rem = divmod(paise, 100)
+    return f"₹{rupees:,}" if not rem else f"₹{rupees:,}.{rem:02d}"
+
+
+def _json_field(value, default):
+    """Stored rows keep dict/list columns as JSON text."""
+    if isinstance(value, (str, bytes)):
+        try:
+            return loads(value) if value else default
+        except ValueError:
+            return default
+    return value if value is not None else default
+
+
+class _FieldAccess:
+    """Dict-style access to a record's fields (and read-only properties)."""
+
+    __slots__ = ()
+
+    def get(self, key: str, default=None):
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value) -> None:
+        try:
+            setattr(self, key, value)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: str) -> bool:
+        return getattr(self, key, None) is not None
+
+    def update(self, values: dict) -> None:
+        for key, value in values.items():
+            self[key] = value
+
+
+@dataclass(slots=True)
+class ReviewRecord(_FieldAccess):
+    rating: int = 0
+    text: str = ""
+    sentiment: float | None = None
+
+    @classmethod
+    def from_dict(cls, review) -> "ReviewRecord":
+        if isinstance(review, cls):
+            return review
+        return cls(
+            rating=int(review.get("rating") or 0),
+            text=review.get("text") or "",
+            sentiment=review.get("sentiment"),
+        )
+
+    def to_dict(self) -> dict:
+        out = {"rating": self.rating, "text": self.text}
+        if self.sentiment is not None:
+            out["sentiment"] = self.sentiment
+        return out
+
+
+@dataclass(slots=True)
+class ProductRecord(_FieldAccess):
+    platform: str | None = None
+    title: str | None = None
+    price_paise: int | None = None
+    rating: float | None = None
+    brand: str | None = None
+    image: str | None = None
+    ram: str | None = None
+    storage: str | None = None
+    processor: str | None = None
+    camera: str | None = None
+    battery: str | None = None
+    display: str | None = None
+    category_ratings: dict = field(default_factory=dict)
+    reviews: list = field(default_factory=list)  # [ReviewRecord]
+    aspect_sentiment: dict | None = None
+    review_summary: dict | None = None
+    ai_score: int | None = None
+    ai_verdict: str | None = None
+    ai_reasons: list = field(default_factory=list)
+    ai_breakdown: dict = field(default_factory=dict)
+    ai_model_version: str | None = None
+    ai_inputs_hash: str | None = None
+    url: str | None = None
+    id: str | None = None
+
+    @property
+    def price(self) -> str | None:
+        return format_price(self.price_paise)
+
+    @property
+    def price_rupees(self) -> float | None:
+        return None if self.price_paise is None else self.price_paise / 100
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ProductRecord":
+        """
+        Build a record from an extractor dict or a stored row: the price is
+        parsed to paise, JSON-text columns are decoded, unknown keys dropped.
+        """
+        rating = data.get("rating")
+        return cls(
+            platform=data.get("platform"),
+            title=data.get("title"),
+            price_paise=(
+                data["price_paise"] if data.get("price_paise") is not None
+                else parse_price_paise(data.get("price"))
+            ),
+            rating=float(rating) if rating not in (None, "") else None,
+            brand=data.get("brand"),
+            image=data.get("image"),
+            ram=data.get("ram"),
+            storage=data.get("storage"),
+            processor=data.get("processor"),
+            camera=data.get("camera"),
+            battery=data.get("battery"),
+            display=data.get("display"),
+            category_ratings=_json_field(data.get("category_ratings"), {}),
+            reviews=[ReviewRecord.from_dict(r) for r in data.get("reviews") or []],
+            aspect_sentiment=data.get("aspect_sentiment"),
+            review_summary=_json_field(data.get("review_summary"), None),
+            ai_score=data.get("ai_score"),
+            ai_verdict=data.get("ai_verdict"),
+            ai_reasons=_json_field(data.get("ai_reasons"), []),
+            ai_breakdown=_json_field(data.get("ai_breakdown"), {}),
+            ai_model_version=data.get("ai_model_version"),
+            ai_inputs_hash=data.get("ai_inputs_hash"),
+            url=data.get("url"),
+            id=data.get("id"),
+        )
+
+    def to_dict(self, only=None, include_reviews: bool = True) -> dict:
+        """
+        API shape: unset fields omitted, price as both display string and paise.
+        `only` restricts the output to those keys ("price" included);
+        include_reviews=False drops the review texts.
+        """
+        out = {}
+        for name in _PRODUCT_FIELDS:
+            if only is not None and name not in only:
+                continue
+            value = getattr(self, name)
+            if value is None or (value == {} and name != "category_ratings"):
+                continue
+            out[name] = value
+        if include_reviews and (only is None or "reviews" in only):
+            out["reviews"] = [r.to_dict() for r in self.reviews]
+        if self.price_paise is not None and (only is None or "price" in only):
+            out["price"] = self.price
+        return out
+
+
+_PRODUCT_FIELDS = tuple(f.name for f in fields(ProductRecord) if f.name != "reviews")
+
+
+def _default(obj):
+    if isinstance(obj, (ProductRecord, ReviewRecord)):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj) -> bytes:
+    """Serialize dicts/lists containing records to UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(
+            obj, default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS,
+        )
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,140 @@
+"""
+Rescore stored products after a scoring change — no re-scraping.
+Run: python rescore.py [--all] [--model scoring_model.json] [--dry-run]
+
+Loads the products table (and each product's latest reviews) from Supabase
+page by page, re-scores the review text with the sentiment engine and picks
+the stale rows: those scored by a different model version, or whose scoring
+inputs no longer match the stored ai_inputs_hash.
+Only those are scored (in one vectorized score_batch() call) and upserted
+together with the new model version and inputs hash; the local rankings
+(rankings.py) are re-ranked with the new scores at the same time.
+"""
+
+import argparse
+import json
+import time
+from collections import defaultdict
+
+from app import (
+    supabase, RANKINGS, get_scoring_model, ScoringModel,
+    scoring_inputs_hash, scoring_table, score_batch,
+)
+from records import ProductRecord, dumps
+from sentiment import analyse_reviews, get_engine
+
+
+def _fetch_all(table: str, columns: str, page_size: int) -> list[dict]:
+    rows: list[dict] = []
+    start = 0
+    while True:
+        page = (
+            supabase.table(table)
+            .select(columns)
+            .range(start, start + page_size - 1)
+            .execute()
+        ).data
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        start += page_size
+
+
+def _load_catalogue(page_size: int) -> list[ProductRecord]:
+    """
+    Rebuild ProductRecords from stored rows. Reviews are re-inserted
+    on every save, so only the latest 10 per product are kept — the same cap
+    save_to_supabase() writes.
+    Deep-crawled products carry their stored review_summary, which keeps
+    deciding the sentiment component as it did at scrape time.
+    """
+    products = _fetch_all("products", "*", page_size)
+    if products and not {"ai_model_version", "ai_inputs_hash"} <= products[0].keys():
+        raise SystemExit("❌ products has no ai_model_version/ai_inputs_hash columns — "
+                         "run migrations/001_products_columns.sql first")
+
+    reviews: dict = defaultdict(list)
+    for rev in sorted(
+        _fetch_all("reviews", "product_id,rating,text,created_at", page_size),
+        key=lambda r: r.get("created_at") or "",
+        reverse=True,
+    ):
+        bucket = reviews[rev["product_id"]]
+        if len(bucket) < 10:
+            bucket.append({"rating": rev.get("rating") or 0, "text": rev.get("text") or ""})
+
+    records = []
+    for row in products:
+        row["reviews"] = reviews.get(row["id"], [])
+        records.append(analyse_reviews(ProductRecord.from_dict(row)))
+    return records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rescore the stored product catalogue")
+    parser.add_argument("--all", action="store_true", help="rescore every row, not just stale ones")
+    parser.add_argument("--model", help="scoring model JSON (default: the server's current model)")
+    parser.add_argument("--dry-run", action="store_true", help="report changes without writing")
+    parser.add_argument("--page-size", type=int, default=1000, help="rows per Supabase request")
+    args = parser.parse_args()
+
+    if not supabase:
+        raise SystemExit("❌ Supabase not available — nothing to rescore")
+
+    if args.model:
+        with open(args.model, encoding="utf-8") as fh:
+            model = ScoringModel.from_dict(json.load(fh))
+    else:
+        model = get_scoring_model()
+    print(f"  → Scoring model {model.version}")
+
+    t0 = time.perf_counter()
+    products = _load_catalogue(args.page_size)
+    t1 = time.perf_counter()
+
+    stale, hashes = [], []
+    for product in products:
+        inputs_hash = scoring_inputs_hash(product)
+        if (
+            args.all
+            or product.get("ai_model_version") != model.version
+            or product.get("ai_inputs_hash") != inputs_hash
+        ):
+            stale.append(product)
+            hashes.append(inputs_hash)
+
+    scores = score_batch(scoring_table(stale, model), model)
+    t2 = time.perf_counter()
+
+    updates = []
+    for product, inputs_hash, result in zip(stale, hashes, scores):
+        updates.append({
+            "id": product["id"],
+            "ai_score": result["ai_score"],
+            "ai_verdict": result["ai_verdict"],
+            "ai_reasons": dumps(result["ai_reasons"]).decode(),
+            "ai_breakdown": dumps(result["ai_breakdown"]).decode(),
+            "ai_model_version": result["ai_model_version"],
+            "ai_inputs_hash": inputs_hash,
+        })
+
+    engine = get_engine()
+    print(f"  → Loaded {len(products):,} products in {t1 - t0:.2f}s "
+          f"({engine.misses:,} review texts scored, {engine.hits:,} cache hits)")
+    print(f"  → {len(stale):,} stale, scored in {t2 - t1:.3f}s")
+
+    if args.dry_run or not updates:
+        return
+
+    for i in range(0, len(updates), 500):
+        supabase.table("products").upsert(updates[i:i + 500], on_conflict="id").execute()
+    # /api/rankings reads the rankings store, so it must see the new scores too
+    RANKINGS.add_many(
+        (product["id"], {**product.to_dict(include_reviews=False), **result}, product["url"])
+        for product, result in zip(stale, scores)
+    )
+    print(f"  ✅ Wrote {len(updates):,} rows in {time.perf_counter() - t2:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Scrape worker: drains the work queue (work_queue.py) of product-page scrapes.
+Run: python scrape_worker.py [--processes 2] [--lease 90] [--idle-sleep 1] [--max-jobs 0]
+
+Each process leases one job at a time, runs fetch_and_extract() within the
+job's budget and acks the extracted product back; the API (started with
+PRICEHAWK_SCRAPE_QUEUE=1) picks it up, scores it and stores it. Failed
+scrapes are nacked and retried by the queue with backoff. Every worker
+also prunes old finished jobs from the queue now and then.
+Browsers are still capped host-wide by the browser governor, so
+--processes can exceed PRICEHAWK_BROWSER_SLOTS: the extra processes serve
+the HTTP tiers and Amazon while the browsers are busy.
+A process finishes its current job and exits on SIGTERM/SIGINT, after
+--max-jobs jobs, or once its RSS passes the hard memory watermark; the
+supervisor (this script with --processes, or systemd…) starts a fresh one.
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import signal
+import sys
+import threading
+import time
+
+RECYCLE_EXIT = 3  # exit status of a worker that wants to be replaced
+
+
+def work(lease_seconds: float, idle_sleep: float, max_jobs: int) -> int:
+    """One worker process's loop; returns its exit status."""
+    import app
+    from deadline import Deadline
+    from memory_guard import MemoryWatermark
+    from work_queue import PRUNE_EVERY, WorkQueue, worker_id
+
+    queue = WorkQueue()
+    me = worker_id()
+    memory = MemoryWatermark()
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+
+    print(f"🦅 Scrape worker {me} ready")
+    done = 0
+    pruned_at = 0.0
+    while not stop.is_set():
+        if time.monotonic() - pruned_at >= PRUNE_EVERY:
+            pruned_at = time.monotonic()
+            removed = queue.prune()
+            if removed:
+                print(f"  → Pruned {removed} finished jobs")
+        job = queue.lease(me, lease_seconds)
+        if job is None:
+            stop.wait(idle_sleep)
+            continue
+
+        # Finish well inside the lease, and never past the client's expiry
+        budget = min(job["timeout"] or app.DEFAULT_REQUEST_TIMEOUT, lease_seconds * 0.9)
+        if job["expires_at"] is not None:
+            budget = min(budget, job["expires_at"] - time.time())
+        print(f"\n📥 Job {job['id']} ({job['platform']}, attempt {job['attempt']}, {budget:.0f}s budget)")
+        t0 = time.perf_counter()
+        try:
+            record = app.fetch_and_extract(job["url"], job["platform"], Deadline(max(budget, 1.0)))
+        except Exception as exc:
+            queue.nack(job["id"], me, f"{type(exc).__name__}: {exc}")
+            print(f"  ❌ Job {job['id']} raised {exc}")
+        else:
+            if record is not None and (record.get("title") or record.get("price")):
+                if queue.ack(job["id"], me, record):
+                    print(f"  ✅ Job {job['id']} done in {time.perf_counter() - t0:.1f}s")
+                else:
+                    print(f"  ⚠️  Lease on job {job['id']} lost — result dropped")
+            else:
+                queue.nack(job["id"], me, "no usable data extracted")
+                print(f"  ❌ Job {job['id']}: no usable data")
+
+        done += 1
+        if max_jobs and done >= max_jobs:
+            print(f"  → {done} jobs done — recycling")
+            return RECYCLE_EXIT
+        if memory.check() == "hard":
+            return RECYCLE_EXIT
+    return 0
+
+
+def _child(lease_seconds: float, idle_sleep: float, max_jobs: int) -> None:
+    raise SystemExit(work(lease_seconds, idle_sleep, max_jobs))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--processes", type=int, default=1, help="worker processes to keep running")
+    parser.add_argument("--lease", type=float, default=90.0, help="seconds a job is leased for")
+    parser.add_argument("--idle-sleep", type=float, default=1.0, help="poll interval on an empty queue")
+    parser.add_argument("--max-jobs", type=int, default=0, help="recycle a process after N jobs (0: never)")
+    args = parser.parse_args()
+    worker_args = (args.lease, args.idle_sleep, args.max_jobs)
+
+    if args.processes <= 1:
+        if work(*worker_args) == RECYCLE_EXIT:
+            os.execv(sys.executable, [sys.executable, *sys.argv])  # fresh interpreter
+        return
+
+    # Supervisor: keep --processes workers alive, replacing recycled ones
+    ctx = mp.get_context("spawn")  # no inherited browser/DB handles
+    stopping = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stopping.set())
+    procs = []
+    for _ in range(args.processes):
+        p = ctx.Process(target=_child, args=worker_args)
+        p.start()
+        procs.append(p)
+    print(f"🦅 Supervising {args.processes} scrape workers (pid {os.getpid()})")
+
+    while not stopping.is_set():
+        for i, p in enumerate(procs):
+            if not p.is_alive():
+                p.join()
+                print(f"  → Worker {p.pid} exited ({p.exitcode}) — starting a replacement")
+                procs[i] = ctx.Process(target=_child, args=worker_args)
+                procs[i].start()
+        stopping.wait(1.0)
+
+    for p in procs:
+        if p.is_alive():
+            os.kill(p.pid, signal.SIGTERM)
+    for p in procs:
+        p.join()
+
+
+if __name__ == "__main__":
+    main()
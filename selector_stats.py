@@ -0,0 +1,335 @@
+"""
+🦅 PRICEHAWK PRO - ADAPTIVE SELECTOR CHAINS
+Runtime hit statistics for the extractors' per-field fallback chains.
+
+Every step of a chain (a CSS class, a meta tag…) records whether it
+produced a value, with exponential decay so old results fade. run()
+then orders the steps live → weak → dead, keeping the confirmed
+priority within each tier, so selectors a site has stopped rendering
+are skipped until everything else misses. Every EXPLORE_EVERY-th run of
+a chain also tries the weak and dead steps it would have skipped (the
+result is unchanged), so a selector that comes back after a markup
+rollback is promoted again. The expensive catch-all fallback (full-HTML
+regex, <title> tag…) always runs last.
+
+Each field also tracks how often any selector (not the fallback) hit,
+over a short and a long window; when the short-window rate collapses
+below half the long-run rate an alert is logged and kept for
+/api/selector_stats. Stats and alerts are persisted in SQLite and survive
+restarts. Every process sharing the file (gunicorn workers, scrape
+workers) flushes only what it observed since its last flush — applied to
+the stored values in SQL, decay included — and then reloads the merged
+totals, so the stats cover all of them. Flushes run every FLUSH_INTERVAL
+on a background thread, never on the extraction path: a run() only
+takes the in-memory lock, which a flush holds just long enough to swap
+out the pending updates.
+
+probe() switches run() on the calling thread into diagnostics mode for
+debug_scraper.py: every step and the fallback are tried, and nothing is
+recorded.
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from product_index import DATA_DIR
+
+DECAY = 0.98          # per try; a step's stats cover roughly its last ~50 tries
+MIN_TRIES = 10        # decayed tries before a step can be judged
+DEAD_RATE = 0.05
+WEAK_RATE = 0.5
+EXPLORE_EVERY = 20    # every Nth run of a chain re-tries its demoted steps
+
+SHORT_ALPHA = 0.2     # field-level selector hit rate, short window
+LONG_ALPHA = 0.02     # … and long-run baseline
+MIN_SAMPLES = 30
+COLLAPSE_RATIO = 0.5
+RECOVER_RATIO = 0.8
+
+FLUSH_INTERVAL = 30.0
+KEEP_ALERTS = 30 * 24 * 3600
+FALLBACK = "(fallback)"  # step name of a chain's fallback in probe() results
+
+
+class SelectorStats:
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(DATA_DIR, "selector_stats.db")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """CREATE TABLE IF NOT EXISTS steps (
+                   platform TEXT, field TEXT, step TEXT, tries REAL, hits REAL,
+                   PRIMARY KEY (platform, field, step));
+               CREATE TABLE IF NOT EXISTS fields (
+                   platform TEXT, field TEXT, short REAL, long REAL, samples INTEGER,
+                   alerting INTEGER, PRIMARY KEY (platform, field));
+               CREATE TABLE IF NOT EXISTS alerts (
+                   platform TEXT, field TEXT, at REAL, recent_hit_rate REAL, baseline_hit_rate REAL);"""
+        )
+        self.alerts: deque = deque(maxlen=50)
+        # In-memory stats: stored totals plus this process's unflushed updates
+        #   (platform, field, step) -> [tries, hits]
+        #   (platform, field) -> [short, long, samples, alerting]
+        self._steps, self._fields, stored_alerts = self._read()
+        self.alerts.extend(stored_alerts)
+        # Unflushed updates, as affine maps over the stored values:
+        #   step:  [decay factor, tries added, hits added]
+        #   field: [short factor, short added, long factor, long added, samples added]
+        self._pending_steps: dict[tuple, list] = {}
+        self._pending_fields: dict[tuple, list] = {}
+        self._pending_alerts: list[dict] = []
+        self._runs: dict[tuple, int] = {}      # (platform, field) -> runs, for exploration
+        self._probe = threading.local()
+        self._dirty = False
+        self._flush_lock = threading.Lock()    # one flush at a time; guards self._db
+        self._flusher_pid = None
+        atexit.register(self.flush)
+
+    # ── chain execution ───────────────────────────────────────────────────────
+
+    def _tier(self, platform: str, field: str, step: str) -> int:
+        tries, hits = self._steps.get((platform, field, step), (0.0, 0.0))
+        if tries < MIN_TRIES:
+            return 0  # not enough evidence: treat as live
+        rate = hits / tries
+        return 0 if rate >= WEAK_RATE else 1 if rate >= DEAD_RATE else 2
+
+    def order(self, platform: str, field: str, names: list[str]) -> list[str]:
+        """Step names live → weak → dead, original order within each tier."""
+        with self._lock:
+            tiers = {n: self._tier(platform, field, n) for n in names}
+        return sorted(names, key=tiers.__getitem__)  # stable
+
+    def run(self, platform: str, field: str, steps, fallback=None):
+        """
+        Try `steps` ([(name, fn)], fn() → value or None) in adaptive order and
+        return the first value; `fallback` (a final fn) runs only if all miss.
+        """
+        fns = dict(steps)
+        probe = getattr(self._probe, "results", None)
+        if probe is not None:
+            return self._run_probe(probe, platform, field, fns, fallback)
+        with self._lock:
+            runs = self._runs[(platform, field)] = self._runs.get((platform, field), 0) + 1
+            tiers = {n: self._tier(platform, field, n) for n in fns}
+        value = None
+        tried = []
+        order = sorted(fns, key=tiers.__getitem__)
+        for i, name in enumerate(order):
+            value = fns[name]()
+            tried.append((name, bool(value)))
+            if value:
+                if runs % EXPLORE_EVERY == 0:
+                    # Keep the demoted steps' stats moving, or they never recover
+                    tried += [(n, bool(fns[n]())) for n in order[i + 1:] if tiers[n]]
+                break
+        self._record(platform, field, tried, bool(value))
+        if not value and fallback is not None:
+            value = fallback()
+        return value
+
+    @contextmanager
+    def probe(self):
+        """
+        Diagnostics on this thread: run() tries every step and the fallback,
+        returns what it would normally have returned and records nothing.
+        Yields {(platform, field): {step: hit, FALLBACK: hit}} for the chains run.
+        """
+        results: dict = {}
+        self._probe.results = results
+        try:
+            yield results
+        finally:
+            self._probe.results = None
+
+    def _run_probe(self, probe: dict, platform: str, field: str, fns: dict, fallback):
+        hits = probe.setdefault((platform, field), {})
+        value = None
+        for name in self.order(platform, field, list(fns)):
+            found = fns[name]()
+            hits[name] = bool(found)
+            value = value or found
+        if fallback is not None:
+            found = fallback()
+            hits[FALLBACK] = bool(found)
+            value = value or found
+        return value
+
+    # ── bookkeeping ───────────────────────────────────────────────────────────
+
+    def _record(self, platform: str, field: str, tried, hit: bool) -> None:
+        with self._lock:
+            for name, ok in tried:
+                s = self._steps.setdefault((platform, field, name), [0.0, 0.0])
+                s[0] = s[0] * DECAY + 1
+                s[1] = s[1] * DECAY + ok
+                p = self._pending_steps.setdefault((platform, field, name), [1.0, 0.0, 0.0])
+                p[0] *= DECAY
+                p[1] = p[1] * DECAY + 1
+                p[2] = p[2] * DECAY + ok
+
+            f = self._fields.get((platform, field))
+            if f is None:
+                f = self._fields[(platform, field)] = [float(hit), float(hit), 0, False]
+            f[0] += SHORT_ALPHA * (hit - f[0])
+            f[1] += LONG_ALPHA * (hit - f[1])
+            f[2] += 1
+            p = self._pending_fields.setdefault((platform, field), [1.0, 0.0, 1.0, 0.0, 0])
+            p[0] *= 1 - SHORT_ALPHA
+            p[1] = p[1] * (1 - SHORT_ALPHA) + SHORT_ALPHA * hit
+            p[2] *= 1 - LONG_ALPHA
+            p[3] = p[3] * (1 - LONG_ALPHA) + LONG_ALPHA * hit
+            p[4] += 1
+            short, long_, samples, alerting = f
+            if not alerting and samples >= MIN_SAMPLES and short < long_ * COLLAPSE_RATIO:
+                f[3] = True
+                alert = {
+                    "platform": platform, "field": field, "at": time.time(),
+                    "recent_hit_rate": round(short, 3), "baseline_hit_rate": round(long_, 3),
+                }
+                self.alerts.append(alert)
+                self._pending_alerts.append(alert)
+                print(f"  🚨 Selector hit rate collapsed for {platform}.{field}: "
+                      f"{long_:.0%} → {short:.0%} — check the page markup")
+            elif alerting and short >= long_ * RECOVER_RATIO:
+                f[3] = False
+                print(f"  ✅ Selectors for {platform}.{field} recovered ({short:.0%})")
+
+            self._dirty = True
+            if self._flusher_pid != os.getpid():
+                # Started lazily, so a process forked after import gets its own
+                self._flusher_pid = os.getpid()
+                threading.Thread(target=self._flush_loop, name="selector-stats-flush", daemon=True).start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except sqlite3.Error as exc:
+                print(f"  ⚠️  Selector stats flush failed: {exc}")
+
+    def _read(self) -> tuple[dict, dict, list]:
+        """The stored (all-process) step stats, field stats and recent alerts."""
+        steps = {
+            (platform, field, step): [tries, hits]
+            for platform, field, step, tries, hits in self._db.execute("SELECT * FROM steps")
+        }
+        fields = {
+            (platform, field): [short, long_, samples, bool(alerting)]
+            for platform, field, short, long_, samples, alerting in self._db.execute("SELECT * FROM fields")
+        }
+        alerts = [
+            dict(zip(("platform", "field", "at", "recent_hit_rate", "baseline_hit_rate"), row))
+            for row in self._db.execute(
+                "SELECT platform, field, at, recent_hit_rate, baseline_hit_rate FROM alerts "
+                "ORDER BY at DESC LIMIT ?", (self.alerts.maxlen,),
+            ).fetchall()[::-1]
+        ]
+        return steps, fields, alerts
+
+    def flush(self) -> None:
+        """
+        Apply this process's updates since the last flush to the stored
+        stats, then reload the merged totals. run() is only blocked while
+        the pending updates are swapped out and the totals swapped in.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                pending_steps, self._pending_steps = self._pending_steps, {}
+                pending_fields, self._pending_fields = self._pending_fields, {}
+                pending_alerts, self._pending_alerts = self._pending_alerts, []
+                self._dirty = False
+                # A row another process created first gets our updates applied
+                # on top of it; a new row starts from our own values.
+                step_rows = [(*k, *self._steps[k], p[0], p[1], p[0], p[2]) for k, p in pending_steps.items()]
+                field_rows = [(*k, f[0], f[1], f[2], int(f[3]), *p)
+                              for k, p in pending_fields.items() for f in (self._fields[k],)]
+
+            try:
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    self._db.executemany(
+                        "INSERT INTO steps VALUES (?, ?, ?, ?, ?) ON CONFLICT (platform, field, step) "
+                        "DO UPDATE SET tries = tries * ? + ?, hits = hits * ? + ?",
+                        step_rows,
+                    )
+                    self._db.executemany(
+                        "INSERT INTO fields VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (platform, field) "
+                        "DO UPDATE SET short = short * ? + ?, long = long * ? + ?, samples = samples + ?, "
+                        "alerting = excluded.alerting",
+                        field_rows,
+                    )
+                    self._db.executemany(
+                        "INSERT INTO alerts VALUES (?, ?, ?, ?, ?)",
+                        [(a["platform"], a["field"], a["at"], a["recent_hit_rate"], a["baseline_hit_rate"])
+                         for a in pending_alerts],
+                    )
+                    self._db.execute("DELETE FROM alerts WHERE at < ?", (time.time() - KEEP_ALERTS,))
+                    self._db.execute("COMMIT")
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    raise
+            except BaseException:
+                with self._lock:
+                    self._requeue(pending_steps, pending_fields, pending_alerts)
+                raise
+            steps, fields, alerts = self._read()
+
+            with self._lock:
+                # Updates recorded during the flush are still pending: replay
+                # them over the stored totals so nothing seen here goes missing
+                for k, p in self._pending_steps.items():
+                    if k in steps:
+                        t, h = steps[k]
+                        steps[k] = [t * p[0] + p[1], h * p[0] + p[2]]
+                    else:
+                        steps[k] = self._steps[k]
+                for k, p in self._pending_fields.items():
+                    if k in fields:
+                        short, long_, samples, _ = fields[k]
+                        fields[k] = [short * p[0] + p[1], long_ * p[2] + p[3], samples + p[4], self._fields[k][3]]
+                    else:
+                        fields[k] = self._fields[k]
+                self._steps, self._fields = steps, fields
+                self.alerts.clear()
+                self.alerts.extend(alerts + self._pending_alerts)
+
+    def _requeue(self, steps: dict, fields: dict, alerts: list) -> None:
+        """Put back updates a failed flush took out, ahead of those recorded since."""
+        for k, (f, t, h) in steps.items():
+            later = self._pending_steps.get(k, [1.0, 0.0, 0.0])
+            self._pending_steps[k] = [f * later[0], t * later[0] + later[1], h * later[0] + later[2]]
+        for k, (sf, sa, lf, la, n) in fields.items():
+            later = self._pending_fields.get(k, [1.0, 0.0, 1.0, 0.0, 0])
+            self._pending_fields[k] = [sf * later[0], sa * later[0] + later[1],
+                                       lf * later[2], la * later[2] + later[3], n + later[4]]
+        self._pending_alerts[:0] = alerts
+        self._dirty = True
+
+    def snapshot(self) -> dict:
+        """{platform: {field: {hit_rate, baseline, alerting, steps: [...]}}} in run order."""
+        with self._lock:
+            out: dict = {}
+            for (platform, field), (short, long_, samples, alerting) in self._fields.items():
+                steps = [
+                    {"step": step, "hit_rate": round(h / t, 3) if t else None, "tries": round(t, 1),
+                     "tier": ("live", "weak", "dead")[self._tier(platform, field, step)]}
+                    for (p, f, step), (t, h) in self._steps.items()
+                    if p == platform and f == field
+                ]
+                steps.sort(key=lambda s: ("live", "weak", "dead").index(s["tier"]))
+                out.setdefault(platform, {})[field] = {
+                    "hit_rate": round(short, 3), "baseline": round(long_, 3),
+                    "samples": samples, "alerting": alerting, "steps": steps,
+                }
+            return out
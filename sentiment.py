@@ -0,0 +1,326 @@
+"""
+🦅 PRICEHAWK PRO - REVIEW SENTIMENT ENGINE
+CPU-only, dependency-free lexicon scorer for product review text.
+
+Each review gets a compound sentiment in [-1, 1] plus per-aspect sentiment
+(Camera, Battery, Display, …) taken from the sentences that mention the
+aspect. Text without a single lexicon word gets None rather than a neutral
+0.0, so scoring falls back to the review's stars instead of reading "5 stars
+from me, delivered on time" as not positive. Scores are cached by
+review-text hash, and large batches can be spread across CPU cores with a
+process pool.
+"""
+
+import hashlib
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+# ════════════════════════════════════════════════════════════════════════════
+# LEXICON
+# ════════════════════════════════════════════════════════════════════════════
+
+LEXICON: dict[str, float] = {
+    # positive
+    "good": 0.6, "great": 0.8, "excellent": 0.9, "awesome": 0.9, "amazing": 0.9,
+    "superb": 0.9, "fantastic": 0.9, "outstanding": 0.9, "best": 0.8, "perfect": 0.8,
+    "love": 0.8, "loved": 0.8, "loving": 0.7, "nice": 0.5, "decent": 0.3, "fine": 0.2,
+    "ok": 0.1, "okay": 0.1, "happy": 0.6, "satisfied": 0.6, "impressive": 0.7,
+    "impressed": 0.7, "smooth": 0.6, "fast": 0.5, "quick": 0.4, "bright": 0.4,
+    "sharp": 0.4, "clear": 0.4, "crisp": 0.5, "vibrant": 0.5, "premium": 0.5,
+    "solid": 0.4, "sturdy": 0.4, "beautiful": 0.7, "stunning": 0.8, "worth": 0.5,
+    "recommend": 0.6, "recommended": 0.6, "reliable": 0.5, "brilliant": 0.8,
+    "wonderful": 0.8, "flawless": 0.8, "lightweight": 0.3, "snappy": 0.5,
+    "long-lasting": 0.6, "value": 0.3, "vfm": 0.7, "mast": 0.6, "accha": 0.5,
+    "badhiya": 0.6, "super": 0.6, "cool": 0.4, "pleased": 0.6, "top": 0.4,
+    "efficient": 0.5, "responsive": 0.5, "loud": 0.2, "good-looking": 0.5,
+    # negative
+    "bad": -0.6, "worst": -0.9, "poor": -0.6, "terrible": -0.9, "horrible": -0.9,
+    "awful": -0.8, "pathetic": -0.9, "useless": -0.8, "waste": -0.8, "disappointed": -0.7,
+    "disappointing": -0.7, "disappointment": -0.7, "slow": -0.4, "lag": -0.5,
+    "lags": -0.5, "laggy": -0.6, "lagging": -0.6, "hang": -0.5, "hangs": -0.5,
+    "hanging": -0.5, "heating": -0.5, "heats": -0.5, "overheating": -0.7, "hot": -0.3,
+    "drain": -0.5, "drains": -0.5, "draining": -0.5, "issue": -0.4, "issues": -0.4,
+    "problem": -0.4, "problems": -0.4, "defective": -0.8, "broken": -0.7,
+    "damaged": -0.7, "faulty": -0.8, "fake": -0.8, "cheap": -0.3, "overpriced": -0.5,
+    "expensive": -0.3, "refund": -0.4, "return": -0.3, "returned": -0.4, "dull": -0.4,
+    "blurry": -0.5, "grainy": -0.4, "noisy": -0.4, "weak": -0.4, "low": -0.2,
+    "fragile": -0.4, "flimsy": -0.5, "bekar": -0.7, "bakwas": -0.8, "ghatiya": -0.8,
+    "regret": -0.7, "avoid": -0.6, "bug": -0.4, "bugs": -0.4, "buggy": -0.6,
+    "crash": -0.6, "crashes": -0.6, "annoying": -0.5, "mediocre": -0.3, "average": -0.1,
+    "fast-drain": -0.7,
+    # negated idioms, which mean more than the flipped negative word
+    "not-bad": 0.5, "not-bad-at-all": 0.7, "no-complaints": 0.6, "no-issues": 0.5,
+}
+
+# Multi-word expressions collapsed to a single lexicon token before scoring
+PHRASES = {
+    "value for money": "vfm",
+    "worth the money": "vfm",
+    "waste of money": "waste",
+    "long lasting": "long-lasting",
+    "good looking": "good-looking",
+    "drains fast": "fast-drain",
+    "drain fast": "fast-drain",
+    "drains quickly": "fast-drain",
+    "heats up": "heats",
+    "not bad at all": "not-bad-at-all",
+    "not at all bad": "not-bad-at-all",
+    "not bad": "not-bad",
+    "not that bad": "not-bad",
+    "no complaints": "no-complaints",
+    "no complaint": "no-complaints",
+    "nothing to complain": "no-complaints",
+    "no issues": "no-issues",
+    "no issue": "no-issues",
+    "no problems": "no-issues",
+    "no problem": "no-issues",
+    "without any issue": "no-issues",
+    "without any issues": "no-issues",
+}
+
+BOOSTERS = {
+    "very": 1.3, "extremely": 1.5, "really": 1.2, "so": 1.2, "too": 1.2, "super": 1.3,
+    "highly": 1.3, "absolutely": 1.4, "totally": 1.3, "quite": 1.1, "bit": 0.8,
+    "slightly": 0.7, "somewhat": 0.8, "little": 0.8,
+}
+
+NEGATIONS = {"not", "no", "never", "nothing", "hardly", "without", "nor", "dont", "cant", "wont"}
+
+ASPECTS: dict[str, set[str]] = {
+    "Camera": {"camera", "cameras", "photo", "photos", "picture", "pictures", "selfie",
+               "selfies", "video", "videos", "lens", "mp", "portrait", "night"},
+    "Battery": {"battery", "backup", "charge", "charging", "charger", "mah", "drain",
+                "drains", "draining", "fast-drain"},
+    "Display": {"display", "screen", "amoled", "brightness", "resolution", "touch",
+                "panel", "refresh"},
+    "Performance": {"performance", "speed", "lag", "lags", "laggy", "processor", "gaming",
+                    "game", "games", "hang", "hangs", "heating", "heats", "multitasking",
+                    "snappy", "smooth"},
+    "Design": {"design", "build", "look", "looks", "body", "weight", "finish", "colour",
+               "color", "feel", "grip", "good-looking"},
+    "Sound": {"sound", "speaker", "speakers", "audio", "volume", "loud"},
+    "Value for Money": {"price", "value", "money", "worth", "cost", "vfm", "overpriced",
+                        "expensive", "cheap"},
+}
+
+_WORD_TO_ASPECTS: dict[str, list[str]] = {}
+for _aspect, _words in ASPECTS.items():
+    for _word in _words:
+        _WORD_TO_ASPECTS.setdefault(_word, []).append(_aspect)
+
+_TOKEN_RE = re.compile(r"[a-z][a-z'\-]*|!")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|[\n;]+")
+_CLAUSE_RE = re.compile(r",|\bbut\b|\bwhile\b|\bthough\b")
+# Longest first, so "not bad at all" wins over "not bad"
+_PHRASE_RE = re.compile(r"\b(?:" + "|".join(re.escape(p) for p in sorted(PHRASES, key=len, reverse=True)) + r")\b")
+
+# VADER-style normalisation constant: compound = x / sqrt(x² + ALPHA)
+ALPHA = 15.0
+
+
+# ════════════════════════════════════════════════════════════════════════════
+# SCORING
+# ════════════════════════════════════════════════════════════════════════════
+
+def _normalise(total: float) -> float:
+    return total / math.sqrt(total * total + ALPHA) if total else 0.0
+
+
+def _is_negation(token: str) -> bool:
+    return token in NEGATIONS or token.endswith("n't")
+
+
+def _sentence_valence(tokens: list[str]) -> tuple[float, int]:
+    """
+    Summed valence of one sentence with negation, boosters and "but", and
+    the number of lexicon words it was taken from.
+    """
+    try:
+        pivot = tokens.index("but")
+    except ValueError:
+        pivot = -1
+
+    total = 0.0
+    hits = 0
+    for i, tok in enumerate(tokens):
+        v = LEXICON.get(tok)
+        if v is None:
+            continue
+        hits += 1
+        if i and tokens[i - 1] in BOOSTERS:
+            v *= BOOSTERS[tokens[i - 1]]
+        if any(_is_negation(t) for t in tokens[max(0, i - 3):i]):
+            v *= -0.75
+        if pivot >= 0:
+            # The clause after "but" carries the reviewer's actual opinion
+            v *= 1.5 if i > pivot else 0.5
+        total += v
+
+    if total and "!" in tokens:
+        total *= 1.0 + 0.1 * min(tokens.count("!"), 3)
+    return total, hits
+
+
+def score_text(text: str) -> dict:
+    """
+    Score one review.
+    Returns {"score": compound in [-1, 1], or None when the text has no
+    sentiment words, "aspects": {aspect: score}}.
+    """
+    lowered = _PHRASE_RE.sub(lambda m: PHRASES[m.group(0)], text.lower())
+
+    total = 0.0
+    evidence = 0
+    aspect_totals: dict[str, list[float]] = {}
+    for sentence in _SENTENCE_RE.split(lowered):
+        tokens = _TOKEN_RE.findall(sentence)
+        if not tokens:
+            continue
+        valence, hits = _sentence_valence(tokens)
+        total += valence
+        evidence += hits
+
+        # Aspects take the valence of their own clause ("camera is great, but
+        # battery drains"), or the whole sentence's when the clause has none
+        # ("camera, battery and display are excellent"). A mention with no
+        # sentiment word anywhere in its sentence says nothing about the aspect.
+        for clause in _CLAUSE_RE.split(sentence):
+            clause_tokens = _TOKEN_RE.findall(clause)
+            aspects = {a for t in clause_tokens for a in _WORD_TO_ASPECTS.get(t, ())}
+            if not aspects:
+                continue
+            clause_valence, clause_hits = _sentence_valence(clause_tokens)
+            if not clause_hits:
+                if not hits:
+                    continue
+                clause_valence = valence
+            for aspect in aspects:
+                aspect_totals.setdefault(aspect, []).append(clause_valence)
+
+    return {
+        "score": round(_normalise(total), 4) if evidence else None,
+        "aspects": {a: round(_normalise(sum(v)), 4) for a, v in aspect_totals.items()},
+    }
+
+
+def _score_chunk(texts: list[str]) -> list[dict]:
+    return [score_text(t) for t in texts]
+
+
+def _text_key(text: str) -> bytes:
+    normalised = " ".join(text.lower().split())
+    return hashlib.blake2b(normalised.encode(), digest_size=16).digest()
+
+
+# ════════════════════════════════════════════════════════════════════════════
+# BATCH ENGINE
+# ════════════════════════════════════════════════════════════════════════════
+
+class SentimentEngine:
+    """
+    Batched, cached review scorer.
+
+    score_batch() de-duplicates texts against an LRU cache keyed by the hash
+    of the normalised text and scores only the misses — in-process for small
+    batches, or across `workers` processes for large ones.
+    """
+
+    def __init__(self, cache_size: int = 100_000, workers: int = 1, parallel_threshold: int = 2_000):
+        self.cache_size = cache_size
+        self.workers = max(1, workers)
+        self.parallel_threshold = parallel_threshold
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: ProcessPoolExecutor | None = None
+        self.hits = 0
+        self.misses = 0
+
+    def score_batch(self, texts: list[str]) -> list[dict]:
+        keys = [_text_key(t) for t in texts]
+        results: list = [None] * len(texts)
+        pending: dict[bytes, list[int]] = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    results[i] = cached
+                    self.hits += 1
+                else:
+                    pending.setdefault(key, []).append(i)
+            self.misses += len(pending)
+
+        if pending:
+            todo = [texts[idx[0]] for idx in pending.values()]
+            scored = self._score_uncached(todo)
+            with self._lock:
+                for (key, idx), result in zip(pending.items(), scored):
+                    for i in idx:
+                        results[i] = result
+                    self._cache[key] = result
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return results
+
+    def _score_uncached(self, texts: list[str]) -> list[dict]:
+        if self.workers == 1 or len(texts) < self.parallel_threshold:
+            return _score_chunk(texts)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        size = math.ceil(len(texts) / (self.workers * 4))
+        chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+        return [r for chunk in self._pool.map(_score_chunk, chunks) for r in chunk]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+_default_engine: SentimentEngine | None = None
+
+
+def get_engine() -> SentimentEngine:
+    """Process-wide engine; PRICEHAWK_SENTIMENT_WORKERS sets the pool size."""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = SentimentEngine(
+            workers=int(os.environ.get("PRICEHAWK_SENTIMENT_WORKERS", "1"))
+        )
+    return _default_engine
+
+
+def analyse_reviews(data: dict, engine: SentimentEngine | None = None) -> dict:
+    """
+    Annotate a product dict in place: each review gets a "sentiment" score
+    (None when its text carries no sentiment) and the product gets "aspect_sentiment" = {aspect: {"score", "mentions"}}.
+    """
+    reviews = data.get("reviews") or []
+    if not reviews:
+        return data
+
+    engine = engine or get_engine()
+    scored = engine.score_batch([r.get("text", "") for r in reviews])
+
+    aspects: dict[str, list[float]] = {}
+    for review, result in zip(reviews, scored):
+        review["sentiment"] = result["score"]
+        for aspect, value in result["aspects"].items():
+            aspects.setdefault(aspect, []).append(value)
+
+    if aspects:
+        data["aspect_sentiment"] = {
+            a: {"score": round(sum(v) / len(v), 3), "mentions": len(v)}
+            for a, v in aspects.items()
+        }
+    return data
@@ -0,0 +1,143 @@
+"""
+🦅 PRICEHAWK PRO - MARKETPLACE PLUGINS
+Registry of the marketplaces PriceHawk can scrape.
+
+A Site declares everything the pipeline needs to know about one
+marketplace: the hosts it owns (share-link shorteners included), how its
+product URLs are canonicalised and which of its URLs are short links,
+its fetch strategy ("http", "browser", or "tiered" for HTTP with a browser
+fallback — browsers are capped host-wide by the browser governor), a
+per-process concurrency and request-rate budget, and the parsers that turn
+its product and review-listing pages into the usual dicts.
+app.fetch_page() fetches with the shared fetcher of the site's strategy,
+and app.crawl_reviews() walks the review_urls() pages the same way, so a
+plugin only supplies URLs and parsers. fetch_html, extract and
+review_pages override those defaults for marketplaces that need their own
+fetching (Flipkart's fetch tiers and in-page extraction, for one).
+
+app.py registers Flipkart and Amazon. Another marketplace goes in its own
+module that calls register_site() at import time, and is loaded by naming
+the module in PRICEHAWK_SITE_PLUGINS (comma-separated).
+"""
+
+import importlib
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable
+
+STRATEGIES = ("http", "browser", "tiered")
+
+
+class SiteBusy(Exception):
+    """No fetch slot for the site freed up before the deadline."""
+
+
+@dataclass(eq=False)
+class Site:
+    name: str
+    hosts: tuple[str, ...]                 # "flipkart.com" also owns m.flipkart.com
+    canonicalize: Callable                 # url -> canonical product URL, or None if not a product URL
+    parse: Callable | None = None          # product page HTML -> product dict
+    extract: Callable | None = None        # (url, Deadline) -> product dict, or None; default: fetch, then parse
+    fetch_html: Callable | None = None     # (url, Deadline) -> raw page HTML, or None; default: by strategy
+    review_urls: Callable | None = None    # (url, max_pages) -> review-listing page URLs, page 1 onwards
+    parse_reviews: Callable | None = None  # review-listing page soup -> review dicts (None entries skipped)
+    review_pages: Callable | None = None   # (urls, Deadline) -> page HTML per URL; default: by strategy
+    short_link: str | None = None          # regex matching share links that redirect to products
+    strategy: str = "http"
+    concurrency: int = 4                   # fetches in flight per process
+    min_interval: float = 0.0              # seconds between fetch starts per process
+    label: str = ""
+
+    _slots: threading.BoundedSemaphore = field(init=False, repr=False)
+    _rate_lock: threading.Lock = field(init=False, repr=False)
+    _next_start: float = field(init=False, repr=False, default=0.0)
+    inflight: int = field(init=False, default=0)
+
+    def __post_init__(self):
+        if self.strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of {STRATEGIES}, not {self.strategy!r}")
+        if self.parse is None and self.extract is None:
+            raise ValueError(f"{self.name}: a site needs parse or extract")
+        self.label = self.label or self.name.capitalize()
+        self._slots = threading.BoundedSemaphore(max(1, self.concurrency))
+        self._rate_lock = threading.Lock()
+
+    def owns(self, host: str) -> bool:
+        return any(host == h or host.endswith("." + h) for h in self.hosts)
+
+    def is_short_link(self, url: str) -> bool:
+        return bool(self.short_link) and re.match(self.short_link, url) is not None
+
+    @property
+    def crawls_reviews(self) -> bool:
+        return self.review_urls is not None and self.parse_reviews is not None
+
+    @contextmanager
+    def budget(self, deadline):
+        """
+        Hold one of the site's fetch slots and respect its request spacing.
+        Raises SiteBusy if no slot frees up before the Deadline.
+        """
+        remaining = deadline.remaining()
+        if not self._slots.acquire(timeout=None if remaining == float("inf") else remaining):
+            raise SiteBusy(f"{self.name}: all {self.concurrency} fetch slots busy")
+        try:
+            with self._rate_lock:
+                start = max(time.monotonic(), self._next_start)
+                self._next_start = start + self.min_interval
+                self.inflight += 1
+            deadline.sleep(start - time.monotonic())
+            yield
+        finally:
+            with self._rate_lock:
+                self.inflight -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "label": self.label,
+            "hosts": list(self.hosts),
+            "strategy": self.strategy,
+            "fetcher": "custom" if self.extract or self.fetch_html else self.strategy,
+            "concurrency": self.concurrency,
+            "min_interval_s": self.min_interval,
+            "inflight": self.inflight,
+            "review_crawl": self.crawls_reviews,
+        }
+
+
+SITES: dict[str, Site] = {}
+
+
+def register_site(site: Site) -> Site:
+    """Add (or replace) a marketplace; returns the site for module-level use."""
+    SITES[site.name] = site
+    return site
+
+
+def host_of(url: str) -> str:
+    return re.sub(r"^https?://", "", url or "").split("/", 1)[0].split(":", 1)[0].lower()
+
+
+def site_for_url(url: str) -> Site | None:
+    host = host_of(url)
+    for site in SITES.values():
+        if site.owns(host):
+            return site
+    return None
+
+
+def load_plugins(modules: str) -> None:
+    """Import the comma-separated plugin modules; each registers its sites."""
+    for name in (m.strip() for m in modules.split(",")):
+        if not name:
+            continue
+        try:
+            importlib.import_module(name)
+            print(f"✅ Marketplace plugin loaded: {name}")
+        except Exception as exc:
+            print(f"⚠️  Marketplace plugin {name} failed to load: {exc}")
@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# Every SQLite store lives under PRICEHAWK_DATA_DIR, read at import time:
+# point it at a scratch directory before any project module is imported.
+os.environ["PRICEHAWK_DATA_DIR"] = tempfile.mkdtemp(prefix="pricehawk-tests-")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,104 @@
+import random
+
+import pytest
+
+import app
+from records import ProductRecord
+from sentiment import analyse_reviews, score_text
+
+ASPECTS = ("camera", "battery", "display", "performance")
+CATEGORIES = ("Camera", "Battery", "Display", "Design", "Value")
+
+
+def _random_product(rnd: random.Random) -> dict:
+    # Unanalysed products have no sentiment at all; analysed ones have None
+    # for reviews without any sentiment words
+    analysed = rnd.random() < 0.7
+    product = {
+        "platform": rnd.choice(("flipkart", "amazon")),
+        "rating": rnd.choice([None, 0, 0.0, round(rnd.uniform(1, 5), 1), 4.5, 4.0, 3.5, 3.0]),
+        "reviews": [
+            {"rating": rnd.randint(1, 5), "text": "review",
+             "sentiment": round(rnd.uniform(-1, 1), 3) if analysed and rnd.random() < 0.8 else None}
+            for _ in range(rnd.choice([0, 0, 1, 2, 3, 10]))
+        ],
+    }
+    if rnd.random() < 0.5:
+        # Values on x.x5 make the category score land on rounding near-ties
+        product["category_ratings"] = {
+            c: rnd.choice([round(rnd.uniform(1, 5), 1), 4.25, 4.75, 3.25, 4.5])
+            for c in rnd.sample(CATEGORIES, rnd.randint(1, 4))
+        }
+    if rnd.random() < 0.4:
+        product["aspect_sentiment"] = {
+            a: {"score": round(rnd.uniform(-1, 1), 3), "mentions": rnd.randint(0, 5)}
+            for a in rnd.sample(ASPECTS, rnd.randint(1, 3))
+        }
+    if rnd.random() < 0.3:
+        count = rnd.randint(0, 400)
+        product["review_summary"] = {"count": count, "positive": rnd.randint(0, count)}
+    for field in app.SPEC_FIELDS:
+        if rnd.random() < 0.6:
+            product[field] = "x"
+    return product
+
+
+@pytest.mark.parametrize("model", [
+    app.ScoringModel(),
+    app.ScoringModel(use_text_sentiment=False, min_reviews=1),
+    app.ScoringModel(name="strict", min_reviews=5, category_points=25, specs_points=5,
+                     verdict_thresholds=(90, 80, 60, 40)),
+])
+def test_score_batch_matches_scalar(model):
+    rnd = random.Random(42)
+    products = [_random_product(rnd) for _ in range(3000)]
+    batch = app.score_batch(app.scoring_table(products, model), model)
+    for product, result in zip(products, batch):
+        assert result == app.calculate_ai_recommendation(product, model), product
+
+
+def test_score_batch_empty():
+    assert app.score_batch(app.scoring_table([])) == []
+
+
+def test_scoring_model_rejects_bad_configs():
+    with pytest.raises(ValueError):
+        app.ScoringModel.from_dict({"min_reviews": 0})
+    with pytest.raises(ValueError):
+        app.ScoringModel.from_dict({"verdict_thresholds": [90, 80]})
+
+
+def test_inputs_hash_survives_a_stored_row():
+    """The hash of a scraped product equals the hash of its row read back, as rescore.py sees it."""
+    rnd = random.Random(7)
+    for _ in range(200):
+        product = ProductRecord.from_dict({**_random_product(rnd), "title": "Phone", "price": "₹9,999"})
+        stored = {k: v for k, v in product.to_dict().items() if k not in ("aspect_sentiment",)}
+        stored["review_summary"] = app.dumps(product.review_summary).decode() if product.review_summary else None
+        stored["category_ratings"] = app.dumps(product.category_ratings).decode()
+        reloaded = ProductRecord.from_dict(stored)
+        reloaded.aspect_sentiment = product.aspect_sentiment  # recomputed from the same reviews
+        assert app.scoring_inputs_hash(reloaded) == app.scoring_inputs_hash(product)
+
+
+def test_text_without_sentiment_words_falls_back_to_stars():
+    assert score_text("Received the phone on time, using it for two weeks now, 5 stars from me.")["score"] is None
+    product = analyse_reviews({"reviews": [
+        {"rating": 5, "text": "Received the phone on time, 5 stars from me."},
+        {"rating": 5, "text": "Delivered in two days."},
+    ]})
+    assert [r["sentiment"] for r in product["reviews"]] == [None, None]
+    assert app._sentiment_inputs(product, app.ScoringModel()) == (2, 2)
+
+
+def test_negated_negatives_read_positive():
+    for text in ("not bad at all", "Not bad for the price.", "No complaints so far", "no issues till now"):
+        assert score_text(text)["score"] >= 0.1, text
+    assert score_text("not bad at all")["score"] > score_text("not bad")["score"]
+    assert score_text("The phone is not good")["score"] < 0
+
+
+def test_aspects_need_several_mentions():
+    model = app.ScoringModel()
+    aspects = {"Camera": {"score": 1.0, "mentions": 1}, "Battery": {"score": 0.5, "mentions": 3}}
+    assert app._category_inputs({"aspect_sentiment": aspects}, model) == {"Battery": 4.0}
@@ -0,0 +1,67 @@
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import app
+from sites import Site
+
+PRODUCT = "<html><h1>Gizmo X</h1><b>₹4,999</b>" + "<p>filler</p>" * 1000 + "</html>"
+REVIEWS = {1: ["Great phone, love it", "Battery drains fast"], 2: ["Good value"], 3: []}
+
+
+class _Shop(BaseHTTPRequestHandler):
+    def do_GET(self):
+        m = re.search(r"/reviews/(\d+)\?page=(\d+)", self.path)
+        if m:
+            cards = "".join(f"<div class='review'>{t}</div>" for t in REVIEWS[int(m.group(2))])
+            body = f"<html>{cards}</html>"
+        else:
+            body = PRODUCT
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def shop(monkeypatch):
+    """A third marketplace that only declares URLs and parsers, served locally."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Shop)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(app, "UPSTREAM", f"http://127.0.0.1:{server.server_port}")
+    site = Site(
+        name="gizmoshop",
+        hosts=("gizmoshop.test",),
+        canonicalize=lambda url: url.split("?")[0],
+        parse=lambda html: {"platform": "gizmoshop", "title": re.search(r"<h1>(.*?)</h1>", html).group(1),
+                            "price": re.search(r"<b>(.*?)</b>", html).group(1)},
+        review_urls=lambda url, max_pages: (
+            f"https://gizmoshop.test/reviews/{url.rsplit('/', 1)[1]}?page={n}" for n in range(1, max_pages + 1)),
+        parse_reviews=lambda soup: ({"rating": 5, "text": card.get_text()} for card in soup.select(".review")),
+    )
+    monkeypatch.setitem(app.SITES, site.name, site)
+    yield site
+    server.shutdown()
+
+
+def test_plugin_fetches_by_strategy(shop):
+    record = app.fetch_and_extract("https://gizmoshop.test/p/42", "gizmoshop", app.Deadline(10))
+    assert record["title"] == "Gizmo X" and record["price_paise"] == 499900
+    assert shop.stats()["fetcher"] == "http" and shop.stats()["review_crawl"]
+
+
+def test_plugin_gets_the_review_crawl(shop):
+    summary = app.crawl_reviews("https://gizmoshop.test/p/42", "gizmoshop", max_pages=5, deadline=app.Deadline(10))
+    assert summary["count"] == 3 and summary["pages"] == 2
+
+
+def test_site_needs_a_parser():
+    with pytest.raises(ValueError):
+        Site(name="empty", hosts=("empty.test",), canonicalize=lambda url: url)
+    with pytest.raises(ValueError):
+        app.crawl_reviews("https://www.flipkart.com/x/p/itm1", "nowhere")
@@ -0,0 +1,334 @@
+import json
+import sqlite3
+import time
+
+import app
+import change_tracker
+import scrape_worker
+import selector_stats
+import work_queue
+from change_tracker import ChangeTracker, _diff
+from product_index import ProductIndex
+from rankings import RankingIndex
+from records import ProductRecord
+from selector_stats import SelectorStats
+from work_queue import WorkQueue
+
+
+# ─── WorkQueue ───────────────────────────────────────────────────────────────
+
+def test_enqueue_coalesces_pending_jobs(tmp_path):
+    q = WorkQueue(str(tmp_path / "q.db"))
+    a = q.enqueue("https://www.flipkart.com/x/p/itm1", "flipkart")
+    assert q.enqueue("https://www.flipkart.com/x/p/itm1", "flipkart") == a
+    assert q.enqueue("https://www.amazon.in/dp/B000000001", "amazon") != a
+
+
+def test_lease_ack(tmp_path):
+    q = WorkQueue(str(tmp_path / "q.db"))
+    job_id = q.enqueue("u", "amazon", timeout=30)
+    job = q.lease("w1", 60)
+    assert job["id"] == job_id and job["attempt"] == 1 and job["timeout"] == 30
+    assert q.lease("w2", 60) is None  # already leased
+    assert not q.ack(job_id, "w2", {"title": "x"})  # not w2's lease
+    assert q.ack(job_id, "w1", {"title": "x"})
+    done = q.get(job_id)
+    assert done["status"] == "done" and done["result"] == {"title": "x"}
+
+
+def test_nack_retries_with_backoff_then_fails(tmp_path, monkeypatch):
+    monkeypatch.setattr(work_queue, "RETRY_BACKOFF", 0.0)
+    q = WorkQueue(str(tmp_path / "q.db"), max_attempts=2)
+    job_id = q.enqueue("u", "amazon")
+    q.lease("w", 60)
+    assert q.nack(job_id, "w", "boom")
+    assert q.get(job_id)["status"] == "queued"
+    assert q.lease("w", 60)["attempt"] == 2
+    q.nack(job_id, "w", "boom again")
+    job = q.get(job_id)
+    assert job["status"] == "failed" and job["error"] == "boom again"
+    assert q.lease("w", 60) is None
+
+
+def test_expired_lease_is_released(tmp_path):
+    q = WorkQueue(str(tmp_path / "q.db"))
+    job_id = q.enqueue("u", "amazon")
+    q.lease("dead-worker", 0.01)
+    time.sleep(0.05)
+    job = q.lease("w2", 60)
+    assert job["id"] == job_id and job["attempt"] == 2
+    assert not q.ack(job_id, "dead-worker", {})
+
+
+def test_expired_job_fails_instead_of_running(tmp_path):
+    q = WorkQueue(str(tmp_path / "q.db"))
+    job_id = q.enqueue("u", "amazon", expires_at=time.time() - 1)
+    assert q.lease("w", 60) is None
+    assert q.get(job_id)["status"] == "failed"
+
+
+def test_prune_drops_only_old_finished_jobs(tmp_path):
+    q = WorkQueue(str(tmp_path / "q.db"))
+    old_done, old_failed, recent, queued = (q.enqueue(f"u{i}", "amazon") for i in range(4))
+    for job_id, status in ((old_done, "done"), (old_failed, "failed"), (recent, "done")):
+        q._db.execute("UPDATE jobs SET status = ? WHERE id = ?", (status, job_id))
+    q._db.execute("UPDATE jobs SET updated_at = updated_at - ? WHERE id IN (?, ?, ?)",
+                  (work_queue.KEEP_FINISHED + 1, old_done, old_failed, queued))
+    assert q.prune() == 2
+    assert q.get(old_done) is None and q.get(old_failed) is None
+    assert q.get(recent)["status"] == "done" and q.get(queued)["status"] == "queued"
+
+
+def test_worker_loop_prunes_the_queue(monkeypatch):
+    q = WorkQueue()
+    stale = q.enqueue("https://www.amazon.in/dp/B0STALE001", "amazon")
+    q.lease("old-worker", 60)
+    q.ack(stale, "old-worker", {"title": "x"})
+    q._db.execute("UPDATE jobs SET updated_at = 0 WHERE id = ?", (stale,))
+    fresh = q.enqueue("https://www.amazon.in/dp/B0FRESH001", "amazon")
+    monkeypatch.setattr(app, "fetch_and_extract", lambda url, platform, deadline: {"title": "Phone"})
+    assert scrape_worker.work(60, 0.01, max_jobs=1) == scrape_worker.RECYCLE_EXIT
+    assert q.get(stale) is None and q.get(fresh)["status"] == "done"
+
+
+# ─── ReviewDeduper ───────────────────────────────────────────────────────────
+
+REVIEW = ("Battery easily lasts a full day with heavy use, the camera is sharp in daylight "
+          "and the display is bright enough outdoors. Great value for the price overall.")
+
+
+def test_deduper_exact_and_near_duplicates():
+    seen = app.ReviewDeduper()
+    assert seen.add(REVIEW)
+    assert not seen.add(REVIEW.upper() + "!!")                     # same after normalisation
+    assert not seen.add(REVIEW + " Recommended")                    # near duplicate
+    assert seen.add("Stopped charging after two weeks and support never replied to my emails.")
+    assert len(seen) == 2
+
+
+def test_deduper_exact_only():
+    seen = app.ReviewDeduper(near=False)
+    assert seen.add(REVIEW)
+    assert seen.add(REVIEW + " Recommended")
+    assert not seen.add(REVIEW)
+
+
+# ─── ChangeTracker ───────────────────────────────────────────────────────────
+
+def test_diff_events():
+    assert _diff((999900, 4.2, 10), (899900, 4.2, 10)) == [
+        {"kind": "price_drop", "old": "₹9,999", "new": "₹8,999"}]
+    kinds = [e["kind"] for e in _diff((899900, 4.2, 10), (999900, 4.3, 12))]
+    assert kinds == ["price_rise", "rating_change", "new_reviews"]
+    assert _diff((None, None, None), (999900, 4.2, 10)) == []   # nothing to compare against
+    assert _diff((999900, 4.2, 10), (None, None, 0)) == []      # missing values are not changes
+    assert _diff((999900, 4.2, 10), (999900, 4.2, 8)) == []     # fewer reviews on the page
+
+
+def test_tracker_lookup_record_touch(tmp_path):
+    t = ChangeTracker(str(tmp_path / "changes.db"))
+    product = {"platform": "amazon", "price_paise": 999900, "rating": 4.2, "reviews": [{}] * 3,
+               "ai_score": 70, "ai_verdict": "Good", "ai_reasons": [], "ai_breakdown": {},
+               "ai_model_version": "default@1"}
+    assert t.lookup("p1", "fp1", "default@1") is None
+    assert t.record("p1", "u", product, "fp1") == []
+    assert t.lookup("p1", "fp1", "default@1")["ai_score"] == 70
+    assert t.lookup("p1", "fp2", "default@1") is None   # changed listing
+    assert t.lookup("p1", "fp1", "default@2") is None   # new scoring model
+    t.touch("p1")
+    events = t.record("p1", "u", {**product, "price_paise": 949900}, "fp2")
+    assert [e["kind"] for e in events] == ["price_drop"]
+    assert [e["kind"] for e in t.events(kind="price_drop")] == ["price_drop"]
+    assert t.stats() == {"tracked": 1, "unchanged": 1, "changed": 1, "new": 1}
+
+
+# ─── RankingIndex ────────────────────────────────────────────────────────────
+
+def _ranked(pid, score, platform="amazon", brand="Acme", price="₹10,000", ram="8 GB", cats=None):
+    return pid, {"platform": platform, "brand": brand, "title": pid, "price": price, "ram": ram,
+                 "ai_score": score, "category_ratings": cats or {}}, f"https://x/{pid}"
+
+
+def test_rankings_top_filters_and_order(tmp_path):
+    r = RankingIndex(str(tmp_path / "rankings.db"))
+    r.add_many([
+        _ranked("a", 80, price="₹20,000"),
+        _ranked("b", 90, platform="flipkart", brand="Other"),
+        _ranked("c", 70, ram="4 GB", cats={"Camera": 4.8}),
+        _ranked("d", 85, price="₹40,000", cats={"Camera": 4.1}),
+    ])
+    assert [x["id"] for x in r.top(k=3)] == ["b", "d", "a"]
+    assert [x["id"] for x in r.top(platform="amazon", brand="acme")] == ["d", "a", "c"]
+    assert [x["id"] for x in r.top(max_price=25_000, min_ram=8)] == ["b", "a"]
+    assert [x["id"] for x in r.top(by="category", category="camera")] == ["c", "d"]
+    assert [x["id"] for x in r.top(by="price_per_score")][:2] == ["b", "c"]
+
+
+def test_rankings_readd_moves_product_and_survives_reload(tmp_path):
+    path = str(tmp_path / "rankings.db")
+    r = RankingIndex(path)
+    r.add_many([_ranked("a", 80), _ranked("b", 90)])
+    r.add(*_ranked("a", 95))
+    assert [x["id"] for x in r.top()] == ["a", "b"]
+    assert [x["id"] for x in RankingIndex(path).top()] == ["a", "b"]
+    assert len(r) == 2
+
+
+def test_rankings_see_other_processes_writes(tmp_path):
+    path = str(tmp_path / "rankings.db")
+    server, rescore = RankingIndex(path), RankingIndex(path)
+    server.add_many([_ranked("a", 80), _ranked("b", 90)])
+    assert [x["id"] for x in server.top()] == ["b", "a"]
+    rescore.add_many([_ranked("a", 99, cats={"Camera": 4.0})])
+    assert [x["id"] for x in server.top()] == ["a", "b"]
+    assert [x["id"] for x in server.top(by="category", category="Camera")] == ["a"]
+
+
+def test_rankings_migrate_legacy_rows(tmp_path):
+    path = str(tmp_path / "rankings.db")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE ranked_products (id TEXT PRIMARY KEY, data TEXT, updated_at REAL)")
+    db.execute("INSERT INTO ranked_products VALUES (?, ?, 0)",
+               ("a", json.dumps(RankingIndex._record(_ranked("a", 80)[1], "https://x/a"))))
+    db.commit()
+    db.close()
+    r = RankingIndex(path)
+    assert [x["id"] for x in r.top(min_ram=8)] == ["a"] and len(r) == 1
+
+
+# ─── Flipkart in-page payload ────────────────────────────────────────────────
+
+def test_block_page_payload_is_rejected():
+    blocked = {"title_tag": "Access Denied", "text": "Access Denied. Reference #18.", "meta": {}, "ld_json": []}
+    assert app._flipkart_payload_blocked(blocked)
+    assert not app._flipkart_complete(app.extract_flipkart_payload(blocked))
+    real = {**blocked, "meta": {"og:title": "Stub Phone 5G (Black, 128 GB) - Buy Online | Flipkart.com"}}
+    assert not app._flipkart_payload_blocked(real)
+
+
+def test_product_record_round_trips_review_summary():
+    summary = {"count": 120, "positive": 90}
+    row = {"title": "x", "review_summary": app.dumps(summary).decode(), "display": "6.5 inch"}
+    record = ProductRecord.from_dict(row)
+    assert record.review_summary == summary and record.display == "6.5 inch"
+
+
+def test_tracker_prunes_old_events(tmp_path, monkeypatch):
+    t = ChangeTracker(str(tmp_path / "changes.db"))
+    product = {"platform": "amazon", "price_paise": 999900, "rating": 4.2, "reviews": []}
+    t.record("p1", "u", product, "fp1")
+    t.record("p1", "u", {**product, "price_paise": 899900}, "fp2")
+    t._db.execute("UPDATE change_events SET at = at - ?", (change_tracker.KEEP_EVENTS + 1,))
+    t._pruned = 0.0
+    t.record("p1", "u", {**product, "price_paise": 799900}, "fp3")   # prunes, then is kept
+    assert [e["new"] for e in t.events()] == ["₹7,999"]
+
+
+def test_compare_one_reports_unsaved_when_the_write_fails(monkeypatch):
+    record = ProductRecord.from_dict({"platform": "amazon", "title": "Phone", "price": "₹9,999",
+                                      "rating": 4.1, "reviews": []})
+    monkeypatch.setattr(app, "scrape", lambda url, platform, deadline: record)
+    monkeypatch.setattr(app, "supabase", object())
+    monkeypatch.setattr(app, "save_to_supabase", lambda *args, **kwargs: None)
+    url = "https://www.amazon.in/dp/B0UNSAVED1"
+    product, change = app._compare_one("amazon", url, app.Deadline(None), False, "cmp")
+    assert product["title"] == "Phone" and product["ai_score"] is not None
+    assert change == {"status": "unsaved", "events": []}
+    assert app.CHANGES.lookup(app._product_id(url), app.product_fingerprint(product),
+                              app.get_scoring_model().version) is None
+
+
+# ─── Supabase writes against an unmigrated table ─────────────────────────────
+
+class _OldProductsTable:
+    """Fake supabase client whose products table predates migrations/001_products_columns.sql."""
+    COLUMNS = {"id", "comparison_id", "platform", "url", "title", "price", "brand", "image", "rating",
+               "ram", "storage", "processor", "camera", "battery", "category_ratings", "ai_score",
+               "ai_verdict", "ai_reasons", "ai_breakdown", "created_at"}
+
+    def __init__(self):
+        self.rows = []
+
+    def table(self, name):
+        return self
+
+    def upsert(self, row, on_conflict=None):
+        unknown = sorted(set(row) - self.COLUMNS)
+        if unknown:
+            raise Exception(f"{{'code': 'PGRST204', 'message': \"Could not find the '{unknown[0]}' "
+                            f"column of 'products' in the schema cache\"}}")
+        self.rows.append(row)
+        return self
+
+    def insert(self, row):
+        return self
+
+    def execute(self):
+        return self
+
+
+def test_save_retries_without_unmigrated_columns(monkeypatch):
+    db = _OldProductsTable()
+    monkeypatch.setattr(app, "supabase", db)
+    monkeypatch.setattr(app, "_missing_columns", set())
+    product = {"platform": "amazon", "title": "Phone", "price": "₹9,999", "display": "6.5 inch",
+               "reviews": [], "ai_score": 70}
+    assert app.save_to_supabase(product, "https://www.amazon.in/dp/B0MIGRATE1")
+    assert app._missing_columns == set(app.OPTIONAL_PRODUCT_COLUMNS)
+    assert set(db.rows[0]) <= db.COLUMNS
+    assert app.save_to_supabase(product, "https://www.amazon.in/dp/B0MIGRATE2")   # no retries now
+    assert len(db.rows) == 2
+
+
+# ─── ProductIndex ────────────────────────────────────────────────────────────
+
+def test_product_index_sees_other_processes_writes(tmp_path):
+    path = str(tmp_path / "index.db")
+    server, worker = ProductIndex(path), ProductIndex(path)
+    phone = {"platform": "amazon", "title": "Acme Nova 5G (8GB RAM, 128GB Storage)", "brand": "Acme",
+             "ram": "8 GB", "storage": "128 GB"}
+    assert server.match({**phone, "platform": "flipkart"}, "amazon") == []
+    worker.add(phone, "https://www.amazon.in/dp/B0NOVA0001")
+    assert server.get("https://www.amazon.in/dp/B0NOVA0001")["title"] == phone["title"]
+    assert [m["url"] for m in server.match({**phone, "platform": "flipkart"}, "amazon")] == [
+        "https://www.amazon.in/dp/B0NOVA0001"]
+    worker.add({**phone, "title": "Acme Nova 5G Pro"}, "https://www.amazon.in/dp/B0NOVA0001")
+    assert server.get("https://www.amazon.in/dp/B0NOVA0001")["title"] == "Acme Nova 5G Pro"
+    assert len(server) == 1
+
+
+# ─── SelectorStats ───────────────────────────────────────────────────────────
+
+def test_dead_selector_recovers_after_markup_rollback(tmp_path):
+    stats = SelectorStats(str(tmp_path / "stats.db"))
+    markup = {"old": False, "new": True}
+    steps = [("old", lambda: markup["old"] and "x"), ("new", lambda: markup["new"] and "x")]
+    for _ in range(200):
+        stats.run("amazon", "price", steps)
+    assert stats.order("amazon", "price", ["old", "new"]) == ["new", "old"]
+    markup["old"] = True  # the site rolled back: both selectors match again
+    for _ in range(60 * selector_stats.EXPLORE_EVERY):
+        stats.run("amazon", "price", steps)
+    assert stats.order("amazon", "price", ["old", "new"]) == ["old", "new"]
+
+
+def test_selector_stats_flush_off_the_extraction_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "stats.db")
+    stats = SelectorStats(path)
+    monkeypatch.setattr(stats, "flush", lambda: (_ for _ in ()).throw(AssertionError("flushed inline")))
+    for _ in range(20):
+        stats.run("flipkart", "title", [("h1", lambda: "Phone")])
+    monkeypatch.undo()
+    # A writer holding the database doesn't block run(), only the flush
+    blocker = sqlite3.connect(path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    stats._db.execute("PRAGMA busy_timeout = 50")
+    try:
+        stats.flush()
+    except sqlite3.OperationalError:
+        pass
+    stats.run("flipkart", "title", [("h1", lambda: "Phone")])
+    blocker.execute("ROLLBACK")
+    stats.flush()  # the failed flush's updates were kept
+    tries, hits = SelectorStats(path)._steps[("flipkart", "title", "h1")]
+    assert hits == tries and tries > 20 * selector_stats.DECAY ** 20
@@ -0,0 +1,111 @@
+"""
+🦅 PRICEHAWK PRO - SHORT-LINK RESOLVER
+Turns share links (dl.flipkart.com/s/…, amzn.in/d/…) into product URLs
+without loading a page.
+
+Redirects are followed by hand, one hop at a time, with HEAD requests (or a
+GET whose body is never read when a host refuses HEAD). As soon as a hop
+points at a URL the owning marketplace can canonicalise, that URL is the
+answer — the product page itself is never requested. Mappings are cached in
+memory and in SQLite under PRICEHAWK_DATA_DIR, so each share link costs at
+most one round of hops ever.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urljoin
+
+import requests
+
+from product_index import DATA_DIR
+from sites import site_for_url
+
+MAX_HOPS = 5
+HOP_TIMEOUT = 5.0
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/124.0.0.0 Safari/537.36"
+)
+
+
+class UrlResolver:
+    def __init__(self, path: str | None = None, transport=None):
+        """`transport(url)` maps a URL to the address actually requested (stub servers)."""
+        self.path = path or os.path.join(DATA_DIR, "short_links.db")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.transport = transport or (lambda url: url)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS short_links (short TEXT PRIMARY KEY, target TEXT, resolved_at REAL)"
+        )
+        self._cache: dict[str, str] = dict(self._db.execute("SELECT short, target FROM short_links"))
+        self.hits = self.misses = self.failures = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @staticmethod
+    def is_short(url: str) -> bool:
+        site = site_for_url(url)
+        return site is not None and site.is_short_link(url)
+
+    def resolve(self, url: str, deadline=None) -> str:
+        """
+        The long product URL behind a share link (cached), or `url` itself
+        when it is not a short link or cannot be resolved in time.
+        """
+        url = url.split("#", 1)[0]
+        if not self.is_short(url):
+            return url
+        with self._lock:
+            target = self._cache.get(url)
+        if target:
+            self.hits += 1
+            return target
+
+        self.misses += 1
+        target = self._follow(url, deadline)
+        if target is None:
+            self.failures += 1
+            print(f"  ⚠️  Could not resolve short link {url[:60]}")
+            return url
+        with self._lock:
+            self._cache[url] = target
+            self._db.execute(
+                "INSERT OR REPLACE INTO short_links VALUES (?, ?, ?)", (url, target, time.time())
+            )
+            self._db.commit()
+        print(f"  → Short link resolved: {url[:50]} → {target[:70]}")
+        return target
+
+    def _follow(self, url: str, deadline) -> str | None:
+        session = requests.Session()
+        session.headers["User-Agent"] = USER_AGENT
+        current = url
+        for _ in range(MAX_HOPS):
+            site = site_for_url(current)
+            if site is not None and not site.is_short_link(current) and site.canonicalize(current):
+                return current  # a product URL: no need to load it
+            if deadline is not None and deadline.expired():
+                return None
+            timeout = deadline.timeout(HOP_TIMEOUT) if deadline is not None else HOP_TIMEOUT
+            try:
+                resp = session.head(self.transport(current), allow_redirects=False, timeout=timeout)
+                if resp.status_code in (403, 405, 501) or (resp.status_code == 200 and "location" not in resp.headers):
+                    resp = session.get(self.transport(current), allow_redirects=False, timeout=timeout, stream=True)
+                    resp.close()  # headers are all we need
+            except requests.RequestException as exc:
+                print(f"  → Short-link hop failed: {exc}")
+                return None
+            location = resp.headers.get("location")
+            if not location or resp.status_code not in (301, 302, 303, 307, 308):
+                return None
+            current = urljoin(current, location)
+        return None
+
+    def stats(self) -> dict:
+        return {"cached": len(self._cache), "hits": self.hits, "misses": self.misses, "failures": self.failures}
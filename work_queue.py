@@ -0,0 +1,208 @@
+"""
+🦅 PRICEHAWK PRO - SCRAPE WORK QUEUE
+Hands product-page scrapes from the API to scrape_worker.py processes.
+
+A job is one canonical product URL. enqueue() coalesces with a job for the
+same URL that is still pending; workers lease() the oldest runnable job
+for `lease_seconds`, then ack() it with the extracted product or nack() it
+with an error — retried with exponential backoff until max_attempts, then
+failed. A lease that runs out (the worker died or hung) makes the job
+runnable again. Jobs may carry an expiry: once past it they fail instead of
+being scraped for a client that has already given up. Finished jobs (and
+their results) are deleted KEEP_FINISHED after they finish, by prune(),
+which the workers run every PRUNE_EVERY seconds.
+
+This implementation is a SQLite file under PRICEHAWK_DATA_DIR (WAL mode),
+shared by every process on the host; workers on other hosts need the same
+interface over a networked store.
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from product_index import DATA_DIR
+from records import dumps, loads
+
+LEASE_SECONDS = 90.0
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 5.0   # seconds before the 2nd attempt, doubling after that
+KEEP_FINISHED = 24 * 3600
+PRUNE_EVERY = 600.0   # how often each worker deletes finished jobs past KEEP_FINISHED
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    def __init__(self, path: str | None = None, max_attempts: int = MAX_ATTEMPTS):
+        self.path = path or os.path.join(DATA_DIR, "work_queue.db")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # Autocommit; lease() opens its own write transaction
+        self._db = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                   id TEXT PRIMARY KEY, url TEXT, platform TEXT, status TEXT,
+                   attempts INTEGER DEFAULT 0, max_attempts INTEGER, timeout REAL,
+                   expires_at REAL, not_before REAL, lease_until REAL, worker TEXT,
+                   result BLOB, error TEXT, created_at REAL, updated_at REAL);
+               CREATE INDEX IF NOT EXISTS jobs_runnable ON jobs (status, not_before, created_at);
+               CREATE INDEX IF NOT EXISTS jobs_url ON jobs (url, platform, status);"""
+        )
+
+    # ── producer side ─────────────────────────────────────────────────────────
+
+    def enqueue(self, url: str, platform: str, timeout: float | None = None,
+                expires_at: float | None = None) -> str:
+        """
+        Queue a scrape of `url` and return the job id. `timeout` is the
+        worker's fetch budget (s); `expires_at` (time.time()) the point past
+        which nobody wants the result. A pending job for the same URL is reused.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, expires_at FROM jobs WHERE url = ? AND platform = ? "
+                "AND status IN ('queued', 'leased') ORDER BY created_at DESC LIMIT 1",
+                (url, platform),
+            ).fetchone()
+            if row:
+                job_id, old_expiry = row
+                if old_expiry is not None and (expires_at is None or expires_at > old_expiry):
+                    self._db.execute("UPDATE jobs SET expires_at = ? WHERE id = ?", (expires_at, job_id))
+                return job_id
+            job_id = uuid.uuid4().hex[:20]
+            self._db.execute(
+                "INSERT INTO jobs (id, url, platform, status, max_attempts, timeout, expires_at, "
+                "not_before, created_at, updated_at) VALUES (?, ?, ?, 'queued', ?, ?, ?, ?, ?, ?)",
+                (job_id, url, platform, self.max_attempts, timeout, expires_at, now, now, now),
+            )
+            return job_id
+
+    def get(self, job_id: str) -> dict | None:
+        """The job's status, attempts, error and (once done) result dict."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, url, platform, status, attempts, error, result, created_at, updated_at "
+                "FROM jobs WHERE id = ?", (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("id", "url", "platform", "status", "attempts", "error", "result", "created_at", "updated_at")
+        job = dict(zip(keys, row))
+        job["result"] = loads(job["result"]) if job["result"] else None
+        return job
+
+    def wait(self, job_id: str, deadline, poll: float = 0.2) -> dict | None:
+        """Poll until the job is done or failed, or the Deadline runs out."""
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] in ("done", "failed") or deadline.expired():
+                return job
+            deadline.sleep(poll)
+
+    # ── worker side ───────────────────────────────────────────────────────────
+
+    def lease(self, worker: str, lease_seconds: float = LEASE_SECONDS) -> dict | None:
+        """Claim the oldest runnable job (or one whose lease ran out), or None."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "UPDATE jobs SET status = 'failed', error = COALESCE(error, 'expired'), updated_at = ? "
+                    "WHERE status IN ('queued', 'leased') AND expires_at IS NOT NULL AND expires_at < ? "
+                    "AND (status = 'queued' OR lease_until < ?)",
+                    (now, now, now),
+                )
+                self._db.execute(
+                    "UPDATE jobs SET status = 'failed', error = COALESCE(error, 'lease expired'), updated_at = ? "
+                    "WHERE status = 'leased' AND lease_until < ? AND attempts >= max_attempts",
+                    (now, now),
+                )
+                row = self._db.execute(
+                    "SELECT id, url, platform, attempts, timeout, expires_at FROM jobs "
+                    "WHERE (status = 'queued' AND not_before <= ?) OR (status = 'leased' AND lease_until < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (now, now),
+                ).fetchone()
+                if row is None:
+                    self._db.execute("COMMIT")
+                    return None
+                job_id, url, platform, attempts, timeout, expires_at = row
+                self._db.execute(
+                    "UPDATE jobs SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1, "
+                    "updated_at = ? WHERE id = ?",
+                    (worker, now + lease_seconds, now, job_id),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return {"id": job_id, "url": url, "platform": platform, "attempt": attempts + 1,
+                "timeout": timeout, "expires_at": expires_at}
+
+    def ack(self, job_id: str, worker: str, result) -> bool:
+        """Finish a leased job with its result; False if the lease was lost."""
+        now = time.time()
+        with self._lock:
+            cur = self._db.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND worker = ?",
+                (dumps(result), now, job_id, worker),
+            )
+            return cur.rowcount == 1
+
+    def nack(self, job_id: str, worker: str, error: str) -> bool:
+        """Give a leased job back: retried after a backoff, or failed for good."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT attempts, max_attempts, expires_at FROM jobs WHERE id = ? AND status = 'leased' AND worker = ?",
+                (job_id, worker),
+            ).fetchone()
+            if row is None:
+                return False
+            attempts, max_attempts, expires_at = row
+            retry_at = now + RETRY_BACKOFF * 2 ** (attempts - 1)
+            if attempts >= max_attempts or (expires_at is not None and retry_at >= expires_at):
+                self._db.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, lease_until = NULL, updated_at = ? WHERE id = ?",
+                    (error, now, job_id),
+                )
+            else:
+                self._db.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, not_before = ?, lease_until = NULL, "
+                    "worker = NULL, updated_at = ? WHERE id = ?",
+                    (error, retry_at, now, job_id),
+                )
+            return True
+
+    # ── housekeeping ──────────────────────────────────────────────────────────
+
+    def prune(self, older_than: float = KEEP_FINISHED) -> int:
+        """Delete finished jobs last updated more than `older_than` seconds ago."""
+        with self._lock:
+            cur = self._db.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+                (time.time() - older_than,),
+            )
+            return cur.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            oldest = self._db.execute(
+                "SELECT MIN(created_at) FROM jobs WHERE status = 'queued'"
+            ).fetchone()[0]
+        return {
+            **{s: counts.get(s, 0) for s in ("queued", "leased", "done", "failed")},
+            "oldest_queued_s": round(time.time() - oldest, 1) if oldest else None,
+        }